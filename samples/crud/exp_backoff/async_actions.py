@@ -11,18 +11,19 @@ _logger = logging.getLogger("fruit_store.%s" % __name__)
 
 class AsyncFruitPersister(async_model_actions.AsyncPersister):
 
-    def __init__(self, fruit, async_state=None):
-        async_model_actions.AsyncPersister.__init__(self, fruit, [], async_state)
+    def __init__(self, fruit, async_state=None, deadline=None):
+        async_model_actions.AsyncPersister.__init__(self, fruit, [], async_state, deadline=deadline)
 
 
 class AsyncFruitRetriever(async_model_actions.AsyncModelRetriever):
 
-    def __init__(self, fruit_id, async_state=None):
+    def __init__(self, fruit_id, async_state=None, deadline=None):
         async_model_actions.AsyncModelRetriever.__init__(
             self,
             "fruit_by_fruit_id",
             fruit_id,
-            async_state)
+            async_state,
+            deadline=deadline)
 
     def create_model_from_doc(self, doc):
         return Fruit(doc=doc)
@@ -83,20 +84,21 @@ class AsyncFruitCreator(AsyncAction):
 
 class AsyncFruitUpdater(AsyncAction):
 
-    def __init__(self, fruit_id, color, async_state=None):
+    def __init__(self, fruit_id, color, async_state=None, deadline=None):
         AsyncAction.__init__(self, async_state)
 
         self.fruit_id = fruit_id
         self.color = color
+        self.deadline = deadline
 
-        self._rs = ExponentialBackoffRetryStrategy()
+        self._rs = ExponentialBackoffRetryStrategy(deadline=deadline)
         self._callback = None
 
     def update(self, callback):
         assert callback is not None
         self._callback = callback
 
-        afr = AsyncFruitRetriever(self.fruit_id)
+        afr = AsyncFruitRetriever(self.fruit_id, deadline=self.deadline)
         afr.fetch(self._on_fetch_done)
 
     def _on_fetch_done(self, is_ok, fruit, afr):
@@ -110,7 +112,7 @@ class AsyncFruitUpdater(AsyncAction):
 
         fruit.change_color(self.color)
 
-        afp = AsyncFruitPersister(fruit)
+        afp = AsyncFruitPersister(fruit, deadline=self.deadline)
         afp.persist(self._on_persist_done)
 
     def _on_persist_done(self, is_ok, is_conflict, afp):
@@ -132,7 +134,7 @@ class AsyncFruitUpdater(AsyncAction):
     def _on_rs_wait_done(self, waited_in_ms):
         if not waited_in_ms:
             _logger.error(
-                "Conflict detected updating fruit '%s' - bailing because too many retries",
+                "Conflict detected updating fruit '%s' - bailing because too many retries or out of time",
                 self.fruit_id)
             self._call_callback(False)
             return
@@ -142,7 +144,7 @@ class AsyncFruitUpdater(AsyncAction):
             self.fruit_id,
             waited_in_ms)
 
-        afr = AsyncFruitRetriever(self.fruit_id)
+        afr = AsyncFruitRetriever(self.fruit_id, deadline=self.deadline)
         afr.fetch(self._on_fetch_done)
 
     def _call_callback(self, is_ok, fruit=None):
@@ -153,19 +155,20 @@ class AsyncFruitUpdater(AsyncAction):
 
 class AsyncFruitDeleter(AsyncAction):
 
-    def __init__(self, fruit_id, async_state=None):
+    def __init__(self, fruit_id, async_state=None, deadline=None):
         AsyncAction.__init__(self, async_state)
 
         self.fruit_id = fruit_id
+        self.deadline = deadline
 
-        self._rs = ExponentialBackoffRetryStrategy()
+        self._rs = ExponentialBackoffRetryStrategy(deadline=deadline)
         self._callback = None
 
     def delete(self, callback):
         assert callback is not None
         self._callback = callback
 
-        afr = AsyncFruitRetriever(self.fruit_id)
+        afr = AsyncFruitRetriever(self.fruit_id, deadline=self.deadline)
         afr.fetch(self._on_fetch_done)
 
     def _on_fetch_done(self, is_ok, fruit, afr):
@@ -177,7 +180,7 @@ class AsyncFruitDeleter(AsyncAction):
             self._call_callback(True)
             return
 
-        ad = async_model_actions.AsyncDeleter(fruit)
+        ad = async_model_actions.AsyncDeleter(fruit, deadline=self.deadline)
         ad.delete(self._on_delete_done)
 
     def _on_delete_done(self, is_ok, is_conflict, ad):
@@ -197,7 +200,7 @@ class AsyncFruitDeleter(AsyncAction):
     def _on_rs_wait_done(self, waited_in_ms):
         if not waited_in_ms:
             _logger.error(
-                "Conflict detected deleting fruit '%s' - bailing because too many retries",
+                "Conflict detected deleting fruit '%s' - bailing because too many retries or out of time",
                 self.fruit_id)
             self._call_callback(False)
             return
@@ -207,7 +210,7 @@ class AsyncFruitDeleter(AsyncAction):
             self.fruit_id,
             waited_in_ms)
 
-        afr = AsyncFruitRetriever(self.fruit_id)
+        afr = AsyncFruitRetriever(self.fruit_id, deadline=self.deadline)
         afr.fetch(self._on_fetch_done)
 
     def _call_callback(self, is_ok, fruit=None):
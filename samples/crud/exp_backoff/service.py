@@ -45,6 +45,12 @@ class RequestHandler(tornado.web.RequestHandler):
         'additionalProperties': False,
     }
 
+    def _deadline(self):
+        """The time by which all the work done to respond
+        to the request (including retries) must be done.
+        """
+        return time.time() + self.settings['request_budget_in_ms'] / 1000.0
+
     def fruit_as_dict_for_response_body(self, fruit):
         return {
             'fruit_id': fruit.fruit_id,
@@ -159,7 +165,7 @@ class SingleResourceRequestHandler(RequestHandler):
             self.finish()
             return
 
-        afu = AsyncFruitUpdater(fruit_id, request_body['color'])
+        afu = AsyncFruitUpdater(fruit_id, request_body['color'], deadline=self._deadline())
         afu.update(self._put_on_update_done)
 
     def _put_on_update_done(self, is_ok, fruit, afu):
@@ -179,7 +185,7 @@ class SingleResourceRequestHandler(RequestHandler):
 
     @tornado.web.asynchronous
     def delete(self, fruit_id):
-        afd = AsyncFruitDeleter(fruit_id)
+        afd = AsyncFruitDeleter(fruit_id, deadline=self._deadline())
         afd.delete(self._delete_on_delete_done)
 
     def _delete_on_delete_done(self, is_ok, fruit, afd):
@@ -240,6 +246,16 @@ class CommandLineParser(optparse.OptionParser):
             type='string',
             help=help)
 
+        default = 2000
+        help = 'request budget in ms - default = %s' % default
+        self.add_option(
+            '--budget',
+            action='store',
+            dest='request_budget_in_ms',
+            default=default,
+            type='int',
+            help=help)
+
 
 def _sigint_handler(signal_number, frame):
     assert signal_number == signal.SIGINT
@@ -277,6 +293,7 @@ if __name__ == '__main__':
     tornado.httpclient.AsyncHTTPClient.configure(client)
 
     settings = {
+        'request_budget_in_ms': clo.request_budget_in_ms,
     }
 
     app = tornado.web.Application(handlers=handlers, **settings)
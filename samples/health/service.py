@@ -15,7 +15,7 @@ import tornado.httpserver
 import tornado.web
 
 from tor_async_couchdb import async_model_actions
-from tor_async_couchdb.async_model_actions import AsyncCouchDBHealthCheck
+from tor_async_couchdb.health_monitor import HealthMonitor
 
 _logger = logging.getLogger(__name__)
 
@@ -32,25 +32,33 @@ class HealthRequestHandler(tornado.web.RequestHandler):
 
     url_spec = r"/v1.0/_health"
 
-    @tornado.web.asynchronous
+    def initialize(self, health_monitor):
+        self.health_monitor = health_monitor
+
     def get(self):
         is_quick = self._is_quick()
         if is_quick is None:
             self.set_status(httplib.BAD_REQUEST)
-            self.finish()
             return
 
         if is_quick:
-            self._write_response(True)
+            self._write_response(HealthMonitor.STATUS_GREEN)
             return
 
-        acdbhc = AsyncCouchDBHealthCheck()
-        acdbhc.check(self._get_on_acdbhc_check_done)
-
-    def _get_on_acdbhc_check_done(self, is_ok, acdbhc):
-        self._write_response(is_ok)
+        # served from the health monitor's most recent probes
+        # rather than generating a request to CouchDB
+        health = self.health_monitor.snapshot()
+        details = {
+            "numProbes": health["num_probes"],
+            "successRate": health["success_rate"],
+            "latencyInMs": health["latency_in_ms"],
+            "latencySLOInMs": health["latency_slo_in_ms"],
+            "lastProbeOk": health["last_probe_ok"],
+            "lastProbeAt": health["last_probe_at"],
+        }
+        self._write_response(health["status"], details)
 
-    def _write_response(self, is_ok):
+    def _write_response(self, status, details=None):
         location = "%s://%s%s%s" % (
             self.request.protocol,
             self.request.host,
@@ -59,7 +67,7 @@ class HealthRequestHandler(tornado.web.RequestHandler):
         )
 
         body = {
-            "status": "green" if is_ok else "red",
+            "status": status,
             "links": {
                 "self": {
                     "href": location,
@@ -67,12 +75,15 @@ class HealthRequestHandler(tornado.web.RequestHandler):
             },
         }
 
+        if details is not None:
+            body["details"] = details
+
         self.write(body)
 
         self.set_header("location", location)
 
+        is_ok = status != HealthMonitor.STATUS_RED
         self.set_status(httplib.OK if is_ok else httplib.SERVICE_UNAVAILABLE)
-        self.finish()
 
     def _is_quick(self):
         arg_value = self.get_argument("quick", "y")
@@ -148,12 +159,15 @@ if __name__ == "__main__":
 
     async_model_actions.database = clo.database
 
+    health_monitor = HealthMonitor()
+
     signal.signal(signal.SIGINT, _sigint_handler)
 
     handlers = [
         (
             HealthRequestHandler.url_spec,
-            HealthRequestHandler
+            HealthRequestHandler,
+            {"health_monitor": health_monitor},
         ),
     ]
 
@@ -174,4 +188,6 @@ if __name__ == "__main__":
         clo.port,
         clo.database)
 
+    health_monitor.start()
+
     tornado.ioloop.IOLoop.instance().start()
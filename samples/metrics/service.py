@@ -9,12 +9,14 @@ import optparse
 import signal
 import sys
 import time
+import urllib
+import urlparse
 
 import tornado.httpserver
 import tornado.web
 
-from tor_async_couchdb import async_model_actions
-from tor_async_couchdb.async_model_actions import AsyncDatabaseMetricsRetriever
+from tor_async_couchdb.async_model_actions import CouchDBDatabase
+from tor_async_couchdb.database_metrics_collector import DatabaseMetricsCollector
 
 _logger = logging.getLogger(__name__)
 
@@ -23,12 +25,12 @@ class MetricsRequestHandler(tornado.web.RequestHandler):
 
     url_spec = r"/v1.0/_metrics"
 
-    @tornado.web.asynchronous
+    def initialize(self, metrics_collector):
+        self.metrics_collector = metrics_collector
+
     def get(self):
-        adbmr = AsyncDatabaseMetricsRetriever()
-        adbmr.fetch(self._on_adbmr_fetch_done)
+        database_metrics = self.metrics_collector.database_metrics
 
-    def _on_adbmr_fetch_done(self, is_ok, database_metrics, adbmr):
         location = "%s://%s%s" % (
             self.request.protocol,
             self.request.host,
@@ -43,6 +45,8 @@ class MetricsRequestHandler(tornado.web.RequestHandler):
         }
 
         if database_metrics:
+            body['collectedAt'] = self.metrics_collector.collected_at.isoformat() + "+00:00"
+            body['stalenessInMs'] = int(self.metrics_collector.staleness_in_ms)
             body['database'] = {
                 "docCount": database_metrics.doc_count,
                 "dataSize": database_metrics.data_size,
@@ -62,8 +66,178 @@ class MetricsRequestHandler(tornado.web.RequestHandler):
 
         self.set_header("location", location)
 
-        self.set_status(httplib.OK if is_ok else httplib.SERVICE_UNAVAILABLE)
-        self.finish()
+        self.set_status(httplib.OK if database_metrics else httplib.SERVICE_UNAVAILABLE)
+
+
+def _prometheus_labels(**labels):
+    """Format ```labels``` per the Prometheus text exposition format
+    escaping backslashes, double quotes and line feeds in label values.
+    """
+    if not labels:
+        return ""
+
+    def escape(value):
+        value = str(value)
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, escape(labels[name]))
+        for name in sorted(labels))
+
+
+def _database_name(database_url):
+    """Metrics are labeled with the database's name rather than its
+    URL so the exposition doesn't reveal the CouchDB host or any
+    credentials embedded in the URL.
+    """
+    path = urlparse.urlparse(database_url).path.rstrip("/")
+    return urllib.unquote(path.rsplit("/", 1)[-1])
+
+
+class PrometheusMetricsRequestHandler(tornado.web.RequestHandler):
+    """Exposes database and view metrics along with client-side request
+    latencies and conflict, retry and error counters in the Prometheus
+    text exposition format (version 0.0.4).
+    """
+
+    url_spec = r"/metrics"
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def initialize(self, metrics_collector):
+        self.metrics_collector = metrics_collector
+
+    def get(self):
+        self._lines = []
+
+        self._add_metric(
+            "couchdb_database_metrics_up",
+            "gauge",
+            "1 if the most recent refresh of database metrics succeeded otherwise 0",
+            [({}, 1 if self.metrics_collector.last_refresh_ok else 0)])
+
+        database_metrics = self.metrics_collector.database_metrics
+        if database_metrics:
+            self._add_metric(
+                "couchdb_database_metrics_staleness_seconds",
+                "gauge",
+                "Age of the database metrics snapshot",
+                [({}, self.metrics_collector.staleness_in_ms / 1000.0)])
+            self._add_database_metrics(database_metrics)
+
+        self._add_request_metrics(self.metrics_collector.db.request_metrics)
+
+        self.set_header("Content-Type", type(self).content_type)
+        self.write("\n".join(self._lines) + "\n")
+        self.set_status(httplib.OK)
+
+    def _add_metric(self, name, metric_type, help, samples):
+        """Samples whose value is ```None``` (ex the fragmentation of
+        a database or view whose sizes couldn't be retrieved) are
+        skipped since Prometheus has no representation for them.
+        """
+        self._lines.append("# HELP %s %s" % (name, help))
+        self._lines.append("# TYPE %s %s" % (name, metric_type))
+        for (labels, value) in samples:
+            if value is None:
+                continue
+            self._lines.append("%s%s %s" % (name, _prometheus_labels(**labels), repr(float(value))))
+
+    def _add_database_metrics(self, database_metrics):
+        labels = {"database": _database_name(database_metrics.database)}
+
+        self._add_metric(
+            "couchdb_database_doc_count",
+            "gauge",
+            "Number of documents in the database",
+            [(labels, database_metrics.doc_count)])
+        self._add_metric(
+            "couchdb_database_data_size_bytes",
+            "gauge",
+            "Size of live data in the database",
+            [(labels, database_metrics.data_size)])
+        self._add_metric(
+            "couchdb_database_disk_size_bytes",
+            "gauge",
+            "Size of the database on disk",
+            [(labels, database_metrics.disk_size)])
+        self._add_metric(
+            "couchdb_database_fragmentation_percent",
+            "gauge",
+            "Percentage of the database's disk size that's wasted space",
+            [(labels, database_metrics.fragmentation)])
+
+        def view_samples(attribute):
+            return [
+                (
+                    dict(labels, design_doc=view_metrics.design_doc),
+                    getattr(view_metrics, attribute),
+                )
+                for view_metrics in database_metrics.view_metrics
+            ]
+
+        self._add_metric(
+            "couchdb_view_data_size_bytes",
+            "gauge",
+            "Size of live data in the view index",
+            view_samples("data_size"))
+        self._add_metric(
+            "couchdb_view_disk_size_bytes",
+            "gauge",
+            "Size of the view index on disk",
+            view_samples("disk_size"))
+        self._add_metric(
+            "couchdb_view_fragmentation_percent",
+            "gauge",
+            "Percentage of the view index's disk size that's wasted space",
+            view_samples("fragmentation"))
+
+    def _add_request_metrics(self, request_metrics):
+        snapshot = request_metrics.snapshot(percentiles=[50, 90, 99, 99.9])
+
+        name = "couchdb_client_request_duration_seconds"
+        self._lines.append("# HELP %s Time taken by CouchDB to respond to requests" % name)
+        self._lines.append("# TYPE %s summary" % name)
+        for series in snapshot:
+            labels = {
+                "operation": series["operation"],
+                "method": series["method"],
+                "status_class": series["status_class"],
+            }
+            request_time = series["request_time"]
+            for (quantile, key) in [("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("0.999", "p99.9")]:
+                self._lines.append("%s%s %s" % (
+                    name,
+                    _prometheus_labels(quantile=quantile, **labels),
+                    repr(request_time[key] / 1000.0)))
+            self._lines.append("%s_sum%s %s" % (
+                name,
+                _prometheus_labels(**labels),
+                repr(request_time["sum_in_ms"] / 1000.0)))
+            self._lines.append("%s_count%s %d" % (
+                name,
+                _prometheus_labels(**labels),
+                request_time["count"]))
+
+        counters = [
+            ("conflicts", "Number of requests CouchDB rejected with 409 Conflict"),
+            ("errors", "Number of requests which failed for reasons other than conflicts"),
+            ("retries", "Number of retries permitted by retry strategies"),
+            ("retries_exhausted", "Number of times a retry strategy gave up"),
+            ("retries_abandoned", "Number of retries abandoned because of a deadline"),
+            ("retries_rejected", "Number of retries rejected by a retry budget"),
+            ("circuit_breaker_rejections", "Number of requests rejected by the circuit breaker"),
+            ("load_shed", "Number of requests shed by the concurrency limiter"),
+            ("deadline_exceeded", "Number of requests not sent because their deadline had passed"),
+            ("transient_retries", "Number of retries of requests which failed with transient errors"),
+            ("transient_retries_exhausted", "Number of requests which failed after exhausting transient retries"),
+        ]
+        for (counter, help) in counters:
+            self._add_metric(
+                "couchdb_client_%s_total" % counter,
+                "counter",
+                help,
+                [({}, request_metrics.counters.get(counter, 0))])
 
 
 class CommandLineParser(optparse.OptionParser):
@@ -98,6 +272,16 @@ class CommandLineParser(optparse.OptionParser):
             type="string",
             help=help)
 
+        default = 30 * 1000
+        help = "metrics refresh interval in ms - default = %s" % default
+        self.add_option(
+            "--refresh",
+            action="store",
+            dest="refresh_interval_in_ms",
+            default=default,
+            type="int",
+            help=help)
+
         default = r"http://couchdb:5984/tor_async_couchdb_sample"
         help = "database - default = %s" % default
         self.add_option(
@@ -126,20 +310,24 @@ if __name__ == "__main__":
         format="%(asctime)s.%(msecs)03d+00:00 %(levelname)s %(module)s %(message)s",
         stream=sys.stdout)
 
-    async_model_actions.database = clo.database
+    db = CouchDBDatabase(clo.database, use_curl=True)
+    metrics_collector = DatabaseMetricsCollector(clo.refresh_interval_in_ms, db=db)
 
     signal.signal(signal.SIGINT, _sigint_handler)
 
     handlers = [
         (
             MetricsRequestHandler.url_spec,
-            MetricsRequestHandler
+            MetricsRequestHandler,
+            {"metrics_collector": metrics_collector},
+        ),
+        (
+            PrometheusMetricsRequestHandler.url_spec,
+            PrometheusMetricsRequestHandler,
+            {"metrics_collector": metrics_collector},
         ),
     ]
 
-    client = "tornado.curl_httpclient.CurlAsyncHTTPClient"
-    tornado.httpclient.AsyncHTTPClient.configure(client)
-
     settings = {
     }
 
@@ -154,4 +342,6 @@ if __name__ == "__main__":
         clo.port,
         clo.database)
 
+    metrics_collector.start()
+
     tornado.ioloop.IOLoop.instance().start()
@@ -2,16 +2,28 @@
 Tornado async actions against CouchDB.
 """
 
+import base64
+import collections
+import datetime
+import functools
+import hashlib
 import httplib
 import json
 import logging
 import re
+import time
 import urllib
+import urlparse
 
+import tornado.concurrent
 import tornado.httputil
 import tornado.httpclient
 import tornado.ioloop
 
+from priority_scheduler import PRIORITY_BACKGROUND
+from priority_scheduler import PRIORITY_INTERACTIVE
+from request_metrics import RequestMetrics
+from retry_strategy import ExponentialBackoffRetryStrategy
 import tamper
 
 
@@ -60,30 +72,371 @@ def _fragmentation(data_size, disk_size):
     return int(round(fragmentation, 0))
 
 
+def _is_doc_tamper_free(db, doc):
+    """Returns ```True``` if ```db``` isn't configured with a
+    ```tampering_signer``` or ```doc```'s signature is valid.
+    Otherwise tampering is logged and ```False``` is returned.
+    """
+    if db.tampering_signer:
+        if not tamper.verify(db.tampering_signer, doc):
+            _logger.error(
+                "tampering detected in doc '%s'",
+                doc["_id"])
+            return False
+    return True
+
+
+def _operation(method, url, db_url):
+    """Classifies a request to CouchDB by the kind of operation
+    it performs. The operation is used to group request latencies
+    in ```CouchDBDatabase.request_metrics```.
+
+    ```url``` is classified by its path relative to the database's
+    URL (```db_url```) so that databases whose URL has a path prefix
+    (ex CouchDB behind a reverse proxy at ```/couch/db```) are classified
+    the same as databases at the root of the server.
+    """
+    db_path = urlparse.urlparse(db_url).path.strip("/")
+    path = urlparse.urlparse(url).path.strip("/")
+    is_on_database = path == db_path or path.startswith(db_path + "/")
+    if is_on_database:
+        path = path[len(db_path):]
+    else:
+        # a request to the server hosting the database (ex _active_tasks)
+        path = "/" + path
+
+    if "/_bulk_docs" in path:
+        return "bulk_docs"
+    if "/_all_docs" in path:
+        return "all_docs"
+    if "/_view/" in path:
+        return "view"
+    if "/_changes" in path:
+        return "changes"
+    if "/_compact" in path:
+        return "compact"
+    if path.endswith("/_info"):
+        return "metrics"
+    if method == "DELETE":
+        return "delete"
+    if method in ["PUT", "POST"]:
+        return "persist"
+    if not is_on_database or not path:
+        # a GET of the server or of the database itself
+        return "metrics"
+    return "by_id"
+
+
+"""```_long_lived_operations``` are the operations whose requests are
+expected to wait on CouchDB (ex a longpoll ```_changes``` request waits up
+to its timeout for a change). The response times of these requests say
+nothing about CouchDB's health or capacity so they're neither limited by
+nor reported to a database's circuit breaker and concurrency limiter and
+they don't take a slot in a database's priority scheduler.
+"""
+_long_lived_operations = frozenset(["changes"])
+
+
+def _is_deadline_passed(deadline):
+    return deadline is not None and deadline <= time.time()
+
+
+def _earliest_deadline(deadlines):
+    """Returns the earliest of ```deadlines``` ignoring ```None```s
+    or ```None``` if none of ```deadlines``` is a deadline. Batches
+    of requests (ex an ```_all_docs``` request) must be done by the
+    earliest deadline of the requests in the batch.
+    """
+    deadlines = [deadline for deadline in deadlines if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+
+def _metrics_fetch_failure_detail(fetch_failure_detail, default_fetch_failure_detail):
+    """The async actions which retrieve metrics define their own ```FFD_*```
+    values some of which overlap with ```CouchDBAsyncHTTPClient```'s. The
+    client's values which explain why a request failed without CouchDB
+    processing it don't overlap with the metrics values so they're passed
+    through - otherwise ```default_fetch_failure_detail``` is returned.
+    """
+    cls = CouchDBAsyncHTTPClient
+    passed_through_fetch_failure_details = [
+        cls.FFD_CIRCUIT_OPEN,
+        cls.FFD_LOAD_SHED,
+        cls.FFD_DEADLINE_EXCEEDED,
+        cls.FFD_TRANSPORT_ERROR,
+        cls.FFD_SERVER_ERROR,
+    ]
+    if fetch_failure_detail in passed_through_fetch_failure_details:
+        return fetch_failure_detail
+    return default_fetch_failure_detail
+
+
+def _hashable_key(key):
+    """View keys can be lists (ie composite keys) which can't be used
+    as dictionary keys. This function converts lists to tuples so
+    view keys can be used as dictionary keys.
+    """
+    if isinstance(key, list):
+        return tuple(_hashable_key(k) for k in key)
+    return key
+
+
+class CouchDBDatabase(object):
+    """An instance of ```CouchDBDatabase``` describes how to talk to
+    a single CouchDB database. Each instance owns its own
+    ```tornado.httpclient.AsyncHTTPClient``` and therefore its own
+    connection pool which means a single process can drive several
+    databases at full concurrency without queuing behind
+    ```tornado.httpclient.AsyncHTTPClient```'s default of 10
+    concurrent requests.
+
+    Every async action accepts an optional ```db``` argument. Async
+    actions which aren't given a ```CouchDBDatabase``` use this
+    module's ```database```, ```tampering_signer```, ```username```,
+    ```password``` and ```validate_cert``` globals.
+
+    ```max_clients``` is the maximum number of concurrent requests
+    the database's async HTTP client will issue. Requests in excess
+    of ```max_clients``` are queued by the async HTTP client.
+
+    If ```keep_alive``` is ```False``` CouchDB is asked to close
+    each connection once a response has been returned.
+
+    ```connect_timeout``` and ```request_timeout``` are in seconds.
+    If either is ```None``` the async HTTP client's default is used.
+
+    If ```single_flight``` is ```True``` identical GET requests of the same
+    priority which are issued while an earlier request is still waiting
+    on CouchDB aren't sent to CouchDB. Instead they share the earlier request's
+    response (each creating its own models from the response). Single-flight
+    is opt-in since a GET which joins an in-flight GET can see a response
+    from before a write made after the in-flight GET was sent - ie callers
+    give up read-after-write consistency for identical concurrent GETs.
+
+    The response time of each request to the database is recorded
+    in ```request_metrics``` which is a ```RequestMetrics```. Supply
+    ```request_metrics``` to share a single ```RequestMetrics``` across
+    several databases.
+
+    If ```circuit_breaker``` isn't ```None``` it's a ```CircuitBreaker```
+    which ```CouchDBAsyncHTTPClient``` consults before sending each request
+    to the database and informs of each response's outcome and latency.
+    While the circuit breaker is open requests fail fast without being
+    sent to CouchDB.
+
+    If ```concurrency_limiter``` isn't ```None``` it's an
+    ```AdaptiveConcurrencyLimiter``` which bounds the number of requests
+    ```CouchDBAsyncHTTPClient``` sends concurrently to the database by the
+    database's observed capacity. Requests in excess of the limit are
+    queued and, once the queue is full, shed.
+
+    If ```priority_scheduler``` isn't ```None``` it's a ```PriorityScheduler```
+    which gives interactive and background requests separate concurrency
+    budgets so background traffic can't add latency to interactive traffic.
+
+    If ```contention_monitor``` isn't ```None``` it's a ```ContentionMonitor```
+    which ```CouchDBAsyncHTTPClient``` informs of the outcome (conflict or
+    not) and latency of each document write so an ```AdaptiveRetryStrategy```
+    can scale its retry delays to the database's observed contention.
+
+    If ```transient_retry_policy``` isn't ```None``` it's a ```TransientRetryPolicy```
+    which ```CouchDBAsyncHTTPClient``` uses to retry idempotent requests that
+    fail for transient reasons (connection failures, timeouts and responses
+    like 503 from a busy CouchDB node) rather than failing the async action.
+
+    If ```use_curl``` is ```True``` the database's async HTTP client
+    is a ```tornado.curl_httpclient.CurlAsyncHTTPClient``` otherwise
+    the async HTTP client is whatever implementation
+    ```tornado.httpclient.AsyncHTTPClient``` has been configured to use.
+    Note that using the cURL client requires pycurl be installed.
+    """
+
+    def __init__(self,
+                 url,
+                 tampering_signer=None,
+                 username=None,
+                 password=None,
+                 validate_cert=True,
+                 max_clients=10,
+                 keep_alive=True,
+                 connect_timeout=None,
+                 request_timeout=None,
+                 use_curl=False,
+                 single_flight=False,
+                 request_metrics=None,
+                 circuit_breaker=None,
+                 concurrency_limiter=None,
+                 priority_scheduler=None,
+                 contention_monitor=None,
+                 transient_retry_policy=None):
+        object.__init__(self)
+
+        self.url = url
+        self.tampering_signer = tampering_signer
+        self.username = username
+        self.password = password
+        self.validate_cert = validate_cert
+        self.max_clients = max_clients
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.use_curl = use_curl
+        self.single_flight = single_flight
+        self.request_metrics = request_metrics if request_metrics is not None else RequestMetrics()
+        self.circuit_breaker = circuit_breaker
+        self.concurrency_limiter = concurrency_limiter
+        self.priority_scheduler = priority_scheduler
+        self.contention_monitor = contention_monitor
+        self.transient_retry_policy = transient_retry_policy
+
+        self._http_client = None
+        self._in_flight_gets = {}
+
+    @property
+    def http_client(self):
+        """The database's async HTTP client. The async HTTP client is
+        created on first use so that it's associated with the IOLoop
+        that's running when the database is first used rather than the
+        IOLoop that was current when the ```CouchDBDatabase``` was created.
+        """
+        if self._http_client is None:
+            if self.use_curl:
+                # pycurl is an optional dependency so only import
+                # the cURL async HTTP client when it's asked for
+                from tornado import curl_httpclient
+                http_client_class = curl_httpclient.CurlAsyncHTTPClient
+            else:
+                http_client_class = tornado.httpclient.AsyncHTTPClient
+            self._http_client = http_client_class(
+                force_instance=True,
+                max_clients=self.max_clients)
+        return self._http_client
+
+    @property
+    def server_url(self):
+        """The URL of the CouchDB server which hosts the database."""
+        return self.url.rstrip("/").rsplit("/", 1)[0]
+
+    def close(self):
+        """Close the database's async HTTP client releasing any
+        connections it holds. The async HTTP client will be recreated
+        if the database is used again.
+        """
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+
+class _DefaultCouchDBDatabase(CouchDBDatabase):
+    """```_DefaultCouchDBDatabase``` is used by async actions which
+    aren't given a ```CouchDBDatabase```. Configuration comes from
+    this module's globals (and is read each time it's used so changes
+    to the globals are picked up) and requests are issued using the
+    shared ```tornado.httpclient.AsyncHTTPClient``` instance.
+    """
+
+    def __init__(self):
+        # deliberately not calling CouchDBDatabase.__init__() since
+        # the url, tampering_signer, username, password and validate_cert
+        # properties come from this module's globals
+        object.__init__(self)
+
+        self.max_clients = None
+        self.keep_alive = True
+        self.connect_timeout = None
+        self.request_timeout = None
+        self.use_curl = False
+        self.single_flight = False
+        self.request_metrics = RequestMetrics()
+        self.circuit_breaker = None
+        self.concurrency_limiter = None
+        self.priority_scheduler = None
+        self.contention_monitor = None
+        self.transient_retry_policy = None
+
+        self._in_flight_gets = {}
+
+    @property
+    def url(self):
+        return database
+
+    @property
+    def tampering_signer(self):
+        return tampering_signer
+
+    @property
+    def username(self):
+        return username
+
+    @property
+    def password(self):
+        return password
+
+    @property
+    def validate_cert(self):
+        return validate_cert
+
+    @property
+    def http_client(self):
+        return tornado.httpclient.AsyncHTTPClient()
+
+    def close(self):
+        pass
+
+
+_default_db = _DefaultCouchDBDatabase()
+
+
+def get_default_db():
+    """Returns the ```CouchDBDatabase``` used by async actions (and the
+    mechanisms built on them) which aren't given a ```CouchDBDatabase```
+    - ie the database described by this module's globals.
+    """
+    return _default_db
+
+
 class CouchDBAsyncHTTPRequest(tornado.httpclient.HTTPRequest):
     """```CouchDBAsyncHTTPRequest``` extends ```tornado.httpclient.HTTPRequest```
     adding ...
+
+    ```path``` is relative to the database's URL unless ```on_server```
+    is ```True``` in which case ```path``` is relative to the URL of the
+    server hosting the database (ex ```_active_tasks```).
+
+    If ```deadline``` isn't ```None``` it's the time (as returned by
+    ```time.time()```) by which the request must be done. The request's
+    connect and request timeouts are reduced to the time remaining until
+    the deadline and ```CouchDBAsyncHTTPClient``` doesn't send requests
+    whose deadline has passed.
     """
 
-    def __init__(self, path, method, body_as_dict):
+    def __init__(self, path, method, body_as_dict, db=None, sign_body=True, on_server=False, deadline=None):
         assert not path.startswith('/')
 
-        url = "%s/%s" % (database, path)
+        if db is None:
+            db = _default_db
+
+        url = "%s/%s" % (db.server_url if on_server else db.url, path)
 
         headers = {
             "Accept": "application/json",
             "Accept-Encoding": "charset=utf8",
         }
 
+        if not db.keep_alive:
+            headers["Connection"] = "close"
+
         if body_as_dict is not None:
-            if tampering_signer:
-                tamper.sign(tampering_signer, body_as_dict)
+            # sign_body will be False when body_as_dict is a wrapper around
+            # a collection of docs (ex _bulk_docs) that have already been signed
+            if db.tampering_signer and sign_body:
+                tamper.sign(db.tampering_signer, body_as_dict)
             body = json.dumps(body_as_dict)
             headers["Content-Type"] = "application/json; charset=utf8"
         else:
             body = None
 
-        auth_mode = "basic" if username or password else None
+        auth_mode = "basic" if db.username or db.password else None
 
         tornado.httpclient.HTTPRequest.__init__(
             self,
@@ -91,10 +444,137 @@ class CouchDBAsyncHTTPRequest(tornado.httpclient.HTTPRequest):
             method=method,
             body=body,
             headers=tornado.httputil.HTTPHeaders(headers),
-            validate_cert=validate_cert,
+            validate_cert=db.validate_cert,
             auth_mode=auth_mode,
-            auth_username=username,
-            auth_password=password)
+            auth_username=db.username,
+            auth_password=db.password,
+            connect_timeout=db.connect_timeout,
+            request_timeout=db.request_timeout)
+
+        self.deadline = deadline
+        self.apply_deadline()
+
+    def apply_deadline(self):
+        """Reduce the request's connect and request timeouts to the time
+        remaining until the request's deadline. Returns ```False``` if
+        the deadline has passed.
+        """
+        if self.deadline is None:
+            return True
+
+        remaining_time = self.deadline - time.time()
+        if remaining_time <= 0:
+            return False
+
+        # tornado's default connect and request timeouts are 20 seconds
+        self.connect_timeout = min(self.connect_timeout or 20.0, remaining_time)
+        self.request_timeout = min(self.request_timeout or 20.0, remaining_time)
+        return True
+
+
+class _ViewRowsStreamParser(object):
+    """```_ViewRowsStreamParser``` incrementally parses the body of a
+    view (or ```_all_docs```) response as the body is streamed from CouchDB.
+    Each call to ```feed()``` returns the rows which were completed by the
+    chunk of the body passed to ```feed()```. Only the partially received
+    row is buffered so memory use is independent of the number of rows
+    in the response.
+
+    A view response body looks something like
+
+        {"total_rows":2,"offset":0,"rows":[
+        {"id":"8b7e","key":"apple","value":null,"doc":{...}},
+        {"id":"9f2a","key":"pear","value":null,"doc":{...}}
+        ]}
+
+    The parser tracks the nesting depth of objects and arrays (ignoring
+    brackets and braces in strings) to find the start and end of each
+    object in the top level "rows" array.
+    """
+
+    _special_chars_reg_ex = re.compile(r'[{}\[\]"\\]')
+
+    _string_special_chars_reg_ex = re.compile(r'["\\]')
+
+    def __init__(self):
+        object.__init__(self)
+
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = None
+        self._last_top_level_string = None
+        self._in_rows = False
+        self._row_start = None
+
+    def feed(self, chunk):
+        buf = self._buffer + chunk
+        pos = self._pos
+        rows = []
+
+        while True:
+            if self._in_string:
+                match = type(self)._string_special_chars_reg_ex.search(buf, pos)
+                if not match:
+                    pos = len(buf)
+                    break
+                if match.group() == "\\":
+                    if len(buf) <= match.end():
+                        # escaped char is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                if self._depth == 1:
+                    self._last_top_level_string = buf[self._string_start:match.start()]
+                self._string_start = None
+                pos = match.end()
+                continue
+
+            match = type(self)._special_chars_reg_ex.search(buf, pos)
+            if not match:
+                pos = len(buf)
+                break
+            char = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_top_level_string == "rows":
+                    self._in_rows = True
+                elif char == "{" and self._depth == 2 and self._in_rows:
+                    self._row_start = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._in_rows:
+                    if self._depth == 2 and self._row_start is not None:
+                        rows.append(json.loads(buf[self._row_start:pos]))
+                        self._row_start = None
+                    elif self._depth == 1:
+                        self._in_rows = False
+
+        #
+        # discard everything that's no longer required
+        #
+        keep_from = pos
+        if self._row_start is not None:
+            keep_from = self._row_start
+        elif self._string_start is not None:
+            keep_from = min(keep_from, self._string_start)
+
+        self._buffer = buf[keep_from:]
+        self._pos = pos - keep_from
+        if self._row_start is not None:
+            self._row_start -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
+
+        return rows
 
 
 class CouchDBAsyncHTTPClient(object):
@@ -102,17 +582,150 @@ class CouchDBAsyncHTTPClient(object):
     ```tornado.httpclient.AsyncHTTPClient``` by adding standardized
     logging of error messages and calculating LCP response times
     for subsequent use in performance analysis and health monitoring.
+
+    If ```model_streaming_callback``` isn't ```None``` the response body
+    is streamed rather than buffered. Rows are parsed as they arrive and
+    ```model_streaming_callback``` is called with each row's model. Once the
+    response is complete ```fetch()```'s callback is called with the number
+    of models that were streamed rather than a list of models. Note that
+    if an error occurs part way through the response some models may
+    already have been passed to ```model_streaming_callback```.
+
+    If ```accept_not_modified``` is ```True``` a 304 (Not Modified)
+    response to a conditional request is treated as success. The HTTP
+    response code and headers are available in ```response_code``` and
+    ```response_headers``` once the response has been received.
+
+    ```expected_response_code``` is either a single HTTP response code
+    or a tuple of HTTP response codes any of which indicates success.
+
+    If ```raw_response_body``` is ```True``` the response body isn't parsed
+    as JSON - ```fetch()```'s callback is called with the body as a string.
+    This is useful for responses which needn't be JSON (ex the response
+    of a design doc's update handler).
+
+    If ```expect_timeout``` is ```True``` the request is expected to be
+    ended by its request timeout (ex a continuous ```_changes``` feed with
+    heartbeats). The request still fails with ```FFD_TRANSPORT_ERROR```
+    when it times out but the timeout isn't recorded in the database's
+    ```request_metrics```, isn't counted as an error and isn't logged
+    as an error.
+
+    When the database is configured for ```single_flight``` a GET which
+    is identical to a GET of the same priority that's already waiting on
+    CouchDB isn't sent to CouchDB. Instead the ```CouchDBAsyncHTTPClient``` waits for the
+    in-flight GET's response and then processes the response as if it
+    had issued the request. A GET with a deadline only waits on an in-flight
+    GET whose deadline is no later than its own.
+
+    When the database has a ```circuit_breaker``` which is open the
+    request isn't sent to CouchDB and the callback is called immediately
+    with is_ok of ```False```. Long-lived requests (ex ```_changes```)
+    bypass the circuit breaker, the concurrency limiter and the priority
+    scheduler since their response times aren't a measure of CouchDB's
+    health or capacity and they'd otherwise hold a slot while they wait
+    on CouchDB.
+
+    Once the callback has been called ```fetch_failure_detail``` describes
+    the outcome of the request - ```FFD_OK``` on success otherwise one of the
+    other FFD_* values. ```FFD_CIRCUIT_OPEN``` distinguishes requests which
+    were rejected by the circuit breaker from requests CouchDB failed.
+
+    When the database has a ```concurrency_limiter``` the request waits
+    for the concurrency limiter's permission before being sent to CouchDB.
+    If the concurrency limiter's queue is full the request is shed - the
+    callback is called immediately with is_ok of ```False``` and
+    ```fetch_failure_detail``` is ```FFD_LOAD_SHED```.
+
+    ```priority``` is the request's priority - ```PRIORITY_INTERACTIVE```
+    or ```PRIORITY_BACKGROUND```. When the database has a
+    ```priority_scheduler``` the request first waits for a slot in its
+    priority's concurrency budget. Requests queued by the concurrency
+    limiter are started in priority order.
+
+    If the request's deadline passes before the request is sent to CouchDB
+    the request isn't sent and the callback is called with is_ok of
+    ```False``` and ```fetch_failure_detail``` is ```FFD_DEADLINE_EXCEEDED```.
+    A request which is waiting on the priority scheduler or the concurrency
+    limiter when its deadline passes is taken out of their queue and failed
+    at its deadline. A request which times out (or otherwise fails
+    without a response from CouchDB) after its deadline has passed also
+    fails with ```FFD_DEADLINE_EXCEEDED```.
+
+    Requests which fail without a response from CouchDB (connection
+    failures, connection resets and timeouts) fail with a ```fetch_failure_detail```
+    of ```FFD_TRANSPORT_ERROR``` and requests to which CouchDB responds
+    with an unexpected 5xx response code fail with ```FFD_SERVER_ERROR```.
+    When the database has a ```transient_retry_policy``` such failures of
+    idempotent requests are retried as directed by the policy - the request
+    releases its priority scheduler and concurrency limiter permission while
+    it waits to be retried and then goes through the complete process
+    of being sent again. ```num_retries``` is the number of times the
+    request was retried. The callback is only called once the request
+    succeeds or the policy's retry strategy gives up. The retry strategy
+    is created when an idempotent request is first issued so each request
+    deposits into the strategy's retry budget once whether or not it fails.
     """
 
+    FFD_OK = 0x0000
+    FFD_ERROR = 0x0080
+    FFD_CONFLICT = FFD_ERROR | 0x0001
+    FFD_UNEXPECTED_RESPONSE_CODE = FFD_ERROR | 0x0002
+    FFD_RESPONSE_ERROR = FFD_ERROR | 0x0003
+    FFD_INVALID_DOC = FFD_ERROR | 0x0004
+    FFD_CIRCUIT_OPEN = FFD_ERROR | 0x0005
+    FFD_LOAD_SHED = FFD_ERROR | 0x0006
+    FFD_DEADLINE_EXCEEDED = FFD_ERROR | 0x0007
+    FFD_TRANSPORT_ERROR = FFD_ERROR | 0x0008
+    FFD_SERVER_ERROR = FFD_ERROR | 0x0009
+
     def __init__(self,
                  expected_response_code,
                  create_model_from_doc,
-                 expect_one_document=False):
+                 expect_one_document=False,
+                 db=None,
+                 model_streaming_callback=None,
+                 accept_not_modified=False,
+                 priority=PRIORITY_INTERACTIVE,
+                 raw_response_body=False,
+                 expect_timeout=False):
         object.__init__(self)
 
         self.expected_response_code = expected_response_code
         self.create_model_from_doc = create_model_from_doc
         self.expect_one_document = expect_one_document
+        self.db = db if db is not None else _default_db
+        self.model_streaming_callback = model_streaming_callback
+        self.accept_not_modified = accept_not_modified
+        self.priority = priority
+        self.raw_response_body = raw_response_body
+        self.expect_timeout = expect_timeout
+
+        self.response_code = None
+        self.response_headers = None
+        self.fetch_failure_detail = None
+        self.num_retries = 0
+
+        self._num_models_streamed = 0
+
+        # the priority scheduler and concurrency limiter whose
+        # permission this client holds while its request is in flight
+        self._held_priority_scheduler = None
+        self._held_concurrency_limiter = None
+
+        self._transient_retry_strategy = None
+
+        self._deadline = None
+
+        # while this client's request waits in the priority scheduler's
+        # or concurrency limiter's queue the timeout which fails the
+        # request at its deadline and the function which takes the
+        # request out of the queue
+        self._queued_deadline_timeout = None
+        self._cancel_queued = None
+
+        # identical GETs waiting on this client's request
+        self._followers = []
 
         self._callback = None
 
@@ -122,13 +735,220 @@ class CouchDBAsyncHTTPClient(object):
         """
         assert self._callback is None
         self._callback = callback
+        self._deadline = request.deadline
+
+        if self.model_streaming_callback:
+            assert self.create_model_from_doc
+            request.streaming_callback = functools.partial(
+                self._on_streaming_callback,
+                _ViewRowsStreamParser())
+
+        # identical in-flight GETs are checked before the priority scheduler,
+        # concurrency limiter and circuit breaker because followers don't send
+        # a request to CouchDB
+        single_flight_key = self._get_single_flight_key(request)
+        if single_flight_key is not None:
+            leader = self.db._in_flight_gets.get(single_flight_key)
+            if leader is None:
+                self.db._in_flight_gets[single_flight_key] = self
+            elif _is_deadline_passed(self._deadline):
+                self._fail_deadline_exceeded(request, None)
+                return
+            elif self._can_follow(leader):
+                leader._followers.append(self)
+                return
+            else:
+                # the in-flight GET could outlive this request's deadline
+                # so this request is sent to CouchDB on its own
+                single_flight_key = None
+
+        # the retry strategy is created as the request is first issued (rather
+        # than when it first fails) so each request, successful or not, deposits
+        # into the retry budget exactly once
+        transient_retry_policy = self.db.transient_retry_policy
+        if transient_retry_policy is not None and transient_retry_policy.is_idempotent(request):
+            self._transient_retry_strategy = transient_retry_policy.create_retry_strategy()
+            if request.deadline is not None:
+                self._transient_retry_strategy.deadline = request.deadline
+
+        self._acquire(request, single_flight_key)
+
+    def _can_follow(self, leader):
+        """Returns ```True``` if this client's request can wait on ```leader```'s
+        identical in-flight GET. The in-flight GET is abandoned by its deadline
+        so waiting on it never outlives a deadline no earlier than its own.
+        """
+        if self._deadline is None:
+            return True
+        return leader._deadline is not None and leader._deadline <= self._deadline
+
+    def _acquire(self, request, single_flight_key):
+        priority_scheduler = self.db.priority_scheduler
+        if priority_scheduler is None or self._is_long_lived(request):
+            self._on_priority_scheduler_acquired(request, single_flight_key, None)
+            return
+
+        on_acquired = functools.partial(
+            self._on_priority_scheduler_acquired,
+            request,
+            single_flight_key,
+            priority_scheduler)
+        self._start_queued_deadline_timeout(
+            request,
+            single_flight_key,
+            functools.partial(priority_scheduler.cancel, self.priority, on_acquired))
+        priority_scheduler.acquire(self.priority, on_acquired)
+
+    def _on_priority_scheduler_acquired(self, request, single_flight_key, priority_scheduler):
+        self._stop_queued_deadline_timeout()
+        self._held_priority_scheduler = priority_scheduler
+
+        concurrency_limiter = self.db.concurrency_limiter
+        if concurrency_limiter is None or self._is_long_lived(request):
+            self._send(request, single_flight_key, None)
+            return
+
+        send = functools.partial(self._send, request, single_flight_key, concurrency_limiter)
+        self._start_queued_deadline_timeout(
+            request,
+            single_flight_key,
+            functools.partial(concurrency_limiter.cancel, send, self.priority))
+        if not concurrency_limiter.acquire(send, self.priority):
+            self._stop_queued_deadline_timeout()
+            self.db.request_metrics.increment("load_shed")
+            _logger.error(
+                "concurrency limiter queue is full - shedding %s on %s",
+                request.method,
+                request.url)
+            self._fail_fast(single_flight_key, type(self).FFD_LOAD_SHED)
+
+    def _send(self, request, single_flight_key, concurrency_limiter):
+        self._stop_queued_deadline_timeout()
+        self._held_concurrency_limiter = concurrency_limiter
+
+        # time spent waiting on the priority scheduler and concurrency
+        # limiter counts against the deadline
+        if not request.apply_deadline():
+            self._fail_deadline_exceeded(request, single_flight_key)
+            return
+
+        circuit_breaker = self._get_circuit_breaker(request)
+        if circuit_breaker is not None and not circuit_breaker.allow_request():
+            self.db.request_metrics.increment("circuit_breaker_rejections")
+            _logger.error(
+                "circuit breaker is open - not sending %s on %s to CouchDB",
+                request.method,
+                request.url)
+            self._fail_fast(single_flight_key, type(self).FFD_CIRCUIT_OPEN)
+            return
 
-        http_client = tornado.httpclient.AsyncHTTPClient()
+        http_client = self.db.http_client
         http_client.fetch(
             request,
-            callback=self._on_http_client_fetch_done)
+            callback=functools.partial(self._on_http_client_fetch_done, request, single_flight_key))
+
+    def _start_queued_deadline_timeout(self, request, single_flight_key, cancel_queued):
+        """Called before this client's request is passed to the priority
+        scheduler or the concurrency limiter so that, should the request be
+        queued, it's failed at its deadline rather than once it's dequeued.
+        ```cancel_queued``` takes the request out of the queue. The timeout
+        is stopped once the request is dequeued.
+        """
+        if self._deadline is None:
+            return
+
+        self._cancel_queued = cancel_queued
+        self._queued_deadline_timeout = tornado.ioloop.IOLoop.current().add_timeout(
+            datetime.timedelta(0, max(0, self._deadline - time.time()), 0),
+            functools.partial(self._on_queued_deadline_timeout, request, single_flight_key))
+
+    def _stop_queued_deadline_timeout(self):
+        if self._queued_deadline_timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._queued_deadline_timeout)
+            self._queued_deadline_timeout = None
+        self._cancel_queued = None
+
+    def _on_queued_deadline_timeout(self, request, single_flight_key):
+        self._queued_deadline_timeout = None
+        cancel_queued = self._cancel_queued
+        self._cancel_queued = None
+
+        if not cancel_queued():
+            return
+
+        self._fail_deadline_exceeded(request, single_flight_key)
 
-    def _on_http_client_fetch_done(self, response):
+    def _fail_deadline_exceeded(self, request, single_flight_key):
+        self.db.request_metrics.increment("deadline_exceeded")
+        _logger.error(
+            "deadline passed - not sending %s on %s to CouchDB",
+            request.method,
+            request.url)
+        self._fail_fast(single_flight_key, type(self).FFD_DEADLINE_EXCEEDED)
+
+    def _is_long_lived(self, request):
+        return _operation(request.method, request.url, self.db.url) in _long_lived_operations
+
+    def _get_circuit_breaker(self, request):
+        """Returns the circuit breaker which ```request``` must be
+        permitted by (and report its outcome to) or ```None```.
+        """
+        circuit_breaker = self.db.circuit_breaker
+        if circuit_breaker is None or self._is_long_lived(request):
+            return None
+        return circuit_breaker
+
+    def _release(self, is_failure=False, latency_in_ms=None):
+        """Give back the concurrency limiter and priority scheduler
+        permission held by this client's request.
+        """
+        concurrency_limiter = self._held_concurrency_limiter
+        self._held_concurrency_limiter = None
+        if concurrency_limiter is not None:
+            concurrency_limiter.release(is_failure, latency_in_ms)
+
+        priority_scheduler = self._held_priority_scheduler
+        self._held_priority_scheduler = None
+        if priority_scheduler is not None:
+            priority_scheduler.release(self.priority)
+
+    def _fail_fast(self, single_flight_key, fetch_failure_detail):
+        """Called when a request isn't sent to CouchDB to fail the request
+        and any identical GETs which were waiting on the request.
+        """
+        self._release()
+
+        for cac in [self] + self._pop_followers(single_flight_key):
+            cac._call_callback(
+                False,              # is_ok
+                False,              # is_conflict
+                fetch_failure_detail=fetch_failure_detail)
+
+    def _pop_followers(self, single_flight_key):
+        """Called when this client's request completes to stop identical
+        GETs from waiting on the request. Returns the GETs which were waiting.
+        """
+        if single_flight_key is not None:
+            self.db._in_flight_gets.pop(single_flight_key, None)
+        followers = self._followers
+        self._followers = []
+        return followers
+
+    def _get_single_flight_key(self, request):
+        """Returns the key used to identify identical in-flight GETs
+        or ```None``` if ```request``` can't share a response with
+        other requests. Streamed responses can't be shared because the
+        response body is consumed as it arrives. Requests of different
+        priorities don't share responses so an interactive request never
+        waits on a background request.
+        """
+        if not self.db.single_flight:
+            return None
+        if request.method != "GET" or request.streaming_callback:
+            return None
+        return (request.url, request.headers.get("If-None-Match"), self.priority)
+
+    def _on_http_client_fetch_done(self, request, single_flight_key, response):
         #
         # write a message to the log which can be easily parsed
         # by performance analysis tools and used to understand
@@ -171,40 +991,194 @@ class CouchDBAsyncHTTPClient(object):
 
         _logger.info(msg)
 
+        operation = _operation(response.request.method, response.effective_url, self.db.url)
+
+        # an expected timeout says nothing about CouchDB's latency or health
+        if self._is_expected_timeout(response):
+            self._release()
+            self._complete(single_flight_key, response)
+            return
+
+        self.db.request_metrics.record(
+            operation,
+            response.request.method,
+            response.code,
+            response.request_time * 1000,
+            {key: value * 1000 for (key, value) in response.time_info.items()})
+
+        # tornado reports connection failures and timeouts as 599
+        is_failure = not response.code or httplib.INTERNAL_SERVER_ERROR <= response.code
+
+        # time spent queued in the async HTTP client isn't CouchDB's latency
+        latency = response.request_time - response.time_info.get("queue", 0)
+
+        circuit_breaker = self._get_circuit_breaker(request)
+        if circuit_breaker is not None:
+            circuit_breaker.record(is_failure, latency * 1000)
+
+        self._release(is_failure, latency * 1000)
+
+        if self.db.contention_monitor is not None and operation in ("persist", "delete") and not is_failure:
+            self.db.contention_monitor.record(response.code == httplib.CONFLICT, latency * 1000)
+
+        transient_retry_policy = self.db.transient_retry_policy
+        if transient_retry_policy is not None and transient_retry_policy.should_retry(request, response):
+            # identical GETs which are waiting on this request keep
+            # waiting while the request is retried
+            self._transient_retry_strategy.wait(
+                self._on_transient_retry_wait_done,
+                request,
+                single_flight_key,
+                response)
+            return
+
+        self._complete(single_flight_key, response)
+
+    def _is_expected_timeout(self, response):
+        """Returns ```True``` if ```response``` says the request ran for its
+        full request timeout and ```expect_timeout``` says that's how the
+        request is expected to end. Timeouts are distinguished from other
+        transport errors (ex connection failures) by how long the request ran.
+        """
+        if not self.expect_timeout or response.code != 599:
+            return False
+        request_timeout = response.request.request_timeout
+        return request_timeout is not None and request_timeout <= response.request_time
+
+    def _on_transient_retry_wait_done(self, waited_in_ms, request, single_flight_key, response):
+        if not waited_in_ms:
+            self.db.request_metrics.increment("transient_retries_exhausted")
+            _logger.error(
+                "%s on %s failed with %d - giving up after %d retries",
+                request.method,
+                request.url,
+                response.code,
+                self.num_retries)
+            self._complete(single_flight_key, response)
+            return
+
+        self.num_retries += 1
+        self.db.request_metrics.increment("transient_retries")
+        _logger.info(
+            "%s on %s failed with %d - retrying after waiting %d ms",
+            request.method,
+            request.url,
+            response.code,
+            waited_in_ms)
+        self._acquire(request, single_flight_key)
+
+    def _complete(self, single_flight_key, response):
+        followers = self._pop_followers(single_flight_key)
+
+        self._process_response(response)
+
+        for follower in followers:
+            follower._process_response(response)
+
+    def _process_response(self, response):
+
+        self.response_code = response.code
+        self.response_headers = response.headers
+
+        if response.code == httplib.NOT_MODIFIED and self.accept_not_modified:
+            self._call_callback(True, False)
+            return
+
         #
         # check for errors ...
         #
-        if response.code != self.expected_response_code:
+        expected_response_codes = self.expected_response_code
+        if not isinstance(expected_response_codes, tuple):
+            expected_response_codes = (expected_response_codes,)
+
+        if response.code not in expected_response_codes:
+            if self._is_expected_timeout(response):
+                _logger.info(
+                    "%s on %s ended by its request timeout as expected",
+                    response.request.method,
+                    response.effective_url)
+                self._call_callback(
+                    False,              # is_ok
+                    False,              # is_conflict
+                    fetch_failure_detail=type(self).FFD_TRANSPORT_ERROR)
+                return
+
             if response.code == httplib.CONFLICT:
+                self.db.request_metrics.increment("conflicts")
                 self._call_callback(False, True)
                 return
 
+            is_transport_error = not response.code or response.code == 599
+
+            if is_transport_error and _is_deadline_passed(self._deadline):
+                self.db.request_metrics.increment("deadline_exceeded")
+                _logger.error(
+                    "deadline passed while waiting on CouchDB to respond to %s on %s",
+                    response.request.method,
+                    response.effective_url)
+                self._call_callback(
+                    False,              # is_ok
+                    False,              # is_conflict
+                    fetch_failure_detail=type(self).FFD_DEADLINE_EXCEEDED)
+                return
+
+            self.db.request_metrics.increment("errors")
+
+            if is_transport_error:
+                fetch_failure_detail = type(self).FFD_TRANSPORT_ERROR
+            elif httplib.INTERNAL_SERVER_ERROR <= response.code:
+                fetch_failure_detail = type(self).FFD_SERVER_ERROR
+            else:
+                fetch_failure_detail = type(self).FFD_UNEXPECTED_RESPONSE_CODE
+
             fmt = (
                 "CouchDB responded to %s on %s "
-                "with HTTP response %d but expected %d"
+                "with HTTP response %d but expected %s"
             )
             _logger.error(
                 fmt,
                 response.request.method,
                 response.effective_url,
                 response.code,
-                self.expected_response_code)
-            self._call_callback(False, False)
+                "/".join(str(code) for code in expected_response_codes))
+            self._call_callback(
+                False,              # is_ok
+                False,              # is_conflict
+                fetch_failure_detail=fetch_failure_detail)
             return
 
         if response.error:
+            self.db.request_metrics.increment("errors")
             _logger.error(
                 "CouchDB responded to %s on %s with error '%s'",
                 response.request.method,
                 response.effective_url,
                 response.error)
-            self._call_callback(False, False)
+            self._call_callback(
+                False,              # is_ok
+                False,              # is_conflict
+                fetch_failure_detail=type(self).FFD_RESPONSE_ERROR)
             return
 
         #
         # process response body ...
         #
 
+        if self.model_streaming_callback:
+            # models have already been created as the body was streamed
+            self._call_callback(
+                True,               # is_ok
+                False,              # is_conflict
+                self._num_models_streamed)
+            return
+
+        if self.raw_response_body:
+            self._call_callback(
+                True,               # is_ok
+                False,              # is_conflict
+                response.body)
+            return
+
         #
         # CouchDB always returns response.body (a string) - let's convert the
         # body to a dict so we can operate on it more effectively
@@ -216,12 +1190,14 @@ class CouchDBAsyncHTTPClient(object):
         # need to be converted to model objects or a single document
         #
         if not self.create_model_from_doc:
+            # _bulk_docs responds with a list rather than a dict
+            is_dict = isinstance(response_body, dict)
             self._call_callback(
                 True,               # is_ok
                 False,              # is_conflict
                 response_body,
-                response_body.get("id", None),
-                response_body.get("rev", None))
+                response_body.get("id", None) if is_dict else None,
+                response_body.get("rev", None) if is_dict else None)
             return
 
         if self.expect_one_document:
@@ -229,7 +1205,8 @@ class CouchDBAsyncHTTPClient(object):
             self._call_callback(
                 model is not None,
                 False,              # is_conflict
-                model)
+                model,
+                fetch_failure_detail=None if model is not None else type(self).FFD_INVALID_DOC)
             return
 
         models = []
@@ -244,13 +1221,17 @@ class CouchDBAsyncHTTPClient(object):
             False,                  # is_conflict
             models)
 
+    def _on_streaming_callback(self, parser, chunk):
+        for row in parser.feed(chunk):
+            doc = row.get("doc", {})
+            model = self._check_doc_for_tampering_and_if_ok_create_model(doc)
+            if model is not None:
+                self._num_models_streamed += 1
+                self.model_streaming_callback(model)
+
     def _check_doc_for_tampering_and_if_ok_create_model(self, doc):
-        if tampering_signer:
-            if not tamper.verify(tampering_signer, doc):
-                _logger.error(
-                    "tampering detected in doc '%s'",
-                    doc["_id"])
-                return None
+        if not _is_doc_tamper_free(self.db, doc):
+            return None
         return self.create_model_from_doc(doc)
 
     def _call_callback(self,
@@ -258,7 +1239,17 @@ class CouchDBAsyncHTTPClient(object):
                        is_conflict,
                        model_models_or_response_body=None,
                        _id=None,
-                       _rev=None):
+                       _rev=None,
+                       fetch_failure_detail=None):
+        if fetch_failure_detail is None:
+            if is_ok:
+                fetch_failure_detail = type(self).FFD_OK
+            elif is_conflict:
+                fetch_failure_detail = type(self).FFD_CONFLICT
+            else:
+                fetch_failure_detail = type(self).FFD_ERROR
+        self.fetch_failure_detail = fetch_failure_detail
+
         assert self._callback is not None
         self._callback(
             is_ok,
@@ -271,42 +1262,341 @@ class CouchDBAsyncHTTPClient(object):
 
 
 class AsyncAction(object):
-    """Abstract base class for all async actions."""
+    """Abstract base class for all async actions.
+
+    ```db``` is the ```CouchDBDatabase``` the async action operates
+    against. If ```db``` is ```None``` the async action operates against
+    the database described by this module's globals.
+
+    In addition to accepting a callback, the method which starts an
+    async action (```fetch()```, ```persist()```, etc) returns a
+    ```tornado.concurrent.Future``` whose result is the tuple of
+    arguments the callback is called with. The callback is optional
+    which means async actions can be used from coroutines and several
+    async actions can be run concurrently with ```tornado.gen.multi()```.
+
+        @tornado.gen.coroutine
+        def get(self):
+            (is_ok, model, _) = yield MyModelRetriever(key).fetch()
+
+    ```priority``` is the priority (```PRIORITY_INTERACTIVE``` or
+    ```PRIORITY_BACKGROUND```) of the requests the async action sends to
+    CouchDB. If ```priority``` is ```None``` the async action's class
+    default is used - background for async actions which retrieve metrics,
+    compact or follow changes and interactive for everything else. Every
+    concrete async action accepts a ```priority``` constructor argument and
+    the priority can also be changed by setting ```priority``` before the
+    async action is started. Documents retrieved by an ```AllDocsDocumentLoader```
+    or written by a ```BulkDocsWriteCoalescer``` use the loader's or
+    coalescer's ```priority```.
+
+    If ```deadline``` isn't ```None``` it's the time (as returned by
+    ```time.time()```) by which the async action must be done. The time
+    remaining until the deadline is used as the timeout of the requests
+    the async action sends to CouchDB and requests aren't sent once the
+    deadline has passed. Async actions which start other async actions
+    (ex an update which retrieves, persists and retries on conflict)
+    should pass their deadline to those async actions and to their
+    ```RetryStrategy``` so that retries are abandoned once the deadline
+    has passed. Documents retrieved by an ```AllDocsDocumentLoader``` or
+    written by a ```BulkDocsWriteCoalescer``` are retrieved or written
+    by a request whose deadline is the earliest deadline in the batch.
+
+    Once an async action's callback has been called ```fetch_failure_detail```
+    is one of ```CouchDBAsyncHTTPClient```'s ```FFD_*``` values and explains
+    the async action's outcome - ex ```FFD_CIRCUIT_OPEN```, ```FFD_LOAD_SHED```,
+    ```FFD_DEADLINE_EXCEEDED```, ```FFD_TRANSPORT_ERROR``` or ```FFD_SERVER_ERROR```
+    when the async action failed without CouchDB processing its request. The
+    async actions which retrieve metrics define their own ```FFD_*``` values
+    but report these ```CouchDBAsyncHTTPClient``` values too.
+    """
 
-    def __init__(self, async_state):
+    priority = PRIORITY_INTERACTIVE
+
+    def __init__(self, async_state, db=None, priority=None, deadline=None):
         object.__init__(self)
 
         self.async_state = async_state
+        self.db = db if db is not None else _default_db
+        if priority is not None:
+            self.priority = priority
+        self.deadline = deadline
+
+        self.fetch_failure_detail = None
+
+    def _set_callback(self, callback):
+        """Called by the methods which start an async action to record
+        ```callback``` (which can be ```None```) as the async action's
+        ```self._callback```. Returns a future that's resolved with
+        the tuple of arguments ```self._callback``` is called with.
+        """
+        assert not self._callback
+
+        future = tornado.concurrent.Future()
+
+        def on_done(*args):
+            future.set_result(args)
+            if callback:
+                callback(*args)
+
+        self._callback = on_done
+
+        return future
+
+    def _set_fetch_failure_detail(self, is_ok, is_conflict=False):
+        """Called by async actions just before calling ```self._callback```.
+        Async actions copy the ```fetch_failure_detail``` of the
+        ```CouchDBAsyncHTTPClient``` which sent their request to CouchDB
+        and this method makes sure ```fetch_failure_detail``` agrees with
+        the outcome being reported to the caller.
+        """
+        if is_ok:
+            self.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_OK
+        elif is_conflict:
+            self.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_CONFLICT
+        elif not (self.fetch_failure_detail or 0) & CouchDBAsyncHTTPClient.FFD_ERROR:
+            self.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_ERROR
+
+
+class AllDocsDocumentLoader(object):
+    """```AllDocsDocumentLoader``` is an opt-in mechanism that collects
+    all the documents requested by ```AsyncModelRetrieverByDocumentID```
+    instances during a single IOLoop iteration and retrieves them
+    using a single ```_all_docs?include_docs=true``` request. Requests
+    for the same document ID are only sent to CouchDB once. If more
+    than ```max_batch_size``` documents are requested they are retrieved
+    using several ```_all_docs``` requests.
+
+    To use an ```AllDocsDocumentLoader``` create a single instance per
+    database and provide it to each ```AsyncModelRetrieverByDocumentID```
+    using the ```document_loader``` argument.
+
+    ```priority``` is the priority of the ```_all_docs``` requests - create
+    a separate ```AllDocsDocumentLoader``` with a ```priority``` of
+    ```PRIORITY_BACKGROUND``` for bulk work which shouldn't compete with
+    interactive requests.
+
+    The deadline of each ```_all_docs``` request is the earliest deadline
+    of the documents it retrieves.
+    """
+
+    def __init__(self, max_batch_size=100, db=None, priority=PRIORITY_INTERACTIVE):
+        object.__init__(self)
+
+        assert 0 < max_batch_size
+
+        self.max_batch_size = max_batch_size
+        self.db = db if db is not None else _default_db
+        self.priority = priority
+
+        self._callbacks_by_document_id = {}
+        self._deadline_by_document_id = {}
+        self._document_ids = []
+
+    def load(self, document_id, callback, deadline=None):
+        """Add ```document_id``` to the next ```_all_docs``` request.
+        Once the document has been retrieved ```callback``` is called
+        with 3 arguments - is_ok, the document and a ```fetch_failure_detail```
+        (one of ```CouchDBAsyncHTTPClient```'s ```FFD_*``` values). If the
+        document couldn't be found, has been deleted or failed tampering
+        verification ```callback``` is called with ```False``` and ```None```.
+
+        If ```deadline``` isn't ```None``` it's the time (as returned by
+        ```time.time()```) by which the document must be retrieved. If
+        ```deadline``` has already passed ```callback``` is immediately
+        called with ```False```, ```None``` and ```FFD_DEADLINE_EXCEEDED```.
+        """
+        if _is_deadline_passed(deadline):
+            self.db.request_metrics.increment("deadline_exceeded")
+            callback(False, None, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+            return
+
+        if not self._document_ids:
+            tornado.ioloop.IOLoop.current().add_callback(self._flush)
+
+        callbacks = self._callbacks_by_document_id.get(document_id)
+        if callbacks is None:
+            callbacks = []
+            self._callbacks_by_document_id[document_id] = callbacks
+            self._document_ids.append(document_id)
+        callbacks.append(callback)
+        self._deadline_by_document_id[document_id] = _earliest_deadline([
+            self._deadline_by_document_id.get(document_id),
+            deadline,
+        ])
+
+    def _flush(self):
+        callbacks_by_document_id = self._callbacks_by_document_id
+        deadline_by_document_id = self._deadline_by_document_id
+        document_ids = self._document_ids
+        self._callbacks_by_document_id = {}
+        self._deadline_by_document_id = {}
+        self._document_ids = []
+
+        for i in range(0, len(document_ids), self.max_batch_size):
+            keys = document_ids[i:i + self.max_batch_size]
+            callbacks_by_key = {key: callbacks_by_document_id[key] for key in keys}
+
+            request = CouchDBAsyncHTTPRequest(
+                "_all_docs?include_docs=true",
+                "POST",
+                {"keys": keys},
+                self.db,
+                sign_body=False,
+                deadline=_earliest_deadline([deadline_by_document_id[key] for key in keys]))
+
+            cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
+            cac.fetch(request, functools.partial(self._on_cac_fetch_done, callbacks_by_key))
+
+    def _on_cac_fetch_done(self, callbacks_by_key, is_ok, is_conflict, response_body, _id, _rev, cac):
+        #
+        # _all_docs responds with one row per key - rows for documents
+        # that don't exist contain an error and rows for deleted documents
+        # contain a null doc
+        #
+        #   {
+        #       "rows": [
+        #           {"id": "a", "key": "a", "value": {"rev": "1-967a"}, "doc": {...}},
+        #           {"key": "b", "error": "not_found"},
+        #           {"id": "c", "key": "c", "value": {"rev": "2-7051", "deleted": true}, "doc": null}
+        #       ]
+        #   }
+        #
+        if not is_ok:
+            for callbacks in callbacks_by_key.values():
+                for callback in callbacks:
+                    callback(False, None, cac.fetch_failure_detail)
+            return
+
+        for row in response_body.get("rows", []):
+            callbacks = callbacks_by_key.pop(row.get("key"), [])
+
+            doc = row.get("doc")
+            fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_OK
+            if doc is None:
+                _logger.error(
+                    "CouchDB _all_docs couldn't retrieve doc '%s' - %s",
+                    row.get("key"),
+                    row.get("error", "deleted"))
+                fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_ERROR
+            elif not _is_doc_tamper_free(self.db, doc):
+                doc = None
+                fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_INVALID_DOC
+
+            for callback in callbacks:
+                callback(doc is not None, doc, fetch_failure_detail)
+
+        # paranoia - CouchDB should have returned a row for every key
+        for callbacks in callbacks_by_key.values():
+            for callback in callbacks:
+                callback(False, None, CouchDBAsyncHTTPClient.FFD_ERROR)
 
 
 class AsyncModelRetrieverByDocumentID(AsyncAction):
     """Async'ly retrieve a model from the CouchDB database
     by document ID.
+
+    If ```document_loader``` isn't ```None``` the document is retrieved
+    as part of a batch of documents by the ```AllDocsDocumentLoader```
+    rather than by an individual request.
+
+    If ```document_cache``` isn't ```None``` it's expected to be a
+    ```document_cache.DocumentCache```. When the cache contains a copy
+    of the document the copy is revalidated with CouchDB using
+    ```If-None-Match``` and the document's revision. If CouchDB responds
+    with 304 (Not Modified) the cached copy is used without CouchDB
+    sending the document and without repeating tampering verification.
+    The cached copy is only removed from the cache when CouchDB says the
+    document doesn't exist (404) or the document CouchDB sends fails
+    tampering verification - failures which say nothing about the document
+    (ex an open circuit breaker or a timeout) leave the cached copy in place.
     """
 
-    def __init__(self, document_id, async_state):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self,
+                 document_id,
+                 async_state,
+                 db=None,
+                 document_loader=None,
+                 document_cache=None,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.document_id = document_id
+        self.document_loader = document_loader
+        self.document_cache = document_cache
 
         self._callback = None
 
-    def fetch(self, callback):
-        assert self._callback is None
-        self._callback = callback
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
+
+        if self.document_loader:
+            assert self.document_loader.db is self.db
+            self.document_loader.load(self.document_id, self._on_document_loader_load_done, self.deadline)
+            return future
+
+        if self.document_cache is not None:
+            cached_doc = self.document_cache.get(self.document_id)
+
+            request = CouchDBAsyncHTTPRequest(self.document_id, 'GET', None, self.db, deadline=self.deadline)
+            if cached_doc is not None:
+                # CouchDB uses a document's revision as the document's ETag
+                request.headers["If-None-Match"] = '"%s"' % cached_doc["_rev"]
+
+            cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, accept_not_modified=True, priority=self.priority)
+            cac.fetch(request, functools.partial(self._on_cac_cached_fetch_done, cached_doc))
+            return future
 
-        request = CouchDBAsyncHTTPRequest(self.document_id, 'GET', None)
+        request = CouchDBAsyncHTTPRequest(self.document_id, 'GET', None, self.db, deadline=self.deadline)
 
         cac = CouchDBAsyncHTTPClient(
             httplib.OK,                     # expected_response_code
             self.create_model_from_doc,
-            True)                           # expect_one_document
+            True,                           # expect_one_document
+            self.db,
+            priority=self.priority)
         cac.fetch(request, self._on_cac_fetch_done)
 
+        return future
+
     def _on_cac_fetch_done(self, is_ok, is_conflict, model, _id, _rev, cac):
         assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok, model)
 
+    def _on_cac_cached_fetch_done(self, cached_doc, is_ok, is_conflict, doc, _id, _rev, cac):
+        assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        if not is_ok:
+            if cac.response_code == httplib.NOT_FOUND:
+                self.document_cache.remove(self.document_id)
+            self._call_callback(False)
+            return
+
+        if cac.response_code == httplib.NOT_MODIFIED:
+            self.document_cache.revalidated(self.document_id)
+            doc = cached_doc
+        else:
+            if not _is_doc_tamper_free(self.db, doc):
+                self.document_cache.remove(self.document_id)
+                self.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_INVALID_DOC
+                self._call_callback(False)
+                return
+            self.document_cache.revalidated(self.document_id, doc)
+
+        model = self.create_model_from_doc(doc)
+        self._call_callback(model is not None, model)
+
+    def _on_document_loader_load_done(self, is_ok, doc, fetch_failure_detail):
+        self.fetch_failure_detail = fetch_failure_detail
+        if not is_ok:
+            self._call_callback(False)
+            return
+
+        model = self.create_model_from_doc(doc)
+        self._call_callback(model is not None, model)
+
     def create_model_from_doc(self, doc):
         """Concrete classes derived from this class must implement
         this method which takes a dictionary (```doc```) and creates
@@ -316,21 +1606,29 @@ class AsyncModelRetrieverByDocumentID(AsyncAction):
 
     def _call_callback(self, is_ok, model=None):
         assert self._callback
+        self._set_fetch_failure_detail(is_ok)
         self._callback(is_ok, model, self)
         self._callback = None
 
 
 class BaseAsyncModelRetriever(AsyncAction):
 
-    def __init__(self, async_state):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self, async_state, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self._callback = None
 
-    def fetch(self, callback):
-        assert self._callback is None
-        self._callback = callback
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
 
+        request = CouchDBAsyncHTTPRequest(self._get_path(), "GET", None, self.db, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(httplib.OK, self.create_model_from_doc, db=self.db, priority=self.priority)
+        cac.fetch(request, self.on_cac_fetch_done)
+
+        return future
+
+    def _get_path(self):
         #
         # useful when trying to figure out URL encodings
         #
@@ -345,12 +1643,7 @@ class BaseAsyncModelRetriever(AsyncAction):
         query_string = urllib.urlencode(query_string_key_value_pairs)
         # :ASSUMPTION: that design docs and views are called the same thing
         # ie one view per design doc
-        path = path_fmt % (self.design_doc, self.design_doc, query_string)
-
-        request = CouchDBAsyncHTTPRequest(path, "GET", None)
-
-        cac = CouchDBAsyncHTTPClient(httplib.OK, self.create_model_from_doc)
-        cac.fetch(request, self.on_cac_fetch_done)
+        return path_fmt % (self.design_doc, self.design_doc, query_string)
 
     def get_query_string_key_value_pairs(self):
         """This method is only called by ```fetch()``` to get the key value
@@ -412,8 +1705,8 @@ class BaseAsyncModelRetriever(AsyncAction):
 class AsyncModelRetriever(BaseAsyncModelRetriever):
     """Async'ly retrieve a model from the CouchDB database."""
 
-    def __init__(self, design_doc, key, async_state):
-        BaseAsyncModelRetriever.__init__(self, async_state)
+    def __init__(self, design_doc, key, async_state, db=None, deadline=None, priority=None):
+        BaseAsyncModelRetriever.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.design_doc = design_doc
         self.key = key
@@ -429,10 +1722,12 @@ class AsyncModelRetriever(BaseAsyncModelRetriever):
     def on_cac_fetch_done(self, is_ok, is_conflict, models, _id, _rev, cac):
         assert is_conflict is False
         model = models[0] if models else None
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok, model)
 
     def _call_callback(self, is_ok, model=None):
         assert self._callback
+        self._set_fetch_failure_detail(is_ok)
         self._callback(is_ok, model, self)
         self._callback = None
 
@@ -440,8 +1735,15 @@ class AsyncModelRetriever(BaseAsyncModelRetriever):
 class AsyncModelsRetriever(BaseAsyncModelRetriever):
     """Async'ly retrieve a collection of models from CouchDB."""
 
-    def __init__(self, design_doc, start_key=None, end_key=None, async_state=None):
-        BaseAsyncModelRetriever.__init__(self, async_state)
+    def __init__(self,
+                 design_doc,
+                 start_key=None,
+                 end_key=None,
+                 async_state=None,
+                 db=None,
+                 deadline=None,
+                 priority=None):
+        BaseAsyncModelRetriever.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.design_doc = design_doc
         self.start_key = start_key
@@ -479,21 +1781,303 @@ class AsyncModelsRetriever(BaseAsyncModelRetriever):
 
     def on_cac_fetch_done(self, is_ok, is_conflict, models, _id, _rev, cac):
         assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok, models)
 
+    def stream(self, model_callback, callback=None):
+        """```stream()``` is an alternative to ```fetch()``` for potentially
+        large result sets. Rather than buffering the entire response and
+        creating a list of models, the response is parsed as it arrives
+        from CouchDB and ```model_callback``` is called with each model
+        (and this retriever) as soon as the model is created. Once all
+        models have been streamed ```callback``` is called with is_ok,
+        the number of models streamed and this retriever.
+        ```transform_models()``` isn't used when streaming.
+        """
+        future = self._set_callback(callback)
+
+        request = CouchDBAsyncHTTPRequest(self._get_path(), "GET", None, self.db, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(
+            httplib.OK,
+            self.create_model_from_doc,
+            db=self.db,
+            model_streaming_callback=lambda model: model_callback(model, self),
+            priority=self.priority)
+        cac.fetch(request, self._on_cac_stream_done)
+
+        return future
+
+    def _on_cac_stream_done(self, is_ok, is_conflict, num_models, _id, _rev, cac):
+        assert is_conflict is False
+        assert self._callback is not None
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, num_models if is_ok else None, self)
+        self._callback = None
+
     def _call_callback(self, is_ok, models=None):
         assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
         self._callback(is_ok, self.transform_models(models), self)
         self._callback = None
 
 
-class InvalidTypeInDocForStoreException(Exception):
-    """This exception is raised by ```AsyncPersister``` when
-    a call to a model's as_doc_for_store() generates a doc
-    with an invalid type property.
+class InvalidPageCursorException(Exception):
+    """This exception is raised by ```AsyncModelsPageRetriever``` when
+    it's given a cursor it didn't create or a cursor which was created
+    for a different view or query.
     """
 
-    def __init__(self, model):
+    def __init__(self, cursor):
+        msg = "invalid page cursor '%s'" % cursor
+        Exception.__init__(self, msg)
+
+
+class AsyncModelsPageRetriever(BaseAsyncModelRetriever):
+    """Async'ly retrieve a single page of models from a view.
+
+    Pages are retrieved using keyset pagination - each request asks for
+    ```page_size``` + 1 rows starting at the key and document ID of the
+    first row on the page (```startkey``` and ```startkey_docid```)
+    rather than skipping over the rows on previous pages. This means
+    the cost of retrieving a page doesn't depend on how deep the page
+    is in the view and only a single page of models is ever held in memory.
+
+    ```fetch()```'s callback receives is_ok, the page's models, a cursor
+    and this retriever. The cursor is an opaque, URL safe string which
+    should be passed to a new ```AsyncModelsPageRetriever``` to retrieve
+    the next page. The cursor is ```None``` when there are no more pages.
+    Each cursor includes a fingerprint of the design doc, ```end_key``` and
+    ```descending``` it was created with and using a cursor with a retriever
+    for a different view or query raises ```InvalidPageCursorException```
+    rather than silently returning the wrong page.
+    """
+
+    def __init__(self,
+                 design_doc,
+                 start_key=None,
+                 end_key=None,
+                 page_size=100,
+                 cursor=None,
+                 descending=False,
+                 async_state=None,
+                 db=None,
+                 deadline=None,
+                 priority=None):
+        BaseAsyncModelRetriever.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        assert 0 < page_size
+
+        self.design_doc = design_doc
+        self.start_key = start_key
+        self.end_key = end_key
+        self.page_size = page_size
+        self.cursor = cursor
+        self.descending = descending
+
+        (self._cursor_key, self._cursor_doc_id) = type(self)._decode_cursor(cursor, self._get_cursor_fingerprint())
+
+        self._callback = None
+
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
+
+        request = CouchDBAsyncHTTPRequest(self._get_path(), "GET", None, self.db, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
+        cac.fetch(request, self.on_cac_fetch_done)
+
+        return future
+
+    def get_query_string_key_value_pairs(self):
+        query_params = {
+            "include_docs": "true",
+            "limit": self.page_size + 1,
+        }
+        if self.descending:
+            query_params["descending"] = "true"
+        if self._cursor_doc_id is not None:
+            query_params["startkey"] = json.dumps(self._cursor_key)
+            query_params["startkey_docid"] = self._cursor_doc_id
+        elif self.start_key:
+            query_params["startkey"] = json.dumps(self.start_key)
+        if self.end_key:
+            query_params["endkey"] = json.dumps(self.end_key)
+        return query_params
+
+    def on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        if not is_ok:
+            self._call_callback(False)
+            return
+
+        rows = response_body.get("rows", [])
+
+        cursor = None
+        if self.page_size < len(rows):
+            next_page_first_row = rows[self.page_size]
+            cursor = type(self)._encode_cursor(
+                next_page_first_row["key"],
+                next_page_first_row["id"],
+                self._get_cursor_fingerprint())
+            rows = rows[:self.page_size]
+
+        models = []
+        for row in rows:
+            doc = row.get("doc")
+            if doc is None or not _is_doc_tamper_free(self.db, doc):
+                continue
+            model = self.create_model_from_doc(doc)
+            if model is not None:
+                models.append(model)
+
+        self._call_callback(True, models, cursor)
+
+    def _get_cursor_fingerprint(self):
+        """Returns a fingerprint of the view and query which determine
+        the order of the rows that cursors point into. ```start_key```
+        isn't part of the fingerprint since a cursor replaces it.
+        """
+        view_and_query = json.dumps([self.design_doc, self.end_key, self.descending], sort_keys=True)
+        return hashlib.sha1(view_and_query).hexdigest()[:16]
+
+    @classmethod
+    def _encode_cursor(cls, key, doc_id, fingerprint):
+        return base64.urlsafe_b64encode(json.dumps([key, doc_id, fingerprint]))
+
+    @classmethod
+    def _decode_cursor(cls, cursor, fingerprint):
+        if cursor is None:
+            return (None, None)
+        try:
+            (key, doc_id, cursor_fingerprint) = json.loads(base64.urlsafe_b64decode(str(cursor)))
+        except Exception:
+            raise InvalidPageCursorException(cursor)
+        if cursor_fingerprint != fingerprint:
+            raise InvalidPageCursorException(cursor)
+        return (key, doc_id)
+
+    def _call_callback(self, is_ok, models=None, cursor=None):
+        assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, models, cursor, self)
+        self._callback = None
+
+
+class AsyncMultiKeyModelsRetriever(AsyncAction):
+    """Async'ly retrieve the models for a collection of keys from
+    a view with a single view request rather than one request per key.
+    The keys are sent to CouchDB in the body of a POST. If there are
+    more than ```max_keys_per_request``` keys the keys are split into
+    chunks and one request per chunk is issued.
+
+    ```fetch()```'s callback receives a dictionary which maps each
+    key to a list of the models that view emitted for the key. Keys
+    that are lists (ie composite keys) are converted to tuples so they
+    can be used as dictionary keys.
+    """
+
+    def __init__(self,
+                 design_doc,
+                 keys,
+                 async_state=None,
+                 db=None,
+                 max_keys_per_request=100,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        assert 0 < max_keys_per_request
+
+        self.design_doc = design_doc
+        self.keys = keys
+        self.max_keys_per_request = max_keys_per_request
+
+        self._num_requests_outstanding = 0
+        self._models_by_key = None
+        self._callback = None
+
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
+
+        self._models_by_key = {_hashable_key(key): [] for key in self.keys}
+
+        if not self.keys:
+            self._call_callback(True)
+            return future
+
+        # :ASSUMPTION: that design docs and views are called the same thing
+        # ie one view per design doc
+        path = '_design/%s/_view/%s?include_docs=true' % (self.design_doc, self.design_doc)
+
+        chunks = [
+            self.keys[i:i + self.max_keys_per_request]
+            for i in range(0, len(self.keys), self.max_keys_per_request)
+        ]
+        self._num_requests_outstanding = len(chunks)
+        for chunk in chunks:
+            # the keys are a query not a document so they're not signed
+            request = CouchDBAsyncHTTPRequest(
+                path,
+                "POST",
+                {"keys": chunk},
+                self.db,
+                sign_body=False,
+                deadline=self.deadline)
+
+            cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
+            cac.fetch(request, self._on_cac_fetch_done)
+
+        return future
+
+    def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        assert is_conflict is False
+
+        if not self._callback:
+            # a previous request failed and the failure has
+            # already been reported to the caller
+            return
+
+        if not is_ok:
+            self.fetch_failure_detail = cac.fetch_failure_detail
+            self._call_callback(False)
+            return
+
+        for row in response_body.get("rows", []):
+            doc = row.get("doc")
+            if doc is None or not _is_doc_tamper_free(self.db, doc):
+                continue
+            model = self.create_model_from_doc(doc)
+            if model is not None:
+                self._models_by_key.setdefault(_hashable_key(row.get("key")), []).append(model)
+
+        self._num_requests_outstanding -= 1
+        if not self._num_requests_outstanding:
+            self._call_callback(True)
+
+    def create_model_from_doc(self, doc):
+        """Concrete classes derived from this class must implement
+        this method which takes a dictionary (```doc```) and creates
+        a model instance.
+        """
+        raise NotImplementedError()
+
+    def _call_callback(self, is_ok):
+        assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, self._models_by_key if is_ok else None, self)
+        self._callback = None
+
+
+class InvalidTypeInDocForStoreException(Exception):
+    """This exception is raised by ```AsyncPersister``` when
+    a call to a model's as_doc_for_store() generates a doc
+    with an invalid type property.
+    """
+
+    def __init__(self, model):
         msg_fmt = (
             "invalid 'type' in doc for store - "
             "see '%s.as_doc_for_store()"
@@ -503,7 +2087,12 @@ class InvalidTypeInDocForStoreException(Exception):
 
 
 class AsyncPersister(AsyncAction):
-    """Async'ly persist a model object."""
+    """Async'ly persist a model object.
+
+    If ```write_coalescer``` isn't ```None``` the model is written to
+    CouchDB as part of a batch of documents by the ```BulkDocsWriteCoalescer```
+    rather than by an individual request.
+    """
 
     """```_doc_type_reg_ex``` is used to verify the format of the
     type property for each document before the document is written
@@ -513,17 +2102,24 @@ class AsyncPersister(AsyncAction):
         r"^[^\s]+_v\d+\.\d+$",
         re.IGNORECASE)
 
-    def __init__(self, model, model_as_doc_for_store_args, async_state):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self,
+                 model,
+                 model_as_doc_for_store_args,
+                 async_state,
+                 db=None,
+                 write_coalescer=None,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.model = model
         self.model_as_doc_for_store_args = model_as_doc_for_store_args
+        self.write_coalescer = write_coalescer
 
         self._callback = None
 
-    def persist(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def persist(self, callback=None):
+        future = self._set_callback(callback)
 
         model_as_doc_for_store = self.model.as_doc_for_store(*self.model_as_doc_for_store_args)
 
@@ -535,6 +2131,11 @@ class AsyncPersister(AsyncAction):
         if not type(self)._doc_type_reg_ex.match(model_as_doc_for_store['type']):
             raise InvalidTypeInDocForStoreException(self.model)
 
+        if self.write_coalescer:
+            assert self.write_coalescer.db is self.db
+            self.write_coalescer.persist(model_as_doc_for_store, self._on_cac_fetch_done, self.deadline)
+            return future
+
         if '_id' in model_as_doc_for_store:
             path = model_as_doc_for_store['_id']
             method = 'PUT'
@@ -542,11 +2143,13 @@ class AsyncPersister(AsyncAction):
             path = ''
             method = 'POST'
 
-        request = CouchDBAsyncHTTPRequest(path, method, model_as_doc_for_store)
+        request = CouchDBAsyncHTTPRequest(path, method, model_as_doc_for_store, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.CREATED, None)
+        cac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_fetch_done)
 
+        return future
+
     def _on_cac_fetch_done(self, is_ok, is_conflict, models, _id, _rev, cac):
         """```self.model``` has just been written to a CouchDB database which
         means ```self.model```'s _id and _rev properties might be out of
@@ -561,45 +2164,438 @@ class AsyncPersister(AsyncAction):
         if _rev is not None:
             self.model._rev = _rev
 
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok, is_conflict)
 
     def _call_callback(self, is_ok, is_conflict):
         assert self._callback is not None
         assert (is_ok and not is_conflict) or (not is_ok)
+        self._set_fetch_failure_detail(is_ok, is_conflict)
         self._callback(is_ok, is_conflict, self)
         self._callback = None
 
 
+class BulkDocsWriteCoalescer(object):
+    """```BulkDocsWriteCoalescer``` is an opt-in mechanism that collects
+    the documents written by a number of ```AsyncPersister``` instances
+    and writes them to CouchDB using a single ```_bulk_docs``` request.
+    Documents are collected until either ```max_batch_size``` documents
+    have been collected or ```max_wait_in_ms``` milliseconds have passed
+    since the first document in the batch was collected.
+
+    To use a ```BulkDocsWriteCoalescer``` create a single instance per
+    database and provide it to each ```AsyncPersister``` using the
+    ```write_coalescer``` argument.
+
+    Each document is individually signed (when a ```tampering_signer```
+    has been configured) and each ```AsyncPersister``` still receives
+    its own success/conflict result.
+
+    ```priority``` is the priority of the ```_bulk_docs``` requests - create
+    a separate ```BulkDocsWriteCoalescer``` with a ```priority``` of
+    ```PRIORITY_BACKGROUND``` for bulk work (ex loading a database) which
+    shouldn't compete with interactive requests.
+
+    The deadline of each ```_bulk_docs``` request is the earliest deadline
+    of the documents it writes.
+    """
+
+    def __init__(self, max_batch_size=100, max_wait_in_ms=10, db=None, priority=PRIORITY_INTERACTIVE):
+        object.__init__(self)
+
+        assert 0 < max_batch_size
+
+        self.max_batch_size = max_batch_size
+        self.max_wait_in_ms = max_wait_in_ms
+        self.db = db if db is not None else _default_db
+        self.priority = priority
+
+        self._docs = []
+        self._callbacks = []
+        self._deadlines = []
+        self._timeout = None
+
+    def persist(self, doc, callback, deadline=None):
+        """Add ```doc``` to the current batch. Once the batch has been
+        written to CouchDB ```callback``` is called with the same arguments
+        ```CouchDBAsyncHTTPClient``` would have used if ```doc``` had been
+        written to CouchDB with an individual request.
+
+        If ```deadline``` isn't ```None``` it's the time (as returned by
+        ```time.time()```) by which ```doc``` must be written. If ```deadline```
+        has already passed ```doc``` isn't added to the batch and ```callback```
+        is immediately called as if the request's deadline had passed.
+        """
+        if _is_deadline_passed(deadline):
+            self.db.request_metrics.increment("deadline_exceeded")
+            cac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=self.db, priority=self.priority)
+            cac.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED
+            callback(False, False, None, None, None, cac)
+            return
+
+        if self.db.tampering_signer:
+            tamper.sign(self.db.tampering_signer, doc)
+
+        self._docs.append(doc)
+        self._callbacks.append(callback)
+        self._deadlines.append(deadline)
+
+        if self.max_batch_size <= len(self._docs):
+            self.flush()
+            return
+
+        if self._timeout is None:
+            self._timeout = tornado.ioloop.IOLoop.current().add_timeout(
+                datetime.timedelta(0, self.max_wait_in_ms / 1000.0, 0),
+                self.flush)
+
+    def flush(self):
+        """Write the current batch to CouchDB without waiting for
+        either ```max_batch_size``` or ```max_wait_in_ms```.
+        """
+        if self._timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._timeout)
+            self._timeout = None
+
+        if not self._docs:
+            return
+
+        docs = self._docs
+        callbacks = self._callbacks
+        deadlines = self._deadlines
+        self._docs = []
+        self._callbacks = []
+        self._deadlines = []
+
+        request = CouchDBAsyncHTTPRequest(
+            "_bulk_docs",
+            "POST",
+            {"docs": docs},
+            self.db,
+            sign_body=False,
+            deadline=_earliest_deadline(deadlines))
+
+        cac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=self.db, priority=self.priority)
+        cac.fetch(request, functools.partial(self._on_cac_fetch_done, callbacks))
+
+    def _on_cac_fetch_done(self, callbacks, is_ok, is_conflict, results, _id, _rev, cac):
+        #
+        # _bulk_docs responds with one result per document and the results
+        # are in the same order as the documents in the request
+        #
+        #   [
+        #       {"ok": true, "id": "8b7e...", "rev": "1-967a..."},
+        #       {"id": "9f2a...", "error": "conflict", "reason": "Document update conflict."}
+        #   ]
+        #
+        if not is_ok or not isinstance(results, list) or len(results) != len(callbacks):
+            for callback in callbacks:
+                callback(False, False, None, None, None, cac)
+            return
+
+        for (result, callback) in zip(results, callbacks):
+            error = result.get("error")
+            if error is None:
+                callback(True, False, None, result.get("id"), result.get("rev"), cac)
+                continue
+
+            is_conflict = error == "conflict"
+            if not is_conflict:
+                _logger.error(
+                    "CouchDB _bulk_docs failed to write doc '%s' - %s (%s)",
+                    result.get("id"),
+                    error,
+                    result.get("reason"))
+            callback(False, is_conflict, None, None, None, cac)
+
+
 class AsyncDeleter(AsyncAction):
     """Async'ly delete a model object."""
 
-    def __init__(self, model, async_state=None):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self, model, async_state=None, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.model = model
 
         self._callback = None
 
-    def delete(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def delete(self, callback=None):
+        future = self._set_callback(callback)
 
         if not self.model._id or not self.model._rev:
             self._call_callback(False, False)
-            return
+            return future
 
         path = "%s?rev=%s" % (self.model._id, self.model._rev)
-        request = CouchDBAsyncHTTPRequest(path, "DELETE", None)
+        request = CouchDBAsyncHTTPRequest(path, "DELETE", None, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.OK, None)
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_fetch_done)
 
+        return future
+
     def _on_cac_fetch_done(self, is_ok, is_conflict, models, _id, _rev, cac):
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok, is_conflict)
 
     def _call_callback(self, is_ok, is_conflict):
         assert self._callback is not None
         assert (is_ok and not is_conflict) or (not is_ok)
+        self._set_fetch_failure_detail(is_ok, is_conflict)
+        self._callback(is_ok, is_conflict, self)
+        self._callback = None
+
+
+class AsyncModelUpdater(AsyncAction):
+    """Async'ly update a model object using optimistic concurrency.
+
+    The document identified by ```document_id``` is retrieved by document
+    ID, converted to a model by ```create_model_from_doc()``` (which
+    concrete classes derived from this class must implement) and passed
+    to ```mutate```. ```mutate``` changes the model (ex applies a change
+    or merges a desired state into the model's current state) and returns
+    ```True``` if the model should be persisted or ```False``` if no change
+    is required. If persisting the model results in a conflict the document
+    is retrieved again (by document ID - no view lookup), ```mutate``` is
+    applied to the freshly retrieved model and another persist is attempted.
+    Since ```mutate``` can be applied several times it should be a pure
+    function of the model it's passed.
+
+    Conflicts are retried as directed by a retry strategy created by
+    ```create_retry_strategy``` (a callable with no arguments). If
+    ```create_retry_strategy``` is ```None``` an ```ExponentialBackoffRetryStrategy```
+    with the database's ```request_metrics``` and this updater's ```deadline```
+    is used. If this updater has a ```deadline``` it's also applied to
+    retry strategies created by ```create_retry_strategy``` (unless the
+    retry strategy already has an earlier deadline).
+
+    The callback is called with is_ok, is_conflict, the updated model
+    and this updater. is_conflict is ```True``` when the retry strategy
+    gave up retrying conflicts. The model is ```None``` if the document
+    doesn't exist. To help tune contention, once the update is done
+    ```num_attempts``` is the number of times ```mutate``` was applied,
+    ```num_conflicts``` is the number of conflicts encountered and
+    ```waited_in_ms``` is the total time spent waiting between attempts.
+    """
+
+    def __init__(self,
+                 document_id,
+                 mutate,
+                 model_as_doc_for_store_args=None,
+                 create_retry_strategy=None,
+                 async_state=None,
+                 db=None,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        self.document_id = document_id
+        self.mutate = mutate
+        self.model_as_doc_for_store_args = model_as_doc_for_store_args or []
+        self.create_retry_strategy = create_retry_strategy
+
+        self.num_attempts = 0
+        self.num_conflicts = 0
+        self.waited_in_ms = 0
+
+        self._rs = None
+        self._callback = None
+
+    def update(self, callback=None):
+        future = self._set_callback(callback)
+
+        if self.create_retry_strategy is None:
+            self._rs = ExponentialBackoffRetryStrategy(
+                request_metrics=self.db.request_metrics,
+                deadline=self.deadline)
+        else:
+            self._rs = self.create_retry_strategy()
+            if self.deadline is not None:
+                self._rs.deadline = _earliest_deadline([self._rs.deadline, self.deadline])
+
+        self._fetch()
+
+        return future
+
+    def _fetch(self):
+        request = CouchDBAsyncHTTPRequest(self.document_id, 'GET', None, self.db, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(
+            httplib.OK,                     # expected_response_code
+            self.create_model_from_doc,
+            True,                           # expect_one_document
+            self.db,
+            priority=self.priority)
+        cac.fetch(request, self._on_cac_fetch_done)
+
+    def _on_cac_fetch_done(self, is_ok, is_conflict, model, _id, _rev, cac):
+        assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        if not is_ok:
+            if cac.response_code == httplib.NOT_FOUND:
+                self._call_callback(True, False)
+                return
+            self._call_callback(False, False)
+            return
+
+        self.num_attempts += 1
+        if not self.mutate(model):
+            self._call_callback(True, False, model)
+            return
+
+        ap = AsyncPersister(
+            model,
+            self.model_as_doc_for_store_args,
+            self.async_state,
+            self.db,
+            deadline=self.deadline,
+            priority=self.priority)
+        ap.persist(self._on_persist_done)
+
+    def _on_persist_done(self, is_ok, is_conflict, ap):
+        if is_conflict:
+            self.num_conflicts += 1
+            self._rs.wait(self._on_rs_wait_done)
+            return
+
+        self.fetch_failure_detail = ap.fetch_failure_detail
+        self._call_callback(is_ok, False, ap.model if is_ok else None)
+
+    def _on_rs_wait_done(self, waited_in_ms):
+        if not waited_in_ms:
+            _logger.error(
+                "Conflict detected updating '%s' - bailing after %d attempts",
+                self.document_id,
+                self.num_attempts)
+            self._call_callback(False, True)
+            return
+
+        _logger.info(
+            "Conflict detected updating '%s' - retrying update after waiting %d ms",
+            self.document_id,
+            waited_in_ms)
+
+        self.waited_in_ms += waited_in_ms
+        self._fetch()
+
+    def create_model_from_doc(self, doc):
+        """Concrete classes derived from this class must implement
+        this method which takes a dictionary (```doc```) and creates
+        a model instance.
+        """
+        raise NotImplementedError()
+
+    def _call_callback(self, is_ok, is_conflict, model=None):
+        assert self._callback is not None
+        assert (is_ok and not is_conflict) or (not is_ok)
+        self._set_fetch_failure_detail(is_ok, is_conflict)
+        self._callback(is_ok, is_conflict, model, self)
+        self._callback = None
+
+
+class AsyncDocumentUpdater(AsyncAction):
+    """Async'ly update (or create) a document using one of a design doc's
+    update handlers. The update handler reads the current revision of the
+    document, applies the change and saves the document on the server
+    which means a read-modify-write update takes a single round trip
+    rather than a fetch followed by a persist.
+
+    ```design_doc``` and ```update_handler``` name the update handler (ie
+    ```_design/<design_doc>/_update/<update_handler>```). If ```document_id```
+    is ```None``` the update handler is called with a ```null``` document
+    (which is how update handlers create documents). ```body_as_dict``` is
+    sent to the update handler as the JSON request body and ```query```
+    (a dict) as the request's query string.
+
+    Update handlers are shipped to the database as part of a design doc -
+    see the ```updates``` property of the design docs in
+    samples/db_installer/design_docs and the installer's ```--updatedesign```
+    option. Since the update handler rather than this process writes the
+    document, documents written by update handlers can't be signed by the
+    database's ```tampering_signer``` and would then fail tampering
+    verification when they're read. ```AsyncDocumentUpdater``` therefore
+    can't be used with a database which has a ```tampering_signer``` -
+    creating an ```AsyncDocumentUpdater``` for such a database raises
+    ```ValueError```.
+
+    The callback is called with is_ok, is_conflict and this updater.
+    Once the update is done ```_id``` and ```_rev``` are the id and new
+    revision of the document (both ```None``` if the update handler
+    decided not to save a document) and ```response_body``` is the
+    update handler's response as a string.
+    """
+
+    def __init__(self,
+                 design_doc,
+                 update_handler,
+                 document_id=None,
+                 body_as_dict=None,
+                 query=None,
+                 async_state=None,
+                 db=None,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        if self.db.tampering_signer:
+            raise ValueError("update handlers can't sign the documents they write")
+
+        self.design_doc = design_doc
+        self.update_handler = update_handler
+        self.document_id = document_id
+        self.body_as_dict = body_as_dict
+        self.query = query
+
+        self._id = None
+        self._rev = None
+        self.response_body = None
+
+        self._callback = None
+
+    def update(self, callback=None):
+        future = self._set_callback(callback)
+
+        path = "_design/%s/_update/%s" % (self.design_doc, self.update_handler)
+        if self.document_id is not None:
+            path = "%s/%s" % (path, urllib.quote(self.document_id, safe=""))
+        if self.query:
+            path = "%s?%s" % (path, urllib.urlencode(self.query))
+
+        request = CouchDBAsyncHTTPRequest(
+            path,
+            "PUT" if self.document_id is not None else "POST",
+            self.body_as_dict if self.body_as_dict is not None else {},
+            self.db,
+            sign_body=False,
+            deadline=self.deadline)
+
+        # update handlers respond with 201 (or 202 for batch mode) when
+        # a document was saved and 200 when no document was saved
+        expected_response_codes = (httplib.CREATED, httplib.ACCEPTED, httplib.OK)
+        cac = CouchDBAsyncHTTPClient(
+            expected_response_codes,
+            None,
+            db=self.db,
+            priority=self.priority,
+            raw_response_body=True)
+        cac.fetch(request, self._on_cac_fetch_done)
+
+        return future
+
+    def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        if is_ok:
+            self.response_body = response_body
+            self._rev = cac.response_headers.get("X-Couch-Update-NewRev")
+            if self._rev is not None:
+                self._id = cac.response_headers.get("X-Couch-Id", self.document_id)
+
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        self._call_callback(is_ok, is_conflict)
+
+    def _call_callback(self, is_ok, is_conflict):
+        assert self._callback is not None
+        assert (is_ok and not is_conflict) or (not is_ok)
+        self._set_fetch_failure_detail(is_ok, is_conflict)
         self._callback(is_ok, is_conflict, self)
         self._callback = None
 
@@ -607,29 +2603,302 @@ class AsyncDeleter(AsyncAction):
 class AsyncCouchDBHealthCheck(AsyncAction):
     """Async'ly confirm CouchDB can be reached."""
 
-    def __init__(self, async_state=None):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self, async_state=None, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self._callback = None
 
-    def check(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def check(self, callback=None):
+        future = self._set_callback(callback)
 
-        request = CouchDBAsyncHTTPRequest("", "GET", None)
+        request = CouchDBAsyncHTTPRequest("", "GET", None, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.OK, None)
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_db_fetch_done)
 
+        return future
+
     def _on_cac_db_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        self.fetch_failure_detail = cac.fetch_failure_detail
         self._call_callback(is_ok)
 
     def _call_callback(self, is_ok):
         assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
         self._callback(is_ok, self)
         self._callback = None
 
 
+class AsyncChangesFollower(AsyncAction):
+    """Async'ly follow a database's ```_changes``` feed.
+
+    ```feed``` is either ```FEED_LONGPOLL``` or ```FEED_CONTINUOUS```.
+    With a longpoll feed each request to CouchDB returns a batch of
+    changes once at least one change is available. With a continuous
+    feed a single request to CouchDB streams changes as they happen
+    and each chunk of the response is a batch of changes.
+
+    Following starts at ```since``` which is the checkpoint (sequence)
+    returned with a previous batch of changes (or 0 to start at the
+    beginning or "now" to only follow new changes). After each batch
+    ```since``` is updated to the batch's last sequence so the follower
+    can be checkpointed by persisting ```since``` and later passing it
+    to a new follower.
+
+    ```filter``` is the name of a filter function (ex "fruit/by_color" or
+    "_view") and ```filter_params``` is a dictionary of additional query
+    string parameters for the filter (ex {"view": "fruit_by_color/fruit_by_color"}).
+
+    ```timeout_in_ms``` is how long CouchDB waits for changes before
+    ending a request. The follower then immediately issues a new request.
+
+    A continuous feed asks CouchDB to send a heartbeat (an empty line)
+    every ```heartbeat_in_ms``` which keeps CouchDB from ending the
+    request. The request is instead ended by the HTTP client's request
+    timeout (```timeout_in_ms``` plus the database's request timeout).
+    Such a timeout, or a connection failure, after CouchDB has streamed
+    changes or heartbeats isn't an error - the follower immediately
+    reconnects from the last sequence it delivered.
+
+    When ```include_docs``` is ```True``` and a ```tampering_signer``` has
+    been configured each changed document is verified using the tamper
+    module. Design docs and deleted docs aren't signed and are therefore
+    not verified. If verification fails the change's doc is replaced
+    with ```None```.
+
+    If a request to CouchDB fails the follower waits as directed by a
+    retry strategy created by ```create_retry_strategy``` and then
+    reconnects. The retry strategy is reset each time a request
+    succeeds and each time a continuous feed streams changes or a
+    heartbeat. A continuous feed which streams a line that isn't valid
+    JSON (ex a line truncated by a proxy) is treated the same way - the
+    changes before the malformed line are delivered, the rest of the
+    request's response is ignored and the follower reconnects from the
+    last sequence it delivered.
+    """
+
+    priority = PRIORITY_BACKGROUND
+
+    FEED_LONGPOLL = "longpoll"
+    FEED_CONTINUOUS = "continuous"
+
+    def __init__(self,
+                 since=0,
+                 feed=FEED_LONGPOLL,
+                 filter=None,
+                 filter_params=None,
+                 include_docs=False,
+                 timeout_in_ms=60000,
+                 heartbeat_in_ms=10000,
+                 create_retry_strategy=ExponentialBackoffRetryStrategy,
+                 async_state=None,
+                 db=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority)
+
+        assert feed in [type(self).FEED_LONGPOLL, type(self).FEED_CONTINUOUS]
+
+        self.since = since
+        self.feed = feed
+        self.filter = filter
+        self.filter_params = filter_params
+        self.include_docs = include_docs
+        self.timeout_in_ms = timeout_in_ms
+        self.heartbeat_in_ms = heartbeat_in_ms
+        self.create_retry_strategy = create_retry_strategy
+
+        self._is_stopped = False
+        self._rs = None
+        # incremented each time a request is issued or abandoned so
+        # that responses to abandoned requests can be ignored
+        self._request_generation = 0
+        self._continuous_feed_buffer = None
+        # True once the current continuous feed request has streamed
+        # changes or a heartbeat
+        self._is_continuous_feed_streaming = False
+        self._changes_callback = None
+        self._callback = None
+
+    def follow(self, changes_callback, callback=None):
+        """Start following the ```_changes``` feed. ```changes_callback``` is
+        called with each batch of changes (a list of ```_changes``` results),
+        the batch's last sequence and this follower. ```callback``` is called
+        with is_ok and this follower once following stops - either because
+        ```stop()``` was called or because the retry strategy gave up
+        reconnecting to CouchDB.
+        """
+        future = self._set_callback(callback)
+        self._changes_callback = changes_callback
+
+        self._rs = self.create_retry_strategy()
+        self._fetch()
+
+        return future
+
+    def stop(self):
+        """Stop following the ```_changes``` feed. Since in-flight requests
+        can't be cancelled, following stops once CouchDB responds to the
+        current request (which can take up to ```timeout_in_ms```).
+        """
+        self._is_stopped = True
+
+    def _get_query_string_key_value_pairs(self):
+        query_params = {
+            "feed": self.feed,
+            "since": self.since,
+            "timeout": self.timeout_in_ms,
+        }
+        if self.feed == type(self).FEED_CONTINUOUS and self.heartbeat_in_ms:
+            query_params["heartbeat"] = self.heartbeat_in_ms
+        if self.include_docs:
+            query_params["include_docs"] = "true"
+        if self.filter:
+            query_params["filter"] = self.filter
+            query_params.update(self.filter_params or {})
+        return query_params
+
+    def _fetch(self):
+        if self._is_stopped:
+            self._call_callback(True)
+            return
+
+        self._request_generation += 1
+        request_generation = self._request_generation
+
+        path = "_changes?%s" % urllib.urlencode(self._get_query_string_key_value_pairs())
+        request = CouchDBAsyncHTTPRequest(path, "GET", None, self.db)
+        # CouchDB ends the request after timeout_in_ms without changes so
+        # allow for that plus some slack before giving up on CouchDB
+        request.request_timeout = (self.timeout_in_ms / 1000.0) + (request.request_timeout or 20.0)
+
+        is_continuous = self.feed == type(self).FEED_CONTINUOUS
+        if is_continuous:
+            self._continuous_feed_buffer = ""
+            self._is_continuous_feed_streaming = False
+            request.streaming_callback = functools.partial(self._on_continuous_feed_chunk, request_generation)
+
+        # heartbeats keep CouchDB from ending a continuous feed request
+        # so the request is expected to end with a timeout
+        cac = CouchDBAsyncHTTPClient(
+            httplib.OK,
+            None,
+            db=self.db,
+            priority=self.priority,
+            expect_timeout=is_continuous)
+        cac.fetch(request, functools.partial(self._on_cac_fetch_done, request_generation))
+
+    def _on_continuous_feed_chunk(self, request_generation, chunk):
+        #
+        # a continuous feed is a sequence of newline separated JSON
+        # objects - one per change - and a final object containing
+        # the feed's last sequence
+        #
+        #   {"seq":"12-g1AAAA","id":"8b7e","changes":[{"rev":"1-967a"}]}
+        #   {"seq":"13-g1AAAB","id":"9f2a","changes":[{"rev":"3-0a41"}],"deleted":true}
+        #   {"last_seq":"13-g1AAAB","pending":0}
+        #
+        if request_generation != self._request_generation:
+            # the request has been abandoned
+            return
+
+        lines = (self._continuous_feed_buffer + chunk).split("\n")
+        self._continuous_feed_buffer = lines.pop()
+
+        changes = []
+        last_seq = None
+        for line in lines:
+            line = line.strip()
+            if not line:
+                # heartbeat
+                continue
+            try:
+                change = json.loads(line)
+            except ValueError:
+                _logger.error(
+                    "Malformed line in _changes feed - reconnecting after seq '%s' - %s",
+                    last_seq if last_seq is not None else self.since,
+                    line[:100])
+                self._emit_changes(changes, last_seq)
+                self._request_generation += 1
+                self._rs.wait(self._on_rs_wait_done)
+                return
+            if "last_seq" in change:
+                last_seq = change["last_seq"]
+                continue
+            changes.append(change)
+            last_seq = change.get("seq")
+
+        if lines:
+            # CouchDB is streaming changes or heartbeats so the feed is healthy
+            self._is_continuous_feed_streaming = True
+            self._rs.reset()
+
+        self._emit_changes(changes, last_seq)
+
+    def _on_cac_fetch_done(self, request_generation, is_ok, is_conflict, response_body, _id, _rev, cac):
+        assert is_conflict is False
+        if request_generation != self._request_generation:
+            # the request was abandoned and the follower has
+            # already reconnected (or is waiting to reconnect)
+            return
+
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        if not is_ok:
+            if self._is_stopped:
+                self._call_callback(True)
+                return
+            is_transport_error = self.fetch_failure_detail == CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR
+            if is_transport_error and self._is_continuous_feed_streaming:
+                # the request timed out (or the connection was lost) after
+                # CouchDB had been streaming the feed - that's the expected
+                # end of a continuous feed request rather than an error
+                self._fetch()
+                return
+            self._rs.wait(self._on_rs_wait_done)
+            return
+
+        self._rs.reset()
+
+        if self.feed == type(self).FEED_LONGPOLL:
+            self._emit_changes(
+                response_body.get("results", []),
+                response_body.get("last_seq"))
+
+        self._fetch()
+
+    def _emit_changes(self, changes, last_seq):
+        if last_seq is not None:
+            self.since = last_seq
+
+        if not changes:
+            return
+
+        if self.include_docs and self.db.tampering_signer:
+            for change in changes:
+                doc = change.get("doc")
+                if doc is None or doc.get("_deleted") or doc["_id"].startswith("_design/"):
+                    continue
+                if not _is_doc_tamper_free(self.db, doc):
+                    change["doc"] = None
+
+        self._changes_callback(changes, self.since, self)
+
+    def _on_rs_wait_done(self, waited_in_ms):
+        if not waited_in_ms:
+            _logger.error("Error following _changes feed - bailing because too many retries")
+            self._call_callback(False)
+            return
+
+        self._fetch()
+
+    def _call_callback(self, is_ok):
+        assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, self)
+        self._callback = None
+        self._changes_callback = None
+
+
 class ViewMetrics(object):
     """An instance of this class contains metrics which describe
     both the shape and health of a view in a CouchDB databse.
@@ -653,9 +2922,12 @@ class DatabaseMetrics(object):
     """An instance of this class contains metrics which describe
     both the shape and health of a CouchDB databse. Instances of
     this class are created by ```AsyncDatabaseMetricsRetriever```.
+
+    ```missing_view_metrics``` is the list of design docs whose
+    metrics couldn't be retrieved when partial results were allowed.
     """
 
-    def __init__(self, database, doc_count, data_size, disk_size, view_metrics):
+    def __init__(self, database, doc_count, data_size, disk_size, view_metrics, missing_view_metrics=None):
         object.__init__(self)
 
         self.database = database
@@ -663,6 +2935,7 @@ class DatabaseMetrics(object):
         self.data_size = data_size
         self.disk_size = disk_size
         self.view_metrics = view_metrics
+        self.missing_view_metrics = missing_view_metrics or []
 
     @property
     def fragmentation(self):
@@ -671,34 +2944,57 @@ class DatabaseMetrics(object):
 
 
 class AsyncDatabaseMetricsRetriever(AsyncAction):
-    """Async'ly retrieve metrics for the CouchDB database."""
+    """Async'ly retrieve metrics for the CouchDB database.
+
+    ```max_view_metrics_concurrency``` and ```allow_partial_view_metrics```
+    are passed to ```AsyncAllViewMetricsRetriever```. When partial view
+    metrics are allowed and some view metrics couldn't be retrieved
+    ```fetch_failure_detail``` is ```FFD_PARTIAL_VIEW_METRICS``` and
+    the design docs are listed in the ```DatabaseMetrics```'
+    ```missing_view_metrics```.
+    """
+
+    priority = PRIORITY_BACKGROUND
 
     # FDD = Fetch Failure Details
     FFD_OK = 0x0000
     FFD_ERROR = 0x0080
     FFD_ERROR_TALKING_TO_COUCHDB = FFD_ERROR | 0x0001
     FFD_ERROR_GETTING_VIEW_METRICS = FFD_ERROR | 0x0002
+    FFD_PARTIAL_VIEW_METRICS = 0x0003
+
+    def __init__(self,
+                 async_state=None,
+                 db=None,
+                 max_view_metrics_concurrency=10,
+                 allow_partial_view_metrics=False,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
-    def __init__(self, async_state=None):
-        AsyncAction.__init__(self, async_state)
+        self.max_view_metrics_concurrency = max_view_metrics_concurrency
+        self.allow_partial_view_metrics = allow_partial_view_metrics
 
         self.fetch_failure_detail = None
 
         self._callback = None
 
-    def fetch(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
 
-        request = CouchDBAsyncHTTPRequest("", "GET", None)
+        request = CouchDBAsyncHTTPRequest("", "GET", None, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.OK, None)
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_db_fetch_done)
 
+        return future
+
     def _on_cac_db_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, acdba):
         assert is_conflict is False
         if not is_ok:
-            self._call_callback(type(self).FFD_ERROR_TALKING_TO_COUCHDB)
+            self._call_callback(_metrics_fetch_failure_detail(
+                acdba.fetch_failure_detail,
+                type(self).FFD_ERROR_TALKING_TO_COUCHDB))
             return
 
         async_state = (
@@ -706,21 +3002,33 @@ class AsyncDatabaseMetricsRetriever(AsyncAction):
             response_body.get("data_size"),
             response_body.get("disk_size"),
         )
-        aaddmr = AsyncAllViewMetricsRetriever(async_state)
+        aaddmr = AsyncAllViewMetricsRetriever(
+            async_state,
+            self.db,
+            max_concurrency=self.max_view_metrics_concurrency,
+            allow_partial_results=self.allow_partial_view_metrics,
+            deadline=self.deadline,
+            priority=self.priority)
         aaddmr.fetch(self._on_aaddmr_fetch_done)
 
     def _on_aaddmr_fetch_done(self, is_ok, view_metrics, aaddmr):
         if not is_ok:
-            self._call_callback(type(self).FFD_ERROR_GETTING_VIEW_METRICS)
+            self._call_callback(_metrics_fetch_failure_detail(
+                aaddmr.fetch_failure_detail,
+                type(self).FFD_ERROR_GETTING_VIEW_METRICS))
             return
 
         (doc_count, data_size, disk_size) = aaddmr.async_state
         database_metrics = DatabaseMetrics(
-            database,
+            self.db.url,
             doc_count,
             data_size,
             disk_size,
-            view_metrics)
+            view_metrics,
+            aaddmr.failed_design_docs)
+        if aaddmr.failed_design_docs:
+            self._call_callback(type(self).FFD_PARTIAL_VIEW_METRICS, database_metrics)
+            return
         self._call_callback(type(self).FFD_OK, database_metrics)
 
     def _call_callback(self, fetch_failure_detail, database_metrics=None):
@@ -736,7 +3044,20 @@ class AsyncDatabaseMetricsRetriever(AsyncAction):
 
 
 class AsyncAllViewMetricsRetriever(AsyncAction):
-    """Async'ly retrieve metrics for all views in a database."""
+    """Async'ly retrieve metrics for all views in a database.
+
+    At most ```max_concurrency``` ```AsyncViewMetricsRetriever```s
+    are in flight at any time so databases with lots of design docs
+    don't flood the async HTTP client's queue.
+
+    By default failing to retrieve any view's metrics fails the fetch.
+    If ```allow_partial_results``` is ```True``` the metrics that could
+    be retrieved are returned, ```fetch_failure_detail``` is
+    ```FFD_PARTIAL_RESULTS``` and ```failed_design_docs``` lists the
+    design docs whose metrics couldn't be retrieved.
+    """
+
+    priority = PRIORITY_BACKGROUND
 
     # FDD = Fetch Failure Details
     FFD_OK = 0x0000
@@ -744,19 +3065,33 @@ class AsyncAllViewMetricsRetriever(AsyncAction):
     FFD_ERROR_TALKING_TO_COUCHDB = FFD_ERROR | 0x0001
     FFD_ERROR_FETCHING_VIEW_METRICS = FFD_ERROR | 0x0002
     FFD_NO_DESIGN_DOCS_IN_DATABASE = 0x0003
+    FFD_PARTIAL_RESULTS = 0x0004
+
+    def __init__(self,
+                 async_state=None,
+                 db=None,
+                 max_concurrency=10,
+                 allow_partial_results=False,
+                 deadline=None,
+                 priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
-    def __init__(self, async_state=None):
-        AsyncAction.__init__(self, async_state)
+        assert 0 < max_concurrency
+
+        self.max_concurrency = max_concurrency
+        self.allow_partial_results = allow_partial_results
 
         self.fetch_failure_detail = None
+        self.failed_design_docs = []
 
-        self._todo = []
+        self._todo = collections.deque()
+        self._num_in_flight = 0
+        self._is_starting_fetches = False
         self._done = []
         self._callback = None
 
-    def fetch(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
 
         #
         # try something like this to get a sense of the response
@@ -781,15 +3116,19 @@ class AsyncAllViewMetricsRetriever(AsyncAction):
         # }
         #
         path = '_all_docs?startkey="_design"&endkey="_design0"'
-        request = CouchDBAsyncHTTPRequest(path, "GET", None)
+        request = CouchDBAsyncHTTPRequest(path, "GET", None, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.OK, None)
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_fetch_done)
 
+        return future
+
     def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, acdba):
         assert is_conflict is False
         if not is_ok:
-            self._call_callback(type(self).FFD_ERROR_TALKING_TO_COUCHDB)
+            self._call_callback(_metrics_fetch_failure_detail(
+                acdba.fetch_failure_detail,
+                type(self).FFD_ERROR_TALKING_TO_COUCHDB))
             return
 
         rows = response_body.get("rows", [])
@@ -797,21 +3136,42 @@ class AsyncAllViewMetricsRetriever(AsyncAction):
             self._call_callback(type(self).FFD_NO_DESIGN_DOCS_IN_DATABASE)
             return
 
-        for row in rows:
-            design_doc = row["key"].split("/")[1]
-            self._todo.append(design_doc)
-            avmr = AsyncViewMetricsRetriever(design_doc)
+        self._todo.extend(row["key"].split("/")[1] for row in rows)
+        self._start_fetches()
+
+    def _start_fetches(self):
+        # view metrics retrievers can call back before fetch() returns
+        # so guard against starting fetches recursively
+        self._is_starting_fetches = True
+        while self._todo and self._num_in_flight < self.max_concurrency and self._callback:
+            design_doc = self._todo.popleft()
+            self._num_in_flight += 1
+            avmr = AsyncViewMetricsRetriever(design_doc, db=self.db, deadline=self.deadline, priority=self.priority)
             avmr.fetch(self._on_avmr_fetch_done)
+        self._is_starting_fetches = False
+
+        if not self._todo and not self._num_in_flight:
+            if self.failed_design_docs:
+                self._call_callback(type(self).FFD_PARTIAL_RESULTS)
+                return
+            self._call_callback(type(self).FFD_OK)
 
     def _on_avmr_fetch_done(self, is_ok, view_metrics, avmr):
-        if not is_ok:
-            self._call_callback(type(self).FFD_ERROR_FETCHING_VIEW_METRICS)
-            return
+        self._num_in_flight -= 1
 
-        self._todo.remove(view_metrics.design_doc)
-        self._done.append(view_metrics)
+        if is_ok:
+            self._done.append(view_metrics)
+        else:
+            if not self.allow_partial_results:
+                self._todo.clear()
+                self._call_callback(_metrics_fetch_failure_detail(
+                    avmr.fetch_failure_detail,
+                    type(self).FFD_ERROR_FETCHING_VIEW_METRICS))
+                return
+            self.failed_design_docs.append(avmr.design_doc)
 
-        self._call_callback(type(self).FFD_OK)
+        if not self._is_starting_fetches:
+            self._start_fetches()
 
     def _call_callback(self, fetch_failure_detail):
         if not self._callback:
@@ -819,55 +3179,50 @@ class AsyncAllViewMetricsRetriever(AsyncAction):
             # we're still getting responses back from CouchDB
             return
 
-        is_ok = not bool(fetch_failure_detail & type(self).FFD_ERROR)
-
-        if not is_ok:
-            assert self.fetch_failure_detail is None
-            self.fetch_failure_detail = fetch_failure_detail
-            self._callback(False, None, self)
-            self._callback = None
-            return
-
-        if self._todo:
-            return
-
         assert self.fetch_failure_detail is None
         self.fetch_failure_detail = fetch_failure_detail
-        self._callback(True, self._done, self)
+
+        is_ok = not bool(fetch_failure_detail & type(self).FFD_ERROR)
+        self._callback(is_ok, self._done if is_ok else None, self)
         self._callback = None
 
 
 class AsyncViewMetricsRetriever(AsyncAction):
     """Async'ly retrieve metrics for a single view."""
 
+    priority = PRIORITY_BACKGROUND
+
     # FDD = Fetch Failure Details
     FFD_OK = 0x0000
     FFD_ERROR = 0x0080
     FFD_ERROR_TALKING_TO_COUCHDB = FFD_ERROR | 0x0001
     FFD_INVALID_RESPONSE_BODY = 0x0002
 
-    def __init__(self, design_doc, async_state=None):
-        AsyncAction.__init__(self, async_state)
+    def __init__(self, design_doc, async_state=None, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
 
         self.design_doc = design_doc
         self.fetch_failure_detail = None
 
         self._callback = None
 
-    def fetch(self, callback):
-        assert not self._callback
-        self._callback = callback
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
 
         path = '_design/%s/_info' % self.design_doc
-        request = CouchDBAsyncHTTPRequest(path, "GET", None)
+        request = CouchDBAsyncHTTPRequest(path, "GET", None, self.db, deadline=self.deadline)
 
-        cac = CouchDBAsyncHTTPClient(httplib.OK, None)
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
         cac.fetch(request, self._on_cac_fetch_done)
 
+        return future
+
     def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
         assert is_conflict is False
         if not is_ok:
-            self._call_callback(type(self).FFD_ERROR_TALKING_TO_COUCHDB)
+            self._call_callback(_metrics_fetch_failure_detail(
+                cac.fetch_failure_detail,
+                type(self).FFD_ERROR_TALKING_TO_COUCHDB))
             return
 
         view_index = response_body.get('view_index', {})
@@ -889,3 +3244,80 @@ class AsyncViewMetricsRetriever(AsyncAction):
             ViewMetrics(self.design_doc, data_size, disk_size) if is_ok else None,
             self)
         self._callback = None
+
+
+class AsyncCompactor(AsyncAction):
+    """Async'ly ask CouchDB to compact the database or, if ```design_doc```
+    isn't ```None```, the design doc's view indexes. CouchDB compacts in the
+    background so the callback is called as soon as CouchDB accepts the
+    request - use ```AsyncActiveTasksRetriever``` to follow the compaction's
+    progress. Compaction requires admin credentials.
+    """
+
+    priority = PRIORITY_BACKGROUND
+
+    def __init__(self, design_doc=None, async_state=None, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        self.design_doc = design_doc
+
+        self._callback = None
+
+    def compact(self, callback=None):
+        future = self._set_callback(callback)
+
+        path = "_compact/%s" % self.design_doc if self.design_doc else "_compact"
+        request = CouchDBAsyncHTTPRequest(path, "POST", {}, self.db, sign_body=False, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(httplib.ACCEPTED, None, db=self.db, priority=self.priority)
+        cac.fetch(request, self._on_cac_fetch_done)
+
+        return future
+
+    def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        self._call_callback(is_ok)
+
+    def _call_callback(self, is_ok):
+        assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, self)
+        self._callback = None
+
+
+class AsyncActiveTasksRetriever(AsyncAction):
+    """Async'ly retrieve the tasks (compactions, indexing, replication,
+    etc) running on the CouchDB server which hosts the database. The
+    callback is called with is_ok, the list of tasks described by
+    ```_active_tasks``` and this retriever. Retrieving active tasks
+    requires admin credentials.
+    """
+
+    priority = PRIORITY_BACKGROUND
+
+    def __init__(self, async_state=None, db=None, deadline=None, priority=None):
+        AsyncAction.__init__(self, async_state, db, priority=priority, deadline=deadline)
+
+        self._callback = None
+
+    def fetch(self, callback=None):
+        future = self._set_callback(callback)
+
+        request = CouchDBAsyncHTTPRequest("_active_tasks", "GET", None, self.db, on_server=True, deadline=self.deadline)
+
+        cac = CouchDBAsyncHTTPClient(httplib.OK, None, db=self.db, priority=self.priority)
+        cac.fetch(request, self._on_cac_fetch_done)
+
+        return future
+
+    def _on_cac_fetch_done(self, is_ok, is_conflict, response_body, _id, _rev, cac):
+        assert is_conflict is False
+        self.fetch_failure_detail = cac.fetch_failure_detail
+        self._call_callback(is_ok, response_body if is_ok else None)
+
+    def _call_callback(self, is_ok, active_tasks=None):
+        assert self._callback is not None
+        self._set_fetch_failure_detail(is_ok)
+        self._callback(is_ok, active_tasks, self)
+        self._callback = None
@@ -0,0 +1,127 @@
+"""This module contains a circuit breaker which ```CouchDBAsyncHTTPClient```
+uses to fail requests fast while CouchDB is slow or unavailable rather
+than having every request wait out the full request timeout.
+"""
+
+import collections
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker(object):
+    """```CircuitBreaker``` tracks the outcome and latency of the most
+    recent ```window_size``` requests to CouchDB.
+
+    While the circuit breaker is closed requests flow normally. Once at
+    least ```min_num_requests``` requests have been recorded the circuit
+    breaker opens if either the fraction of requests which failed (transport
+    errors, timeouts and 5xx responses) reaches ```failure_rate_threshold```
+    or the fraction of requests slower than ```slow_request_threshold_in_ms```
+    reaches ```slow_request_rate_threshold```.
+
+    While the circuit breaker is open requests are rejected without being
+    sent to CouchDB. After ```open_duration_in_ms``` milliseconds the circuit
+    breaker becomes half-open and permits ```num_half_open_requests```
+    trial requests. If all trial requests succeed (and aren't slow) the
+    circuit breaker closes otherwise it opens again.
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 failure_rate_threshold=0.5,
+                 slow_request_threshold_in_ms=5 * 1000,
+                 slow_request_rate_threshold=0.5,
+                 window_size=20,
+                 min_num_requests=10,
+                 open_duration_in_ms=5 * 1000,
+                 num_half_open_requests=1):
+        object.__init__(self)
+
+        assert 0 < min_num_requests <= window_size
+        assert 0 < num_half_open_requests
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_request_threshold_in_ms = slow_request_threshold_in_ms
+        self.slow_request_rate_threshold = slow_request_rate_threshold
+        self.window_size = window_size
+        self.min_num_requests = min_num_requests
+        self.open_duration_in_ms = open_duration_in_ms
+        self.num_half_open_requests = num_half_open_requests
+
+        self.num_rejected = 0
+        self.num_times_opened = 0
+
+        self._state = type(self).STATE_CLOSED
+        self._opened_at = None
+        self._outcomes = collections.deque(maxlen=window_size)
+        self._num_half_open_requests_issued = 0
+        self._num_half_open_successes = 0
+
+    @property
+    def state(self):
+        if self._state == type(self).STATE_OPEN:
+            if self.open_duration_in_ms <= (time.time() - self._opened_at) * 1000:
+                self._state = type(self).STATE_HALF_OPEN
+                self._num_half_open_requests_issued = 0
+                self._num_half_open_successes = 0
+        return self._state
+
+    def allow_request(self):
+        """Returns ```True``` if a request can be sent to CouchDB. Each
+        ```True``` must be followed by a call to ```record()``` once
+        the request is done.
+        """
+        state = self.state
+
+        if state == type(self).STATE_CLOSED:
+            return True
+
+        if state == type(self).STATE_HALF_OPEN:
+            if self._num_half_open_requests_issued < self.num_half_open_requests:
+                self._num_half_open_requests_issued += 1
+                return True
+
+        self.num_rejected += 1
+        return False
+
+    def record(self, is_failure, request_time_in_ms):
+        is_slow = self.slow_request_threshold_in_ms < request_time_in_ms
+
+        state = self.state
+
+        if state == type(self).STATE_OPEN:
+            # response to a request issued before the circuit breaker opened
+            return
+
+        if state == type(self).STATE_HALF_OPEN:
+            if is_failure or is_slow:
+                self._open()
+                return
+            self._num_half_open_successes += 1
+            if self.num_half_open_requests <= self._num_half_open_successes:
+                _logger.info("circuit breaker closed")
+                self._state = type(self).STATE_CLOSED
+                self._outcomes.clear()
+            return
+
+        self._outcomes.append((is_failure, is_slow))
+        if len(self._outcomes) < self.min_num_requests:
+            return
+
+        num_outcomes = float(len(self._outcomes))
+        failure_rate = sum(1 for (is_failure, _) in self._outcomes if is_failure) / num_outcomes
+        slow_request_rate = sum(1 for (_, is_slow) in self._outcomes if is_slow) / num_outcomes
+        if self.failure_rate_threshold <= failure_rate or self.slow_request_rate_threshold <= slow_request_rate:
+            self._open()
+
+    def _open(self):
+        _logger.warning("circuit breaker opened")
+        self._state = type(self).STATE_OPEN
+        self._opened_at = time.time()
+        self._outcomes.clear()
+        self.num_times_opened += 1
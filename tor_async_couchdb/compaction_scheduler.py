@@ -0,0 +1,221 @@
+"""This module contains an opt-in scheduler which compacts a CouchDB
+database and its view indexes when their fragmentation crosses a
+threshold rather than waiting for someone to notice degraded disk usage
+and read latency and compact by hand.
+"""
+
+import datetime
+import logging
+
+import tornado.ioloop
+
+from async_model_actions import AsyncActiveTasksRetriever
+from async_model_actions import AsyncCompactor
+from async_model_actions import AsyncDatabaseMetricsRetriever
+from async_model_actions import get_default_db
+
+_logger = logging.getLogger(__name__)
+
+
+class CompactionScheduler(object):
+    """```CompactionScheduler``` periodically (every ```check_interval_in_ms```
+    milliseconds) decides if the database or one of its view indexes should
+    be compacted. Each check:
+
+        -- does nothing outside of the quiet hours window (if configured)
+        -- retrieves the server's ```_active_tasks``` and does nothing if
+           any database or view compaction is running so that only one
+           heavy compaction runs at a time
+        -- retrieves the database's ```DatabaseMetrics``` and picks the
+           most fragmented of the database and its views whose fragmentation
+           is at least ```fragmentation_threshold``` percent, whose disk size
+           is at least ```min_disk_size``` bytes and which hasn't been
+           compacted in the last ```min_interval_between_compactions_in_ms```
+           milliseconds
+        -- starts compacting the target (if there is one) using
+           ```AsyncCompactor```
+
+    ```quiet_hours``` is ```None``` (compaction can happen at any time)
+    or a (start hour, end hour) tuple of UTC hours - ex (1, 5) permits
+    compaction between 01:00 and 04:59 UTC and (22, 2) permits
+    compaction between 22:00 and 01:59 UTC.
+
+    A target is identified by ```None``` for the database or the design
+    doc's name for a view. ```compactions``` records (target, UTC start
+    time) for each compaction the scheduler started and ```active_compactions```
+    holds the compaction tasks (including their progress) that were running
+    when ```_active_tasks``` was last retrieved.
+    """
+
+    compaction_task_types = ("database_compaction", "view_compaction")
+
+    def __init__(self,
+                 fragmentation_threshold=50,
+                 min_disk_size=1024 * 1024,
+                 min_interval_between_compactions_in_ms=24 * 60 * 60 * 1000,
+                 quiet_hours=None,
+                 check_interval_in_ms=5 * 60 * 1000,
+                 db=None):
+        object.__init__(self)
+
+        self.fragmentation_threshold = fragmentation_threshold
+        self.min_disk_size = min_disk_size
+        self.min_interval_between_compactions_in_ms = min_interval_between_compactions_in_ms
+        self.quiet_hours = quiet_hours
+        self.check_interval_in_ms = check_interval_in_ms
+        self.db = db if db is not None else get_default_db()
+
+        self.compactions = []
+        self.active_compactions = []
+
+        self._last_compaction_at_by_target = {}
+        self._is_started = False
+        self._is_checking = False
+        self._timeout = None
+        self._callback = None
+
+    def start(self):
+        assert not self._is_started
+        self._is_started = True
+        self._schedule_check()
+
+    def stop(self):
+        self._is_started = False
+        if self._timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._timeout)
+            self._timeout = None
+
+    def is_in_quiet_hours(self, now):
+        if self.quiet_hours is None:
+            return True
+        (start_hour, end_hour) = self.quiet_hours
+        if start_hour <= end_hour:
+            return start_hour <= now.hour < end_hour
+        return start_hour <= now.hour or now.hour < end_hour
+
+    def check(self, callback=None):
+        """Decide if a compaction should be started and, if so, start it.
+        Once the check is done ```callback``` (if supplied) is called with
+        3 arguments - ```True``` if a compaction was started otherwise
+        ```False```, the target of the compaction that was started
+        (```None``` for the database or when no compaction was started)
+        and this scheduler. Checks requested while a check is in progress
+        are ignored.
+        """
+        if self._is_checking:
+            if callback:
+                callback(False, None, self)
+            return
+
+        self._is_checking = True
+        self._callback = callback
+
+        if not self.is_in_quiet_hours(datetime.datetime.utcnow()):
+            self._check_done(False)
+            return
+
+        aatr = AsyncActiveTasksRetriever(db=self.db)
+        aatr.fetch(self._on_aatr_fetch_done)
+
+    def _on_aatr_fetch_done(self, is_ok, active_tasks, aatr):
+        if not is_ok:
+            _logger.error("retrieving active tasks for database '%s' failed", self.db.url)
+            self._check_done(False)
+            return
+
+        self.active_compactions = [
+            task for task in active_tasks
+            if task.get("type") in type(self).compaction_task_types
+        ]
+        if self.active_compactions:
+            self._check_done(False)
+            return
+
+        adbmr = AsyncDatabaseMetricsRetriever(db=self.db, allow_partial_view_metrics=True)
+        adbmr.fetch(self._on_adbmr_fetch_done)
+
+    def _on_adbmr_fetch_done(self, is_ok, database_metrics, adbmr):
+        if not is_ok:
+            _logger.error("retrieving metrics for database '%s' failed", self.db.url)
+            self._check_done(False)
+            return
+
+        (is_found, target) = self._select_target(database_metrics, datetime.datetime.utcnow())
+        if not is_found:
+            self._check_done(False)
+            return
+
+        _logger.info(
+            "compacting %s in database '%s'",
+            "view '%s'" % target if target else "database",
+            self.db.url)
+
+        compactor = AsyncCompactor(target, db=self.db)
+        compactor.compact(self._on_compactor_compact_done)
+
+    def _select_target(self, database_metrics, now):
+        """Returns an (is_found, target) tuple describing the most
+        fragmented target eligible for compaction - is_found is ```False```
+        if there's no eligible target.
+        """
+        candidates = [(database_metrics.fragmentation, database_metrics.disk_size, None)]
+        for view_metrics in database_metrics.view_metrics:
+            candidates.append((view_metrics.fragmentation, view_metrics.disk_size, view_metrics.design_doc))
+
+        min_interval = datetime.timedelta(0, self.min_interval_between_compactions_in_ms / 1000.0, 0)
+
+        is_found = False
+        target = None
+        max_fragmentation = None
+        for (fragmentation, disk_size, candidate) in candidates:
+            if fragmentation is None or fragmentation < self.fragmentation_threshold:
+                continue
+            if (disk_size or 0) < self.min_disk_size:
+                continue
+            last_compaction_at = self._last_compaction_at_by_target.get(candidate)
+            if last_compaction_at is not None and now - last_compaction_at < min_interval:
+                continue
+            if max_fragmentation is None or max_fragmentation < fragmentation:
+                max_fragmentation = fragmentation
+                is_found = True
+                target = candidate
+
+        return (is_found, target)
+
+    def _on_compactor_compact_done(self, is_ok, compactor):
+        if not is_ok:
+            _logger.error(
+                "starting compaction of %s in database '%s' failed",
+                "view '%s'" % compactor.design_doc if compactor.design_doc else "database",
+                self.db.url)
+            self._check_done(False)
+            return
+
+        now = datetime.datetime.utcnow()
+        self._last_compaction_at_by_target[compactor.design_doc] = now
+        self.compactions.append((compactor.design_doc, now))
+
+        self._check_done(True, compactor.design_doc)
+
+    def _check_done(self, is_started, target=None):
+        self._is_checking = False
+
+        callback = self._callback
+        self._callback = None
+
+        if self._is_started:
+            self._schedule_check()
+
+        if callback:
+            callback(is_started, target, self)
+
+    def _schedule_check(self):
+        if self._timeout is not None:
+            return
+        self._timeout = tornado.ioloop.IOLoop.current().add_timeout(
+            datetime.timedelta(0, self.check_interval_in_ms / 1000.0, 0),
+            self._on_timeout)
+
+    def _on_timeout(self):
+        self._timeout = None
+        self.check()
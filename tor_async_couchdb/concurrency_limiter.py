@@ -0,0 +1,159 @@
+"""This module contains an adaptive concurrency limiter which
+```CouchDBAsyncHTTPClient``` uses to bound the number of concurrent
+requests sent to CouchDB by CouchDB's observed capacity rather than by
+a static connection pool size.
+"""
+
+import collections
+import logging
+import time
+
+from priority_scheduler import PRIORITY_INTERACTIVE
+from priority_scheduler import QueueDrainer
+from priority_scheduler import priorities
+
+_logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """```AdaptiveConcurrencyLimiter``` adjusts the number of requests
+    which can be in flight to CouchDB using additive increase /
+    multiplicative decrease (AIMD).
+
+    The limiter tracks CouchDB's no-load latency as a slowly decaying
+    minimum of observed latencies. When a request completes:
+
+        -- if the request failed (a transport error, timeout or 5xx
+           response) or its latency exceeds ```latency_tolerance``` times
+           the no-load latency the limit is multiplied by ```backoff_ratio```
+           (at most once per observed latency so that a burst of slow
+           responses to requests issued at the same time only backs off once)
+        -- otherwise, if the limit was fully used, the limit grows by
+           1 / limit (roughly 1 per limit's worth of requests)
+
+    The limit is kept between ```min_limit``` and ```max_limit```. Note
+    that ```max_limit``` should be no greater than the database's
+    ```max_clients``` otherwise requests will also queue in the async
+    HTTP client.
+
+    Requests in excess of the limit wait in a queue of at most
+    ```max_queue_size``` requests. Requests which arrive when the queue
+    is full are shed. Queued requests are started in priority order
+    (interactive before background) and FIFO within a priority.
+    """
+
+    def __init__(self,
+                 initial_limit=10,
+                 min_limit=1,
+                 max_limit=100,
+                 max_queue_size=1000,
+                 latency_tolerance=2.0,
+                 backoff_ratio=0.9,
+                 no_load_latency_decay=0.01):
+        object.__init__(self)
+
+        assert 0 < min_limit <= initial_limit <= max_limit
+        assert 0 <= max_queue_size
+        assert 0 < backoff_ratio < 1
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue_size = max_queue_size
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.no_load_latency_decay = no_load_latency_decay
+
+        self.num_in_flight = 0
+        self.num_shed = 0
+        self.no_load_latency_in_ms = None
+
+        self._limit = float(initial_limit)
+        self._queues_by_priority = collections.OrderedDict(
+            (priority, collections.deque()) for priority in sorted(priorities))
+        self._last_backoff_at = None
+        self._queue_drainer = QueueDrainer()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def queue_size(self):
+        return sum(len(queue) for queue in self._queues_by_priority.values())
+
+    def acquire(self, callback, priority=PRIORITY_INTERACTIVE):
+        """Request permission to send a request to CouchDB. ```callback```
+        is called (without arguments) once the request can be sent - which
+        might be immediately. Returns ```False``` if the request was shed
+        in which case ```callback``` will never be called. Each call to
+        ```callback``` must be followed by a call to ```release()```.
+        """
+        queue_size = self.queue_size
+
+        if self.num_in_flight < self.limit and not queue_size:
+            self.num_in_flight += 1
+            callback()
+            return True
+
+        if self.max_queue_size <= queue_size:
+            self.num_shed += 1
+            return False
+
+        self._queues_by_priority[priority].append(callback)
+        return True
+
+    def cancel(self, callback, priority=PRIORITY_INTERACTIVE):
+        """Stop ```callback``` (previously passed to ```acquire()``` with
+        ```priority```) waiting in the queue. Returns ```False``` if
+        ```callback``` isn't queued (ex it's already been called).
+        """
+        try:
+            self._queues_by_priority[priority].remove(callback)
+        except ValueError:
+            return False
+        return True
+
+    def release(self, is_failure=False, latency_in_ms=None):
+        """Called once a request is done. ```latency_in_ms``` is ```None```
+        if the request wasn't sent to CouchDB in which case the limit
+        isn't adjusted.
+        """
+        assert 0 < self.num_in_flight
+
+        if latency_in_ms is not None:
+            self._adjust_limit(is_failure, latency_in_ms)
+
+        self.num_in_flight -= 1
+
+        self._queue_drainer.drain(self._start_next)
+
+    def _start_next(self):
+        """Returns the highest priority queued request's callback if
+        there's room under the limit otherwise ```None```.
+        """
+        if self.limit <= self.num_in_flight:
+            return None
+        queue = next((queue for queue in self._queues_by_priority.values() if queue), None)
+        if queue is None:
+            return None
+        self.num_in_flight += 1
+        return queue.popleft()
+
+    def _adjust_limit(self, is_failure, latency_in_ms):
+        if self.no_load_latency_in_ms is None or latency_in_ms < self.no_load_latency_in_ms:
+            self.no_load_latency_in_ms = latency_in_ms
+        else:
+            # decay toward the observed latency so the no-load latency
+            # recovers if CouchDB's baseline latency permanently changes
+            self.no_load_latency_in_ms += (latency_in_ms - self.no_load_latency_in_ms) * self.no_load_latency_decay
+
+        if is_failure or self.no_load_latency_in_ms * self.latency_tolerance < latency_in_ms:
+            now = time.time()
+            if self._last_backoff_at is None or latency_in_ms <= (now - self._last_backoff_at) * 1000:
+                self._last_backoff_at = now
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                _logger.info("concurrency limit reduced to %d", self.limit)
+            return
+
+        if self.limit <= self.num_in_flight:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
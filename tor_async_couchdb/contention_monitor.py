@@ -0,0 +1,38 @@
+"""This module contains a contention monitor which ```CouchDBAsyncHTTPClient```
+informs of the outcome and latency of each document write so that an
+```AdaptiveRetryStrategy``` can scale its retry delays to the recently
+observed conflict rate and CouchDB latency.
+"""
+
+
+class ContentionMonitor(object):
+    """```ContentionMonitor``` tracks exponentially weighted moving
+    averages of the fraction of document writes (PUT, POST and DELETE
+    requests) which result in a 409 Conflict and of the latency of
+    document writes. ```decay``` is the weight given to each new
+    observation - the larger ```decay``` the more recent the averages.
+    """
+
+    def __init__(self, decay=0.05):
+        object.__init__(self)
+
+        assert 0 < decay <= 1
+
+        self.decay = decay
+
+        self.num_writes = 0
+        self.num_conflicts = 0
+        self.conflict_rate = 0.0
+        self.latency_in_ms = None
+
+    def record(self, is_conflict, latency_in_ms):
+        self.num_writes += 1
+        if is_conflict:
+            self.num_conflicts += 1
+
+        self.conflict_rate += ((1.0 if is_conflict else 0.0) - self.conflict_rate) * self.decay
+
+        if self.latency_in_ms is None:
+            self.latency_in_ms = float(latency_in_ms)
+        else:
+            self.latency_in_ms += (latency_in_ms - self.latency_in_ms) * self.decay
@@ -0,0 +1,94 @@
+"""This module contains a collector which refreshes database metrics on a
+background IOLoop timer so that high frequency requests for the metrics
+(ex a ```/_metrics``` endpoint scraped by a monitoring system) can be
+answered from a cached snapshot.
+"""
+
+import datetime
+import functools
+import logging
+
+from async_model_actions import AsyncDatabaseMetricsRetriever
+from async_model_actions import get_default_db
+from periodic_refresher import PeriodicRefresher
+
+_logger = logging.getLogger(__name__)
+
+
+class DatabaseMetricsCollector(object):
+    """```DatabaseMetricsCollector``` refreshes ```DatabaseMetrics```
+    on a background IOLoop timer so that request handlers (ex a
+    ```/_metrics``` endpoint) can be served from the most recent
+    snapshot rather than each request generating a database GET, an
+    ```_all_docs``` design document scan and an ```_info``` GET per
+    design document.
+
+    ```start()``` immediately refreshes the snapshot and then refreshes
+    the snapshot every ```refresh_interval_in_ms``` milliseconds (measured
+    from the end of the previous refresh). ```refresh()``` can be called
+    at any time and refreshes which are requested while a refresh is in
+    progress are collapsed into the in-progress refresh.
+
+    If a refresh fails the previous snapshot continues to be served.
+    ```collected_at``` is when the current snapshot was retrieved and
+    ```staleness_in_ms``` is its age which is useful when deciding
+    if a snapshot is too old to be trusted.
+    """
+
+    def __init__(self, refresh_interval_in_ms=60 * 1000, db=None):
+        object.__init__(self)
+
+        self.db = db if db is not None else get_default_db()
+
+        self.database_metrics = None
+        self.collected_at = None
+        self.last_refresh_ok = None
+        self.last_refresh_at = None
+
+        self._refresher = PeriodicRefresher(self._refresh, refresh_interval_in_ms)
+
+    @property
+    def refresh_interval_in_ms(self):
+        return self._refresher.refresh_interval_in_ms
+
+    @property
+    def staleness_in_ms(self):
+        """Age of the current snapshot or ```None``` if no snapshot
+        has been successfully retrieved.
+        """
+        if self.collected_at is None:
+            return None
+        return (datetime.datetime.utcnow() - self.collected_at).total_seconds() * 1000
+
+    def start(self):
+        self._refresher.start()
+
+    def stop(self):
+        self._refresher.stop()
+
+    def refresh(self, callback=None):
+        """Refresh the snapshot. Once the refresh is done ```callback```
+        (if supplied) is called with is_ok, the refreshed ```DatabaseMetrics```
+        (```None``` if the refresh failed) and this collector.
+        """
+        self._refresher.refresh(callback)
+
+    def _refresh(self, done):
+        adbmr = AsyncDatabaseMetricsRetriever(db=self.db)
+        adbmr.fetch(functools.partial(self._on_adbmr_fetch_done, done))
+
+    def _on_adbmr_fetch_done(self, done, is_ok, database_metrics, adbmr):
+        now = datetime.datetime.utcnow()
+
+        self.last_refresh_ok = is_ok
+        self.last_refresh_at = now
+        if is_ok:
+            self.database_metrics = database_metrics
+            self.collected_at = now
+        else:
+            _logger.error(
+                "refreshing metrics for database '%s' failed (0x%04x)",
+                self.db.url,
+                adbmr.fetch_failure_detail)
+
+        done(is_ok, database_metrics, self)
@@ -0,0 +1,97 @@
+"""This module contains an in-process LRU cache of CouchDB documents
+which is used by ```AsyncModelRetrieverByDocumentID``` to avoid having
+CouchDB serialize and transmit unchanged documents.
+"""
+
+import collections
+import json
+
+
+class DocumentCache(object):
+    """```DocumentCache``` is an LRU cache of documents keyed by document ID.
+    Each entry holds a document (including its ```_rev```) serialized as
+    JSON. Storing serialized documents means each ```get()``` returns
+    a new copy of the document which callers are free to modify and
+    also provides a simple measure of the memory used by the cache.
+
+    The cache holds at most ```max_docs``` documents and at most
+    ```max_bytes``` bytes of serialized documents. When adding a document
+    would exceed either limit the least recently used documents are evicted.
+
+    Users of the cache (ex ```AsyncModelRetrieverByDocumentID```) revalidate
+    the cached revision returned by ```get()``` with CouchDB and report the
+    outcome to ```revalidated()```. ```hits``` counts the cached revisions
+    CouchDB confirmed are current and ```misses``` counts the documents
+    CouchDB had to send. ```evictions``` counts the documents evicted to
+    keep the cache within its limits.
+    """
+
+    def __init__(self, max_docs=1000, max_bytes=10 * 1024 * 1024):
+        object.__init__(self)
+
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._num_bytes = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def num_bytes(self):
+        return self._num_bytes
+
+    def get(self, document_id):
+        """Returns a copy of the cached ```document_id``` or ```None```
+        if ```document_id``` isn't in the cache. ```document_id```
+        becomes the most recently used document.
+        """
+        doc_as_json = self._entries.pop(document_id, None)
+        if doc_as_json is None:
+            return None
+        self._entries[document_id] = doc_as_json
+        return json.loads(doc_as_json)
+
+    def revalidated(self, document_id, doc=None):
+        """Called once CouchDB has revalidated the cached revision of
+        ```document_id``` (or been asked for ```document_id``` when it
+        isn't cached). ```doc``` is ```None``` if CouchDB confirmed the
+        cached revision is current (a hit) otherwise ```doc``` is the
+        document CouchDB sent which replaces any cached revision (a miss).
+        """
+        if doc is None:
+            self.hits += 1
+            return
+
+        self.misses += 1
+        self.put(document_id, doc)
+
+    def put(self, document_id, doc):
+        """Add ```doc``` to the cache replacing any previously cached
+        revision of ```document_id```. Documents larger than ```max_bytes```
+        aren't cached.
+        """
+        self.remove(document_id)
+
+        doc_as_json = json.dumps(doc)
+        if self.max_bytes < len(doc_as_json) or self.max_docs < 1:
+            return
+
+        while self._entries and (self.max_docs <= len(self._entries) or
+                                 self.max_bytes < self._num_bytes + len(doc_as_json)):
+            (_, evicted_doc_as_json) = self._entries.popitem(last=False)
+            self._num_bytes -= len(evicted_doc_as_json)
+            self.evictions += 1
+
+        self._entries[document_id] = doc_as_json
+        self._num_bytes += len(doc_as_json)
+
+    def remove(self, document_id):
+        doc_as_json = self._entries.pop(document_id, None)
+        if doc_as_json is not None:
+            self._num_bytes -= len(doc_as_json)
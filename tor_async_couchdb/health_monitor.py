@@ -0,0 +1,172 @@
+"""This module contains a health monitor which probes CouchDB on a
+background IOLoop timer so that high frequency ```/_health``` requests
+(ex from load balancers) can be answered from cached results rather
+than each request generating a request to CouchDB.
+"""
+
+import collections
+import datetime
+import functools
+import logging
+import math
+import time
+
+from async_model_actions import AsyncCouchDBHealthCheck
+from async_model_actions import get_default_db
+from circuit_breaker import CircuitBreaker
+from periodic_refresher import PeriodicRefresher
+
+_logger = logging.getLogger(__name__)
+
+
+class HealthMonitor(object):
+    """```HealthMonitor``` probes CouchDB with ```AsyncCouchDBHealthCheck```
+    every ```probe_interval_in_ms``` milliseconds (measured from the end
+    of the previous probe) and remembers the outcome and latency of the
+    most recent ```window_size``` probes.
+
+    ```status``` is derived from the rolling window so a single slow or
+    failed probe doesn't flap the reported health:
+
+        -- ```STATUS_RED``` if nothing has been probed yet, if the
+           success rate is below ```min_success_rate``` or if the
+           database's circuit breaker is open
+        -- ```STATUS_YELLOW``` (degraded) if any probe in the window
+           failed, if the ```latency_slo_percentile``` latency of
+           successful probes exceeds ```latency_slo_in_ms``` or if the
+           database's circuit breaker is half-open
+        -- ```STATUS_GREEN``` otherwise
+    """
+
+    STATUS_GREEN = "green"
+    STATUS_YELLOW = "yellow"
+    STATUS_RED = "red"
+
+    def __init__(self,
+                 probe_interval_in_ms=5 * 1000,
+                 window_size=60,
+                 min_success_rate=0.8,
+                 latency_slo_in_ms=250,
+                 latency_slo_percentile=90,
+                 db=None):
+        object.__init__(self)
+
+        assert 0 < window_size
+
+        self.window_size = window_size
+        self.min_success_rate = min_success_rate
+        self.latency_slo_in_ms = latency_slo_in_ms
+        self.latency_slo_percentile = latency_slo_percentile
+        self.db = db if db is not None else get_default_db()
+
+        self.last_probe_at = None
+        self.last_probe_ok = None
+
+        self._probes = collections.deque(maxlen=window_size)
+        self._refresher = PeriodicRefresher(self._probe, probe_interval_in_ms)
+
+    @property
+    def probe_interval_in_ms(self):
+        return self._refresher.refresh_interval_in_ms
+
+    @property
+    def num_probes(self):
+        return len(self._probes)
+
+    @property
+    def success_rate(self):
+        """Fraction of probes in the window which succeeded or ```None```
+        if nothing has been probed yet.
+        """
+        if not self._probes:
+            return None
+        return sum(1 for (is_ok, _) in self._probes if is_ok) / float(len(self._probes))
+
+    def latency_percentile(self, percentile):
+        """Returns the ```percentile``` (0 - 100) latency in milliseconds
+        of successful probes in the window or ```None``` if there have
+        been no successful probes.
+        """
+        latencies = sorted(latency_in_ms for (is_ok, latency_in_ms) in self._probes if is_ok)
+        if not latencies:
+            return None
+        rank = max(1, int(math.ceil(len(latencies) * percentile / 100.0)))
+        return latencies[rank - 1]
+
+    @property
+    def circuit_breaker_state(self):
+        """The state of the database's circuit breaker or ```None```
+        if the database doesn't have a circuit breaker.
+        """
+        circuit_breaker = self.db.circuit_breaker
+        return circuit_breaker.state if circuit_breaker is not None else None
+
+    @property
+    def status(self):
+        circuit_breaker_state = self.circuit_breaker_state
+
+        success_rate = self.success_rate
+        if success_rate is None or success_rate < self.min_success_rate:
+            return type(self).STATUS_RED
+
+        if circuit_breaker_state == CircuitBreaker.STATE_OPEN:
+            return type(self).STATUS_RED
+
+        if success_rate < 1.0:
+            return type(self).STATUS_YELLOW
+
+        if circuit_breaker_state == CircuitBreaker.STATE_HALF_OPEN:
+            return type(self).STATUS_YELLOW
+
+        if self.latency_slo_in_ms < self.latency_percentile(self.latency_slo_percentile):
+            return type(self).STATUS_YELLOW
+
+        return type(self).STATUS_GREEN
+
+    def snapshot(self):
+        """Returns a JSON serializable summary of CouchDB's health
+        which is intended to be returned by a ```/_health``` endpoint.
+        """
+        return {
+            "status": self.status,
+            "num_probes": self.num_probes,
+            "success_rate": self.success_rate,
+            "latency_in_ms": {
+                "p50": self.latency_percentile(50),
+                "p90": self.latency_percentile(90),
+                "p99": self.latency_percentile(99),
+            },
+            "latency_slo_in_ms": self.latency_slo_in_ms,
+            "circuit_breaker": self.circuit_breaker_state,
+            "last_probe_ok": self.last_probe_ok,
+            "last_probe_at": self.last_probe_at.isoformat() + "+00:00" if self.last_probe_at else None,
+        }
+
+    def start(self):
+        self._refresher.start()
+
+    def stop(self):
+        self._refresher.stop()
+
+    def probe(self, callback=None):
+        """Probe CouchDB. Once the probe is done ```callback``` (if supplied)
+        is called with is_ok and this monitor. Probes requested while a probe
+        is in progress are collapsed into the in-progress probe.
+        """
+        self._refresher.refresh(callback)
+
+    def _probe(self, done):
+        acdbhc = AsyncCouchDBHealthCheck(db=self.db)
+        acdbhc.check(functools.partial(self._on_acdbhc_check_done, done, time.time()))
+
+    def _on_acdbhc_check_done(self, done, probe_started_at, is_ok, acdbhc):
+        latency_in_ms = (time.time() - probe_started_at) * 1000
+
+        self._probes.append((is_ok, latency_in_ms))
+        self.last_probe_ok = is_ok
+        self.last_probe_at = datetime.datetime.utcnow()
+
+        if not is_ok:
+            _logger.warning("health probe of database '%s' failed", self.db.url)
+
+        done(is_ok, self)
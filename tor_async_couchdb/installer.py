@@ -56,7 +56,8 @@ def _create_design_docs(database,
                         host,
                         session,
                         verify_host_ssl_cert,
-                        design_docs_folder):
+                        design_docs_folder,
+                        update_design_docs=False):
     #
     # iterate thru each file in the design doc module's directory
     # for files that end with ".py" - these files are assumed to be
@@ -74,23 +75,45 @@ def _create_design_docs(database,
         design_doc_name = os.path.basename(design_doc_filename)[:-len(".json")]
         url = "%s/%s/_design/%s" % (host, database, design_doc_name)
 
-        response = session.head(url, verify=verify_host_ssl_cert)
-        if response.status_code == httplib.OK:
-            _logger.info(
-                "Design doc '%s' already exist in database '%s' on '%s'",
-                design_doc_name, database, host)
-            continue
-
-        _logger.info(
-            "Creating design doc '%s' in database '%s' on '%s' from file '%s'",
-            design_doc_name,
-            database,
-            host,
-            design_doc_filename)
-
         with open(design_doc_filename, "r") as design_doc_file:
             design_doc = design_doc_file.read()
 
+        response = session.get(url, verify=verify_host_ssl_cert)
+        if response.status_code == httplib.OK:
+            #
+            # design docs carry update handlers as well as views so
+            # when update_design_docs is set an existing design doc
+            # which differs from the design doc file is replaced -
+            # otherwise changes to update handlers would never reach
+            # an existing database
+            #
+            existing_design_doc = response.json()
+            _rev = existing_design_doc.pop("_rev")
+            existing_design_doc.pop("_id", None)
+            new_design_doc = json.loads(design_doc)
+            if not update_design_docs or existing_design_doc == new_design_doc:
+                _logger.info(
+                    "Design doc '%s' already exist in database '%s' on '%s'",
+                    design_doc_name, database, host)
+                continue
+
+            _logger.info(
+                "Updating design doc '%s' in database '%s' on '%s' from file '%s'",
+                design_doc_name,
+                database,
+                host,
+                design_doc_filename)
+
+            new_design_doc["_rev"] = _rev
+            design_doc = json.dumps(new_design_doc)
+        else:
+            _logger.info(
+                "Creating design doc '%s' in database '%s' on '%s' from file '%s'",
+                design_doc_name,
+                database,
+                host,
+                design_doc_filename)
+
         response = session.put(
             url,
             data=design_doc,
@@ -282,6 +305,16 @@ class CommandLineParser(optparse.OptionParser):
             type="boolean",
             help=help)
 
+        default = False
+        help = "update existing design docs which differ from design doc files - default = %s" % default
+        self.add_option(
+            "--updatedesign",
+            action="store",
+            dest="update_design_docs",
+            default=default,
+            type="boolean",
+            help=help)
+
         default = True
         help = "create seed docs - default = %s" % default
         self.add_option(
@@ -359,7 +392,8 @@ def main(clp, design_docs_module=None, seeds_docs_module=None):
             clo.host,
             session,
             clo.verify_host_ssl_cert,
-            design_docs_module)
+            design_docs_module,
+            clo.update_design_docs)
         if not is_ok:
             return 1
 
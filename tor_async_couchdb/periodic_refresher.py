@@ -0,0 +1,83 @@
+"""This module contains a periodic refresher which is used to refresh
+cached results (ex database metrics or health probes) on a background
+IOLoop timer so that requests can be served from the cached results.
+"""
+
+import datetime
+
+import tornado.ioloop
+
+
+class PeriodicRefresher(object):
+    """```PeriodicRefresher``` calls ```refresh``` when ```start()``` is
+    called and then every ```refresh_interval_in_ms``` milliseconds
+    (measured from the end of the previous refresh) until ```stop()``` is
+    called. ```refresh()``` can be called at any time and refreshes which
+    are requested while a refresh is in progress are collapsed into the
+    in-progress refresh.
+
+    ```refresh``` is called with a single argument - a function which
+    ```refresh``` must call (with any arguments) once the refresh is done.
+    The callbacks passed to ```refresh()``` are then called with the same
+    arguments.
+    """
+
+    def __init__(self, refresh, refresh_interval_in_ms):
+        object.__init__(self)
+
+        self.refresh_function = refresh
+        self.refresh_interval_in_ms = refresh_interval_in_ms
+
+        self._is_started = False
+        self._timeout = None
+        self._refresh_callbacks = None
+
+    @property
+    def is_started(self):
+        return self._is_started
+
+    def start(self):
+        assert not self._is_started
+        self._is_started = True
+        self.refresh()
+
+    def stop(self):
+        self._is_started = False
+        if self._timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._timeout)
+            self._timeout = None
+
+    def refresh(self, callback=None):
+        """Start a refresh unless a refresh is already in progress. Once
+        the refresh is done ```callback``` (if supplied) is called with
+        the arguments ```refresh``` passed to its done function.
+        """
+        if self._refresh_callbacks is not None:
+            # a refresh is already in progress
+            if callback:
+                self._refresh_callbacks.append(callback)
+            return
+
+        self._refresh_callbacks = [callback] if callback else []
+
+        if self._timeout is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(self._timeout)
+            self._timeout = None
+
+        self.refresh_function(self._on_refresh_done)
+
+    def _on_refresh_done(self, *args):
+        callbacks = self._refresh_callbacks
+        self._refresh_callbacks = None
+
+        if self._is_started:
+            self._timeout = tornado.ioloop.IOLoop.current().add_timeout(
+                datetime.timedelta(0, self.refresh_interval_in_ms / 1000.0, 0),
+                self._on_timeout)
+
+        for callback in callbacks:
+            callback(*args)
+
+    def _on_timeout(self):
+        self._timeout = None
+        self.refresh()
@@ -0,0 +1,120 @@
+"""This module contains request priorities and a scheduler which
+```CouchDBAsyncHTTPClient``` uses to keep background traffic (metrics
+collection, compaction, change processing, batch jobs) from adding
+latency to interactive (user facing) traffic.
+"""
+
+import collections
+import functools
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+priorities = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+
+class QueueDrainer(object):
+    """```QueueDrainer``` starts the queued requests of a ```PriorityScheduler```
+    lane or an ```AdaptiveConcurrencyLimiter```. A started request can complete
+    (ex fail fast) and give back its permission before its callback returns.
+    Rather than recursing (and growing the call stack with the size of the
+    queue) such nested calls to ```drain()``` leave the draining to the
+    outermost call's loop.
+    """
+
+    def __init__(self):
+        object.__init__(self)
+
+        self._is_draining = False
+
+    def drain(self, start_next):
+        """Call the callbacks returned by ```start_next``` until it returns
+        ```None```. ```start_next``` is called without arguments and takes the
+        permission for the callback it returns.
+        """
+        if self._is_draining:
+            return
+
+        self._is_draining = True
+        try:
+            while True:
+                callback = start_next()
+                if callback is None:
+                    break
+                callback()
+        finally:
+            self._is_draining = False
+
+
+class PriorityScheduler(object):
+    """```PriorityScheduler``` gives each priority (lane) its own concurrency
+    budget - ```max_concurrency_by_priority``` maps each priority to the
+    maximum number of requests of that priority which can be in flight at
+    once. Requests in excess of their lane's budget wait in the lane's FIFO
+    queue.
+
+    Since background requests can only ever occupy their own lane's budget,
+    sizing the database's ```max_clients``` to at least the sum of the
+    budgets means interactive requests are never queued in the async HTTP
+    client behind background requests.
+    """
+
+    default_max_concurrency_by_priority = {
+        PRIORITY_INTERACTIVE: 8,
+        PRIORITY_BACKGROUND: 2,
+    }
+
+    def __init__(self, max_concurrency_by_priority=None):
+        object.__init__(self)
+
+        if max_concurrency_by_priority is None:
+            max_concurrency_by_priority = self.default_max_concurrency_by_priority
+        for priority in priorities:
+            assert 0 < max_concurrency_by_priority[priority]
+
+        self.max_concurrency_by_priority = dict(max_concurrency_by_priority)
+
+        self.num_in_flight_by_priority = {priority: 0 for priority in priorities}
+
+        self._queues_by_priority = {priority: collections.deque() for priority in priorities}
+        self._queue_drainers_by_priority = {priority: QueueDrainer() for priority in priorities}
+
+    def queue_size(self, priority):
+        return len(self._queues_by_priority[priority])
+
+    def acquire(self, priority, callback):
+        """Request permission to send a request of ```priority``` to CouchDB.
+        ```callback``` is called (without arguments) once the request can be
+        sent - which might be immediately. Each call to ```callback``` must be
+        followed by a call to ```release()``` with the same priority.
+        """
+        queue = self._queues_by_priority[priority]
+        if not queue and self.num_in_flight_by_priority[priority] < self.max_concurrency_by_priority[priority]:
+            self.num_in_flight_by_priority[priority] += 1
+            callback()
+            return
+        queue.append(callback)
+
+    def cancel(self, priority, callback):
+        """Stop ```callback``` (previously passed to ```acquire()``` with
+        ```priority```) waiting in its lane's queue. Returns ```False``` if
+        ```callback``` isn't queued (ex it's already been called).
+        """
+        try:
+            self._queues_by_priority[priority].remove(callback)
+        except ValueError:
+            return False
+        return True
+
+    def release(self, priority):
+        assert 0 < self.num_in_flight_by_priority[priority]
+        self.num_in_flight_by_priority[priority] -= 1
+
+        self._queue_drainers_by_priority[priority].drain(functools.partial(self._start_next, priority))
+
+    def _start_next(self, priority):
+        queue = self._queues_by_priority[priority]
+        if not queue or self.max_concurrency_by_priority[priority] <= self.num_in_flight_by_priority[priority]:
+            return None
+        self.num_in_flight_by_priority[priority] += 1
+        return queue.popleft()
@@ -0,0 +1,191 @@
+"""This module contains an in-process registry of CouchDB request
+latency histograms. ```CouchDBAsyncHTTPClient``` records the response
+time of every request it issues (and the phase timings in the response's
+```time_info``` when the cURL async HTTP client is used) so percentiles
+can be read with ```RequestMetrics.snapshot()``` rather than by parsing
+the client's log.
+"""
+
+import math
+
+
+def _format_percentile(percentile):
+    return "p%s" % ("%g" % percentile)
+
+
+def status_class(code):
+    """Returns the status class (ex "2xx") of the HTTP response code
+    ```code```. Tornado reports connection failures and timeouts with
+    a response code of 599 which is reported as "error".
+    """
+    if not code or code == 599:
+        return "error"
+    return "%dxx" % (code // 100)
+
+
+class LatencyHistogram(object):
+    """```LatencyHistogram``` is a log-bucketed histogram of latencies
+    in milliseconds. Each bucket is ```growth``` times wider than the
+    previous bucket which means percentiles are reported with a bounded
+    relative error (about 4.5% with the default ```growth```) while
+    the histogram only needs a few dozen buckets to cover everything
+    from microseconds to minutes. Memory use doesn't depend on the
+    number of latencies recorded.
+    """
+
+    def __init__(self, min_value_in_ms=0.01, growth=2 ** 0.125):
+        object.__init__(self)
+
+        self.min_value_in_ms = min_value_in_ms
+        self.growth = growth
+
+        self.count = 0
+        self.sum_in_ms = 0.0
+        self.min_in_ms = None
+        self.max_in_ms = None
+
+        self._log_growth = math.log(growth)
+        self._counts_by_bucket = {}
+
+    def record(self, value_in_ms):
+        bucket = self._bucket(value_in_ms)
+        self._counts_by_bucket[bucket] = self._counts_by_bucket.get(bucket, 0) + 1
+
+        self.count += 1
+        self.sum_in_ms += value_in_ms
+        if self.min_in_ms is None or value_in_ms < self.min_in_ms:
+            self.min_in_ms = value_in_ms
+        if self.max_in_ms is None or self.max_in_ms < value_in_ms:
+            self.max_in_ms = value_in_ms
+
+    def percentile(self, percentile):
+        """Returns an estimate of the ```percentile``` (0 - 100)
+        latency or ```None``` if no latencies have been recorded.
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, int(math.ceil(self.count * percentile / 100.0)))
+        if self.count <= rank:
+            return self.max_in_ms
+
+        num_seen = 0
+        for bucket in sorted(self._counts_by_bucket):
+            num_seen += self._counts_by_bucket[bucket]
+            if rank <= num_seen:
+                value_in_ms = self._bucket_midpoint(bucket)
+                return min(max(value_in_ms, self.min_in_ms), self.max_in_ms)
+
+        return self.max_in_ms
+
+    def _bucket(self, value_in_ms):
+        if value_in_ms <= self.min_value_in_ms:
+            return 0
+        return int(math.ceil(math.log(value_in_ms / self.min_value_in_ms) / self._log_growth))
+
+    def _bucket_midpoint(self, bucket):
+        # bucket N covers (min * growth ** (N - 1), min * growth ** N]
+        # and the geometric midpoint minimizes the relative error
+        return self.min_value_in_ms * (self.growth ** (bucket - 0.5))
+
+    def snapshot(self, percentiles):
+        rv = {
+            "count": self.count,
+            "sum_in_ms": self.sum_in_ms,
+            "min_in_ms": self.min_in_ms,
+            "max_in_ms": self.max_in_ms,
+        }
+        for percentile in percentiles:
+            rv[_format_percentile(percentile)] = self.percentile(percentile)
+        return rv
+
+
+class RequestMetrics(object):
+    """```RequestMetrics``` maintains a ```LatencyHistogram``` of response
+    times for each combination of operation (ex "by_id", "view" or "persist"),
+    HTTP method and status class (ex "2xx"). Alongside each response time
+    histogram there's a histogram for each of the cURL ```time_info```
+    phases (queue, namelookup, connect, pretransfer, starttransfer, total
+    and redirect) that was reported by the async HTTP client.
+
+    ```counters``` is a dictionary of event counts keyed by event name.
+    ```CouchDBAsyncHTTPClient``` counts "conflicts", "errors",
+    "circuit_breaker_rejections", "load_shed", "deadline_exceeded",
+    "transient_retries" and "transient_retries_exhausted" while
+    a ```RetryStrategy``` given a ```RequestMetrics``` counts "retries",
+    "retries_exhausted", "retries_abandoned" and "retries_rejected".
+    """
+
+    phases = (
+        "queue",
+        "namelookup",
+        "connect",
+        "pretransfer",
+        "starttransfer",
+        "total",
+        "redirect",
+    )
+
+    default_percentiles = (50, 90, 99, 99.9)
+
+    def __init__(self):
+        object.__init__(self)
+
+        self.counters = {}
+
+        self._histograms_by_key = {}
+
+    def increment(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def record(self, operation, method, code, request_time_in_ms, time_info_in_ms=None):
+        key = (operation, method, status_class(code))
+        histograms = self._histograms_by_key.get(key)
+        if histograms is None:
+            histograms = {"request_time": LatencyHistogram()}
+            self._histograms_by_key[key] = histograms
+
+        histograms["request_time"].record(request_time_in_ms)
+
+        for phase in self.phases:
+            value_in_ms = (time_info_in_ms or {}).get(phase)
+            if value_in_ms is None:
+                continue
+            histogram = histograms.get(phase)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                histograms[phase] = histogram
+            histogram.record(value_in_ms)
+
+    def snapshot(self, percentiles=None):
+        """Returns a list of dictionaries - one for each combination of
+        operation, HTTP method and status class that's been recorded. Each
+        dictionary contains the request count, sum, min, max and requested
+        percentiles of the response times as well as the same summary for
+        each ```time_info``` phase. The snapshot is JSON serializable and
+        is intended to be returned directly by something like a
+        ```/_metrics``` request handler.
+        """
+        if percentiles is None:
+            percentiles = self.default_percentiles
+
+        rv = []
+        for key in sorted(self._histograms_by_key):
+            (operation, method, the_status_class) = key
+            histograms = self._histograms_by_key[key]
+            series = {
+                "operation": operation,
+                "method": method,
+                "status_class": the_status_class,
+                "request_time": histograms["request_time"].snapshot(percentiles),
+                "phases": {},
+            }
+            for phase in self.phases:
+                if phase in histograms:
+                    series["phases"][phase] = histograms[phase].snapshot(percentiles)
+            rv.append(series)
+        return rv
+
+    def reset(self):
+        self.counters = {}
+        self._histograms_by_key = {}
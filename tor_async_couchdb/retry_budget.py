@@ -0,0 +1,75 @@
+"""This module contains a retry budget which is shared by ```RetryStrategy```
+instances to stop contention on a hot document (or an unhealthy CouchDB)
+from turning into a retry storm which multiplies the load on CouchDB.
+"""
+
+import time
+
+
+class RetryBudget(object):
+    """```RetryBudget``` is a token bucket. Each retry withdraws a token
+    and retries are rejected while the bucket is empty. Tokens are
+    deposited in two ways:
+
+        -- each first attempt (ie each new ```RetryStrategy```) deposits
+           ```retry_ratio``` tokens so that, in steady state, retries are
+           limited to ```retry_ratio``` of first attempts
+        -- ```min_retries_per_second``` tokens are deposited each second
+           so that retries are always possible at a low rate even when
+           there are few first attempts
+
+    The bucket holds at most ```max_num_tokens``` tokens (which is also
+    the number of tokens the bucket starts with) and so bounds the size
+    of a burst of retries.
+    """
+
+    def __init__(self,
+                 retry_ratio=0.2,
+                 min_retries_per_second=10,
+                 max_num_tokens=100):
+        object.__init__(self)
+
+        assert 0 <= retry_ratio
+        assert 0 <= min_retries_per_second
+        assert 1 <= max_num_tokens
+
+        self.retry_ratio = retry_ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_num_tokens = max_num_tokens
+
+        self.num_withdrawn = 0
+        self.num_rejected = 0
+
+        self._num_tokens = float(max_num_tokens)
+        self._refilled_at = time.time()
+
+    @property
+    def num_tokens(self):
+        self._refill()
+        return self._num_tokens
+
+    def deposit(self):
+        """Called for each first attempt."""
+        self._refill()
+        self._num_tokens = min(self.max_num_tokens, self._num_tokens + self.retry_ratio)
+
+    def withdraw(self):
+        """Called before each retry. Returns ```True``` if the retry
+        can proceed and ```False``` if the retry was rejected because
+        the budget is exhausted.
+        """
+        self._refill()
+        if self._num_tokens < 1:
+            self.num_rejected += 1
+            return False
+        self._num_tokens -= 1
+        self.num_withdrawn += 1
+        return True
+
+    def _refill(self):
+        now = time.time()
+        elapsed_in_seconds = max(0, now - self._refilled_at)
+        self._refilled_at = now
+        self._num_tokens = min(
+            self.max_num_tokens,
+            self._num_tokens + elapsed_in_seconds * self.min_retries_per_second)
@@ -5,6 +5,7 @@ conflict responses.
 
 import datetime
 import random
+import time
 
 from tornado.ioloop import IOLoop
 
@@ -29,21 +30,93 @@ class RetryStrategy(object):
     Retry strategies are represented using a strategy pattern
     and ```RetryStrategy``` is the abstract base class for all
     concrete strategy classes.
+
+    If ```request_metrics``` (a ```RequestMetrics```) is supplied
+    each retry is counted in the "retries" counter and each time
+    a retry strategy gives up the "retries_exhausted" counter is
+    incremented.
+
+    If ```deadline``` isn't ```None``` it's the time (as returned by
+    ```time.time()```) by which the update|delete/persist/retry loop
+    must be done. Retries which couldn't start before the deadline are
+    abandoned and counted in the "retries_abandoned" counter.
+
+    If ```retry_budget``` (a ```retry_budget.RetryBudget```) isn't ```None```
+    each retry strategy deposits into the budget when it's created (since
+    a retry strategy is created for each first attempt) and withdraws from
+    the budget before each retry. Retries rejected because the budget is
+    exhausted fail fast and are counted in the "retries_rejected" counter.
+    Long-lived loops which make many first attempts (ex following a
+    ```_changes``` feed) reuse a single retry strategy and ```reset()``` it
+    rather than depositing into the budget each time an attempt succeeds.
+    To share a single budget across the process set ```RetryStrategy.retry_budget```.
+
+        RetryStrategy.retry_budget = RetryBudget()
     """
 
-    def __init__(self, max_num_retries=20):
+    retry_budget = None
+
+    def __init__(self, max_num_retries=20, request_metrics=None, deadline=None, retry_budget=None):
         object.__init__(self)
 
         self.num_retries = 0
         self.max_num_retries = max_num_retries
+        self.request_metrics = request_metrics
+        self.deadline = deadline
+        if retry_budget is not None:
+            self.retry_budget = retry_budget
+
+        if self.retry_budget is not None:
+            self.retry_budget.deposit()
+
+    def reset(self):
+        """Forget the retries made so far so the retry strategy can be
+        reused by a long-lived loop (ex following a ```_changes``` feed)
+        once an attempt succeeds. Unlike creating a new retry strategy
+        resetting doesn't deposit into the retry budget.
+        """
+        self.num_retries = 0
 
-    def next_attempt(self):
+    def next_attempt(self, delay_in_ms=0):
+        """Returns ```True``` if another attempt should be made after
+        waiting ```delay_in_ms``` milliseconds.
+        """
         self.num_retries += 1
-        return self.num_retries < self.max_num_retries
+        if self.max_num_retries <= self.num_retries:
+            counter = "retries_exhausted"
+        elif self.deadline is not None and self.deadline <= time.time() + delay_in_ms / 1000.0:
+            counter = "retries_abandoned"
+        elif self.retry_budget is not None and not self.retry_budget.withdraw():
+            counter = "retries_rejected"
+        else:
+            counter = "retries"
+        if self.request_metrics is not None:
+            self.request_metrics.increment(counter)
+        return counter == "retries"
 
     def wait(self, callback, *callback_args, **callback_kwargs):
         raise NotImplementedError("must implement 'wait()' in subclass")
 
+    def _wait(self, delay_in_ms, callback, *callback_args, **callback_kwargs):
+        """Called by ```wait()``` in subclasses to call ```callback```
+        after ```delay_in_ms``` milliseconds - or immediately with a
+        ```delay_in_ms``` of 0 if another attempt shouldn't be made.
+        Returns ```delay_in_ms``` or ```None``` if another attempt
+        shouldn't be made.
+        """
+        if not self.next_attempt(delay_in_ms):
+            callback(0, *callback_args, **callback_kwargs)
+            return
+
+        IOLoop.current().add_timeout(
+            datetime.timedelta(0, delay_in_ms / 1000.0, 0),
+            callback,
+            delay_in_ms,
+            *callback_args,
+            **callback_kwargs)
+
+        return delay_in_ms
+
 
 class ExponentialBackoffRetryStrategy(RetryStrategy):
     """```ExponentialBackoffRetryStrategy``` implements a retry strategy
@@ -66,17 +139,129 @@ class ExponentialBackoffRetryStrategy(RetryStrategy):
 
     def wait(self, callback, *callback_args, **callback_kwargs):
 
-        if not self.next_attempt():
-            callback(0, *callback_args, **callback_kwargs)
-            return
+        delay_in_ms = (2 ** (self.num_retries + 1)) * 25 + random.randint(-10, 10)
+        return self._wait(delay_in_ms, callback, *callback_args, **callback_kwargs)
 
-        delay_in_ms = (2 ** self.num_retries) * 25 + random.randint(-10, 10)
 
-        IOLoop.current().add_timeout(
-            datetime.timedelta(0, delay_in_ms / 1000.0, 0),
-            callback,
-            delay_in_ms,
-            *callback_args,
-            **callback_kwargs)
+class FullJitterRetryStrategy(RetryStrategy):
+    """```FullJitterRetryStrategy``` implements exponential backoff with
+    "full jitter" - the time waited is a random number of milliseconds
+    between 1 and:
 
-        return delay_in_ms
+        min(max_delay_in_ms, base_delay_in_ms * 2 ** retry_number)
+
+    Since the wait is spread across the entire backoff window, writers
+    which conflicted with each other are unlikely to retry in lockstep
+    (and conflict again) the way they do with ```ExponentialBackoffRetryStrategy```'s
+    small jitter.
+
+    References
+
+        * https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+    """
+
+    def __init__(self,
+                 max_num_retries=20,
+                 request_metrics=None,
+                 deadline=None,
+                 retry_budget=None,
+                 base_delay_in_ms=25,
+                 max_delay_in_ms=10 * 1000):
+        RetryStrategy.__init__(self, max_num_retries, request_metrics, deadline, retry_budget)
+
+        self.base_delay_in_ms = base_delay_in_ms
+        self.max_delay_in_ms = max_delay_in_ms
+
+    def _base_delay_in_ms(self):
+        return self.base_delay_in_ms
+
+    def wait(self, callback, *callback_args, **callback_kwargs):
+        backoff_in_ms = min(self.max_delay_in_ms, self._base_delay_in_ms() * (2 ** (self.num_retries + 1)))
+        delay_in_ms = random.randint(1, max(1, int(backoff_in_ms)))
+        return self._wait(delay_in_ms, callback, *callback_args, **callback_kwargs)
+
+
+class DecorrelatedJitterRetryStrategy(RetryStrategy):
+    """```DecorrelatedJitterRetryStrategy``` implements "decorrelated jitter"
+    backoff - the time waited is a random number of milliseconds between
+    ```base_delay_in_ms``` and 3 times the previous wait (capped at
+    ```max_delay_in_ms```). Waits grow roughly exponentially but each
+    wait depends on the previous random wait rather than on the retry
+    number which decorrelates contending writers.
+
+    References
+
+        * https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+    """
+
+    def __init__(self,
+                 max_num_retries=20,
+                 request_metrics=None,
+                 deadline=None,
+                 retry_budget=None,
+                 base_delay_in_ms=25,
+                 max_delay_in_ms=10 * 1000):
+        RetryStrategy.__init__(self, max_num_retries, request_metrics, deadline, retry_budget)
+
+        self.base_delay_in_ms = base_delay_in_ms
+        self.max_delay_in_ms = max_delay_in_ms
+
+        self._previous_delay_in_ms = base_delay_in_ms
+
+    def reset(self):
+        RetryStrategy.reset(self)
+        self._previous_delay_in_ms = self.base_delay_in_ms
+
+    def wait(self, callback, *callback_args, **callback_kwargs):
+        delay_in_ms = random.randint(
+            max(1, int(self.base_delay_in_ms)),
+            max(1, int(self.base_delay_in_ms), int(self._previous_delay_in_ms * 3)))
+        delay_in_ms = min(self.max_delay_in_ms, delay_in_ms)
+        self._previous_delay_in_ms = delay_in_ms
+        return self._wait(delay_in_ms, callback, *callback_args, **callback_kwargs)
+
+
+class AdaptiveRetryStrategy(FullJitterRetryStrategy):
+    """```AdaptiveRetryStrategy``` is a ```FullJitterRetryStrategy``` whose
+    base delay adapts to the contention observed by ```contention_monitor```
+    (a ```contention_monitor.ContentionMonitor``` - typically the
+    ```contention_monitor``` of the ```CouchDBDatabase``` being written).
+
+    The base delay is the larger of ```base_delay_in_ms``` and the recent
+    document write latency divided by the fraction of recent document writes
+    which didn't conflict (```max_conflict_rate``` bounds the conflict rate
+    used). When CouchDB is slow, or writers are frequently conflicting, retries
+    are spread over a longer window which reduces the chance that they
+    conflict again. When there's little contention the strategy behaves
+    like a ```FullJitterRetryStrategy```.
+    """
+
+    def __init__(self,
+                 max_num_retries=20,
+                 request_metrics=None,
+                 deadline=None,
+                 retry_budget=None,
+                 base_delay_in_ms=25,
+                 max_delay_in_ms=10 * 1000,
+                 contention_monitor=None,
+                 max_conflict_rate=0.9):
+        FullJitterRetryStrategy.__init__(
+            self,
+            max_num_retries,
+            request_metrics,
+            deadline,
+            retry_budget,
+            base_delay_in_ms,
+            max_delay_in_ms)
+
+        assert 0 <= max_conflict_rate < 1
+
+        self.contention_monitor = contention_monitor
+        self.max_conflict_rate = max_conflict_rate
+
+    def _base_delay_in_ms(self):
+        if self.contention_monitor is None or self.contention_monitor.latency_in_ms is None:
+            return self.base_delay_in_ms
+
+        conflict_rate = min(self.max_conflict_rate, self.contention_monitor.conflict_rate)
+        return max(self.base_delay_in_ms, self.contention_monitor.latency_in_ms / (1.0 - conflict_rate))
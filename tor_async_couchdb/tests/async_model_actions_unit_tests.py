@@ -3,25 +3,57 @@ the async_model_actions.py module.
 """
 
 import httplib
+import json
+import time
 import unittest
+import urlparse
 import uuid
 
 import mock
+import tornado.gen
+import tornado.ioloop
 
+from ..async_model_actions import AllDocsDocumentLoader
+from ..async_model_actions import AsyncAction
 from ..async_model_actions import AsyncAllViewMetricsRetriever
+from ..async_model_actions import AsyncChangesFollower
+from ..async_model_actions import AsyncCompactor
 from ..async_model_actions import AsyncDeleter
+from ..async_model_actions import AsyncDocumentUpdater
 from ..async_model_actions import AsyncModelRetriever
+from ..async_model_actions import AsyncModelRetrieverByDocumentID
+from ..async_model_actions import AsyncModelsPageRetriever
 from ..async_model_actions import AsyncModelsRetriever
+from ..async_model_actions import AsyncModelUpdater
+from ..async_model_actions import AsyncMultiKeyModelsRetriever
 from ..async_model_actions import AsyncPersister
 from ..async_model_actions import AsyncCouchDBHealthCheck
 from ..async_model_actions import AsyncDatabaseMetricsRetriever
 from ..async_model_actions import AsyncViewMetricsRetriever
 from ..async_model_actions import BaseAsyncModelRetriever
+from ..async_model_actions import BulkDocsWriteCoalescer
 from ..async_model_actions import CouchDBAsyncHTTPClient
+from ..async_model_actions import CouchDBAsyncHTTPRequest
+from ..async_model_actions import CouchDBDatabase
 from ..async_model_actions import DatabaseMetrics
+from ..async_model_actions import InvalidPageCursorException
 from ..async_model_actions import InvalidTypeInDocForStoreException
 from ..async_model_actions import ViewMetrics
+from ..async_model_actions import _ViewRowsStreamParser
+from ..async_model_actions import _operation
+from ..circuit_breaker import CircuitBreaker
+from ..concurrency_limiter import AdaptiveConcurrencyLimiter
+from ..contention_monitor import ContentionMonitor
+from ..document_cache import DocumentCache
 from ..model import Model
+from ..priority_scheduler import PRIORITY_BACKGROUND
+from ..priority_scheduler import PRIORITY_INTERACTIVE
+from ..priority_scheduler import PriorityScheduler
+from ..request_metrics import RequestMetrics
+from ..retry_budget import RetryBudget
+from ..retry_strategy import ExponentialBackoffRetryStrategy
+from ..retry_strategy import RetryStrategy
+from ..transient_retry_policy import TransientRetryPolicy
 from .. import async_model_actions  # noqa, needed for patching using relative path
 
 
@@ -43,9 +75,10 @@ class MyModelWithBadType(Model):
 
 class CouchDBAsyncHTTPClientPatcher(object):
 
-    def __init__(self, is_ok, is_conflict, models, _id, _rev):
+    def __init__(self, is_ok, is_conflict, models, _id, _rev, fetch_failure_detail=None):
 
         def fetch_patch(cac, request, callback):
+            cac.fetch_failure_detail = fetch_failure_detail
             callback(is_ok, is_conflict, models, _id, _rev, cac)
 
         self._patcher = mock.patch(
@@ -60,6 +93,214 @@ class CouchDBAsyncHTTPClientPatcher(object):
         self._patcher.stop()
 
 
+def _create_mock_response(request, code=httplib.OK, body=None, request_time=0.01, time_info=None):
+    """Create a mock of the response tornado's async HTTP client passes
+    to the callback of its ```fetch()``` - ```body``` is JSON encoded.
+    """
+    response = mock.Mock()
+    response.code = code
+    response.error = None
+    response.body = json.dumps(body if body is not None else {})
+    response.headers = {}
+    response.time_info = time_info if time_info is not None else {}
+    response.effective_url = request.url
+    response.request_time = request_time
+    response.request = request
+    return response
+
+
+class CouchDBDatabaseTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBDatabase class."""
+
+    def test_ctr_defaults(self):
+        the_url = "http://127.0.0.1:5984/%s" % uuid.uuid4().hex
+
+        db = CouchDBDatabase(the_url)
+
+        self.assertEqual(db.url, the_url)
+        self.assertIsNone(db.tampering_signer)
+        self.assertIsNone(db.username)
+        self.assertIsNone(db.password)
+        self.assertTrue(db.validate_cert)
+        self.assertEqual(db.max_clients, 10)
+        self.assertTrue(db.keep_alive)
+        self.assertIsNone(db.connect_timeout)
+        self.assertIsNone(db.request_timeout)
+        self.assertFalse(db.use_curl)
+        self.assertFalse(db.single_flight)
+        self.assertTrue(isinstance(db.request_metrics, RequestMetrics))
+
+    def test_shared_request_metrics(self):
+        request_metrics = RequestMetrics()
+        db1 = CouchDBDatabase(uuid.uuid4().hex, request_metrics=request_metrics)
+        db2 = CouchDBDatabase(uuid.uuid4().hex, request_metrics=request_metrics)
+        self.assertIs(db1.request_metrics, request_metrics)
+        self.assertIs(db2.request_metrics, request_metrics)
+
+    def test_http_client_is_created_once_with_max_clients(self):
+        the_max_clients = 42
+        db = CouchDBDatabase(uuid.uuid4().hex, max_clients=the_max_clients)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient") as async_http_client_patch:
+            http_client = db.http_client
+            self.assertTrue(http_client is db.http_client)
+            async_http_client_patch.assert_called_once_with(
+                force_instance=True,
+                max_clients=the_max_clients)
+
+            db.close()
+            http_client.close.assert_called_once_with()
+
+            db.http_client
+            self.assertEqual(2, async_http_client_patch.call_count)
+
+    def test_each_database_has_its_own_http_client(self):
+        db1 = CouchDBDatabase(uuid.uuid4().hex)
+        db2 = CouchDBDatabase(uuid.uuid4().hex)
+        try:
+            self.assertFalse(db1.http_client is db2.http_client)
+        finally:
+            db1.close()
+            db2.close()
+
+    def test_default_database_uses_module_globals(self):
+        the_database = "http://127.0.0.1:5984/%s" % uuid.uuid4().hex
+        with mock.patch(__name__ + ".async_model_actions.database", the_database):
+            ad = AsyncDeleter(mock.Mock())
+            self.assertEqual(ad.db.url, the_database)
+
+
+class OperationTestCase(unittest.TestCase):
+    """A collection of unit tests for the _operation function."""
+
+    def _assert_operations(self, server_url, db_url):
+        self.assertEqual("by_id", _operation("GET", db_url + "/doc_id", db_url))
+        self.assertEqual("by_id", _operation("GET", db_url + "/_design/dd", db_url))
+        self.assertEqual("view", _operation("GET", db_url + "/_design/dd/_view/dd?key=1", db_url))
+        self.assertEqual("view", _operation("POST", db_url + "/_design/dd/_view/dd?include_docs=true", db_url))
+        self.assertEqual("all_docs", _operation("POST", db_url + "/_all_docs?include_docs=true", db_url))
+        self.assertEqual("bulk_docs", _operation("POST", db_url + "/_bulk_docs", db_url))
+        self.assertEqual("changes", _operation("GET", db_url + "/_changes?since=0", db_url))
+        self.assertEqual("compact", _operation("POST", db_url + "/_compact", db_url))
+        self.assertEqual("metrics", _operation("GET", db_url + "/_design/dd/_info", db_url))
+        self.assertEqual("metrics", _operation("GET", db_url, db_url))
+        self.assertEqual("metrics", _operation("GET", db_url + "/", db_url))
+        self.assertEqual("metrics", _operation("GET", server_url + "/_active_tasks", db_url))
+        self.assertEqual("persist", _operation("PUT", db_url + "/doc_id", db_url))
+        self.assertEqual("persist", _operation("POST", db_url + "/", db_url))
+        self.assertEqual("delete", _operation("DELETE", db_url + "/doc_id?rev=1-a", db_url))
+
+    def test_operation(self):
+        self._assert_operations("http://127.0.0.1:5984", "http://127.0.0.1:5984/database")
+
+    def test_operation_with_path_prefix(self):
+        self._assert_operations("http://127.0.0.1:8080/couch", "http://127.0.0.1:8080/couch/database")
+
+
+class CouchDBAsyncHTTPRequestTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPRequest class."""
+
+    def test_request_uses_database(self):
+        the_url = "http://127.0.0.1:5984/%s" % uuid.uuid4().hex
+        the_username = uuid.uuid4().hex
+        the_password = uuid.uuid4().hex
+        db = CouchDBDatabase(
+            the_url,
+            username=the_username,
+            password=the_password,
+            validate_cert=False,
+            keep_alive=False,
+            connect_timeout=1.5,
+            request_timeout=2.5)
+
+        request = CouchDBAsyncHTTPRequest("doc_id", "GET", None, db)
+
+        self.assertEqual(request.url, "%s/doc_id" % the_url)
+        self.assertEqual(request.auth_mode, "basic")
+        self.assertEqual(request.auth_username, the_username)
+        self.assertEqual(request.auth_password, the_password)
+        self.assertFalse(request.validate_cert)
+        self.assertEqual(request.headers["Connection"], "close")
+        self.assertEqual(request.connect_timeout, 1.5)
+        self.assertEqual(request.request_timeout, 2.5)
+
+    def test_request_uses_default_database(self):
+        the_database = "http://127.0.0.1:5984/%s" % uuid.uuid4().hex
+        with mock.patch(__name__ + ".async_model_actions.database", the_database):
+            request = CouchDBAsyncHTTPRequest("doc_id", "GET", None)
+            self.assertEqual(request.url, "%s/doc_id" % the_database)
+            self.assertIsNone(request.auth_mode)
+            self.assertNotIn("Connection", request.headers)
+
+    def test_actions_issue_requests_against_their_database(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+
+        model = mock.Mock()
+        model._id = uuid.uuid4().hex
+        model._rev = uuid.uuid4().hex
+
+        def fetch_patch(cac, request, callback):
+            self.assertTrue(cac.db is db)
+            self.assertEqual(request.url, "%s/%s?rev=%s" % (db.url, model._id, model._rev))
+            callback(True, False, None, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            ad = AsyncDeleter(model, db=db)
+            self.assertTrue(ad.db is db)
+            callback = mock.Mock()
+            ad.delete(callback)
+            callback.assert_called_once_with(True, False, ad)
+
+
+class ViewRowsStreamParserTestCase(unittest.TestCase):
+    """A collection of unit tests for the _ViewRowsStreamParser class."""
+
+    def _parse(self, body, chunk_size):
+        parser = _ViewRowsStreamParser()
+        rows = []
+        for i in range(0, len(body), chunk_size):
+            rows.extend(parser.feed(body[i:i + chunk_size]))
+        return (parser, rows)
+
+    def test_all_chunk_sizes(self):
+        body = {
+            "total_rows": 3,
+            "offset": 0,
+            "rows": [
+                {"id": "1", "key": ["a", 1], "value": None, "doc": {"_id": "1", "s": "{[\"]}\\", "l": [{}, []]}},
+                {"id": "2", "key": "rows", "value": {"rows": [1, 2]}, "doc": {"_id": "2"}},
+                {"id": "3", "key": "c", "value": None, "doc": None},
+            ],
+        }
+        body_as_str = json.dumps(body)
+        for chunk_size in range(1, len(body_as_str) + 1):
+            (parser, rows) = self._parse(body_as_str, chunk_size)
+            self.assertEqual(body["rows"], rows)
+            # only the unprocessed tail of the body is retained
+            self.assertEqual("", parser._buffer)
+
+    def test_couchdb_formatted_body(self):
+        body = (
+            '{"total_rows":2,"offset":0,"rows":[\r\n'
+            '{"id":"1","key":"a","value":null,"doc":{"_id":"1"}},\r\n'
+            '{"id":"2","key":"b","value":null,"doc":{"_id":"2"}}\r\n'
+            ']}\n'
+        )
+        (parser, rows) = self._parse(body, 7)
+        self.assertEqual(["1", "2"], [row["id"] for row in rows])
+
+    def test_no_rows(self):
+        (parser, rows) = self._parse('{"error":"not_found","reason":"missing"}', 5)
+        self.assertEqual([], rows)
+
+    def test_only_partial_row_is_buffered(self):
+        parser = _ViewRowsStreamParser()
+        self.assertEqual([], parser.feed('{"total_rows":2,"offset":0,"rows":['))
+        self.assertEqual([{"id": "1"}], parser.feed('{"id":"1"},{"id":'))
+        self.assertEqual('{"id":', parser._buffer)
+        self.assertEqual([{"id": "2"}], parser.feed('"2"}]}'))
+
+
 class CouchDBAsyncHTTPClientTestCase(unittest.TestCase):
     """A collection of unit tests for the CouchDBAsyncHTTPClient class."""
 
@@ -174,6 +415,36 @@ class CouchDBAsyncHTTPClientTestCase(unittest.TestCase):
                     logger_patch.info.call_args_list,
                     [mock.call(expected_info_message)])
 
+    def test_response_time_recorded_in_request_metrics(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+
+        response = mock.Mock()
+        response.code = httplib.OK
+        response.error = None
+        response.body = None
+        response.time_info = {"queue": 0.001, "total": 0.25}
+        response.effective_url = "%s/%s" % (db.url, uuid.uuid4().hex)
+        response.request_time = 0.25
+        response.request = mock.Mock()
+        response.request.method = "GET"
+
+        def fetch_patch(request, callback):
+            callback(response)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            the_ac = CouchDBAsyncHTTPClient(response.code, None, db=db)
+            the_ac.fetch(response.request, mock.Mock())
+
+        snapshot = db.request_metrics.snapshot(percentiles=[100])
+        self.assertEqual(1, len(snapshot))
+        self.assertEqual("by_id", snapshot[0]["operation"])
+        self.assertEqual("GET", snapshot[0]["method"])
+        self.assertEqual("2xx", snapshot[0]["status_class"])
+        self.assertEqual(1, snapshot[0]["request_time"]["count"])
+        self.assertEqual(250.0, snapshot[0]["request_time"]["p100"])
+        self.assertEqual(1.0, snapshot[0]["phases"]["queue"]["p100"])
+        self.assertEqual(250.0, snapshot[0]["phases"]["total"]["p100"])
+
     def test_detect_conflict(self):
         response = mock.Mock()
         response.code = httplib.CONFLICT
@@ -189,10 +460,12 @@ class CouchDBAsyncHTTPClientTestCase(unittest.TestCase):
             callback(response)
 
         with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
-            the_ac = CouchDBAsyncHTTPClient(httplib.OK, None)
+            db = CouchDBDatabase(uuid.uuid4().hex)
+            the_ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
             callback = mock.Mock()
             the_ac.fetch(response.request, callback)
             callback.assert_called_once_with(False, True, None, None, None, the_ac)
+            self.assertEqual({"conflicts": 1}, db.request_metrics.counters)
 
     def test_on_response_dot_error(self):
         response = mock.Mock()
@@ -209,12 +482,14 @@ class CouchDBAsyncHTTPClientTestCase(unittest.TestCase):
             callback(response)
 
         with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
-            the_ac = CouchDBAsyncHTTPClient(response.code, None)
+            db = CouchDBDatabase(uuid.uuid4().hex)
+            the_ac = CouchDBAsyncHTTPClient(response.code, None, db=db)
 
             with mock.patch(__name__ + '.async_model_actions._logger') as logger_patch:
                 callback = mock.Mock()
                 the_ac.fetch(response.request, callback)
                 callback.assert_called_once_with(False, False, None, None, None, the_ac)
+                self.assertEqual({"errors": 1}, db.request_metrics.counters)
 
                 expected_logger_error_call_arg_list = (
                     "CouchDB responded to %s on %s with error '%s'",
@@ -226,6 +501,1551 @@ class CouchDBAsyncHTTPClientTestCase(unittest.TestCase):
                     mock.call(expected_logger_error_call_arg_list))
 
 
+class CouchDBAsyncHTTPClientSingleFlightTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming identical in-flight GETs are coalesced."""
+
+    def test_identical_gets_share_one_response(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+        doc = {
+            "_id": uuid.uuid4().hex,
+            "_rev": uuid.uuid4().hex,
+            "type": "my_model",
+        }
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger') as logger_patch:
+                callbacks = []
+                acs = []
+                for i in range(3):
+                    ac = CouchDBAsyncHTTPClient(
+                        httplib.OK,
+                        lambda doc: MyModel(doc=doc),
+                        expect_one_document=True,
+                        db=db)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(path, "GET", None, db=db), callback)
+                    acs.append(ac)
+                    callbacks.append(callback)
+
+                self.assertEqual(len(fetch_callbacks), 1)
+                for callback in callbacks:
+                    self.assertEqual(callback.call_count, 0)
+
+                (request, fetch_callback) = fetch_callbacks[0]
+                fetch_callback(_create_mock_response(request, body=doc))
+
+                self.assertEqual(logger_patch.info.call_count, 1)
+
+        models = []
+        for (ac, callback) in zip(acs, callbacks):
+            self.assertEqual(callback.call_count, 1)
+            (is_ok, is_conflict, model, _id, _rev, the_ac) = callback.call_args[0]
+            self.assertTrue(is_ok)
+            self.assertFalse(is_conflict)
+            self.assertIs(the_ac, ac)
+            self.assertIsNotNone(model)
+            self.assertEqual(model._id, doc["_id"])
+            self.assertEqual(model._rev, doc["_rev"])
+            models.append(model)
+
+        self.assertEqual(len(set([id(the_model) for the_model in models])), len(models))
+
+        self.assertEqual(db._in_flight_gets, {})
+
+    def test_gets_after_response_are_not_coalesced(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch) as fetch_patch:
+            for i in range(2):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                callback = mock.Mock()
+                ac.fetch(CouchDBAsyncHTTPRequest(path, "GET", None, db=db), callback)
+                callback.assert_called_once_with(True, False, {}, None, None, ac)
+
+            self.assertEqual(fetch_patch.call_count, 2)
+
+    def _assert_not_coalesced(self, db, requests, priorities=None):
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            callbacks = []
+            for (request, priority) in zip(requests, priorities or [PRIORITY_INTERACTIVE] * len(requests)):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db, priority=priority)
+                callback = mock.Mock()
+                ac.fetch(request, callback)
+                callbacks.append(callback)
+
+            self.assertEqual(len(fetch_callbacks), len(requests))
+
+            for (request, fetch_callback) in fetch_callbacks:
+                fetch_callback(_create_mock_response(request))
+
+            for callback in callbacks:
+                self.assertEqual(callback.call_count, 1)
+
+    def test_different_paths_are_not_coalesced(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        requests = [
+            CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db),
+            CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db),
+        ]
+        self._assert_not_coalesced(db, requests)
+
+    def test_different_if_none_match_are_not_coalesced(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+        requests = [
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+        ]
+        requests[1].headers["If-None-Match"] = '"%s"' % uuid.uuid4().hex
+        self._assert_not_coalesced(db, requests)
+
+    def test_different_priorities_are_not_coalesced(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+        requests = [
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+        ]
+        self._assert_not_coalesced(db, requests, [PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE])
+
+    def test_non_gets_are_not_coalesced(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+        requests = [
+            CouchDBAsyncHTTPRequest(path, "POST", {}, db=db),
+            CouchDBAsyncHTTPRequest(path, "POST", {}, db=db),
+        ]
+        self._assert_not_coalesced(db, requests)
+
+    def test_single_flight_disabled_by_default(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        path = uuid.uuid4().hex
+        requests = [
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+            CouchDBAsyncHTTPRequest(path, "GET", None, db=db),
+        ]
+        self._assert_not_coalesced(db, requests)
+
+
+class CouchDBAsyncHTTPClientCircuitBreakerTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming the database's circuit breaker is consulted and informed."""
+
+    def _fetch(self, db, code):
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, code))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch) as fetch_patch:
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                callback = mock.Mock()
+                ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+                self.assertEqual(callback.call_count, 1)
+                return (ac, callback.call_args[0][0], fetch_patch.call_count)
+
+    def test_fetch_failure_detail(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+
+        (ac, is_ok, _) = self._fetch(db, httplib.OK)
+        self.assertTrue(is_ok)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_OK)
+
+        (ac, is_ok, _) = self._fetch(db, httplib.CONFLICT)
+        self.assertFalse(is_ok)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CONFLICT)
+
+        (ac, is_ok, _) = self._fetch(db, httplib.NOT_FOUND)
+        self.assertFalse(is_ok)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_UNEXPECTED_RESPONSE_CODE)
+
+        (ac, is_ok, _) = self._fetch(db, httplib.INTERNAL_SERVER_ERROR)
+        self.assertFalse(is_ok)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_SERVER_ERROR)
+
+        (ac, is_ok, _) = self._fetch(db, 599)
+        self.assertFalse(is_ok)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR)
+
+    def test_failures_open_circuit_breaker(self):
+        circuit_breaker = CircuitBreaker(window_size=4, min_num_requests=4)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker)
+
+        for code in [httplib.OK, httplib.NOT_FOUND, 599, httplib.SERVICE_UNAVAILABLE]:
+            (ac, is_ok, num_fetches) = self._fetch(db, code)
+            self.assertEqual(num_fetches, 1)
+
+        self.assertEqual(circuit_breaker.state, CircuitBreaker.STATE_OPEN)
+
+        (ac, is_ok, num_fetches) = self._fetch(db, httplib.OK)
+        self.assertFalse(is_ok)
+        self.assertEqual(num_fetches, 0)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN)
+        self.assertEqual(circuit_breaker.num_rejected, 1)
+        self.assertEqual(db.request_metrics.counters["circuit_breaker_rejections"], 1)
+
+    def test_time_queued_in_http_client_is_not_recorded(self):
+        circuit_breaker = mock.Mock()
+        circuit_breaker.allow_request.return_value = True
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker)
+
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, request_time=6.0, time_info={"queue": 5.99}))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), mock.Mock())
+
+        self.assertEqual(1, circuit_breaker.record.call_count)
+        (is_failure, request_time_in_ms) = circuit_breaker.record.call_args[0]
+        self.assertFalse(is_failure)
+        self.assertAlmostEqual(10, request_time_in_ms)
+
+    def test_no_circuit_breaker(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        self.assertIsNone(db.circuit_breaker)
+        for i in range(20):
+            (ac, is_ok, num_fetches) = self._fetch(db, 599)
+            self.assertEqual(num_fetches, 1)
+
+
+class CouchDBAsyncHTTPClientLongLivedRequestTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming long-lived requests (ex longpoll ```_changes``` requests)
+    bypass the database's circuit breaker and concurrency limiter."""
+
+    def test_changes_requests_bypass_circuit_breaker_and_concurrency_limiter(self):
+        circuit_breaker = CircuitBreaker(window_size=10, min_num_requests=10, slow_request_threshold_in_ms=5000)
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker,
+            concurrency_limiter=concurrency_limiter)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                # a longpoll request in flight doesn't use the only slot
+                # under the concurrency limit ...
+                changes_ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                changes_ac.fetch(CouchDBAsyncHTTPRequest("_changes?feed=longpoll", "GET", None, db=db), mock.Mock())
+                self.assertEqual(len(fetch_callbacks), 1)
+                self.assertEqual(concurrency_limiter.num_in_flight, 0)
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request, request_time=60))
+
+                # ... and idle longpoll responses aren't slow requests
+                for i in range(10):
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    ac.fetch(CouchDBAsyncHTTPRequest("_changes?feed=longpoll", "GET", None, db=db), mock.Mock())
+                    (request, fetch_callback) = fetch_callbacks.pop(0)
+                    fetch_callback(_create_mock_response(request, request_time=60))
+
+                self.assertEqual(circuit_breaker.state, CircuitBreaker.STATE_CLOSED)
+                self.assertEqual(concurrency_limiter.limit, 1)
+                self.assertIsNone(concurrency_limiter.no_load_latency_in_ms)
+
+                achc = AsyncCouchDBHealthCheck(db=db)
+                callback = mock.Mock()
+                achc.check(callback)
+                self.assertEqual(len(fetch_callbacks), 1)
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request))
+                callback.assert_called_once_with(True, achc)
+
+    def test_changes_requests_sent_while_circuit_breaker_is_open(self):
+        circuit_breaker = mock.Mock()
+        circuit_breaker.allow_request.return_value = False
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker)
+
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, request_time=60))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                callback = mock.Mock()
+                ac.fetch(CouchDBAsyncHTTPRequest("_changes?feed=longpoll", "GET", None, db=db), callback)
+
+        self.assertTrue(callback.call_args[0][0])
+        self.assertEqual(circuit_breaker.allow_request.call_count, 0)
+        self.assertEqual(circuit_breaker.record.call_count, 0)
+
+
+class CouchDBAsyncHTTPClientContentionMonitorTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming the database's contention monitor is informed of writes."""
+
+    def _fetch(self, db, method, path, code):
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, code, request_time=0.02))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                ac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=db)
+                body_as_dict = {} if method != "GET" else None
+                ac.fetch(CouchDBAsyncHTTPRequest(path, method, body_as_dict, db=db), mock.Mock())
+
+    def test_writes_are_recorded(self):
+        contention_monitor = ContentionMonitor(decay=0.5)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            contention_monitor=contention_monitor)
+
+        self._fetch(db, "PUT", uuid.uuid4().hex, httplib.CREATED)
+        self._fetch(db, "PUT", uuid.uuid4().hex, httplib.CONFLICT)
+        self._fetch(db, "DELETE", uuid.uuid4().hex, httplib.CONFLICT)
+
+        self.assertEqual(3, contention_monitor.num_writes)
+        self.assertEqual(2, contention_monitor.num_conflicts)
+        self.assertEqual(0.75, contention_monitor.conflict_rate)
+        self.assertAlmostEqual(20, contention_monitor.latency_in_ms)
+
+    def test_reads_and_failures_are_not_recorded(self):
+        contention_monitor = ContentionMonitor()
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            contention_monitor=contention_monitor)
+
+        self._fetch(db, "GET", uuid.uuid4().hex, httplib.OK)
+        self._fetch(db, "POST", "_design/fruit/_view/fruit_by_color", httplib.OK)
+        self._fetch(db, "PUT", uuid.uuid4().hex, httplib.SERVICE_UNAVAILABLE)
+
+        self.assertEqual(0, contention_monitor.num_writes)
+
+    def test_no_contention_monitor(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        self.assertIsNone(db.contention_monitor)
+        self._fetch(db, "PUT", uuid.uuid4().hex, httplib.CONFLICT)
+
+
+class CouchDBAsyncHTTPClientTransientRetryTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming transient failures are retried as directed by the
+    database's transient retry policy."""
+
+    def setUp(self):
+        self._logger_patcher = mock.patch(__name__ + ".async_model_actions._logger")
+        self._logger_patcher.start()
+
+    def tearDown(self):
+        self._logger_patcher.stop()
+
+    def _create_db(self, max_num_retries=3, **kwargs):
+        transient_retry_policy = TransientRetryPolicy(
+            create_retry_strategy=lambda: ImmediateRetryStrategy(max_num_retries=max_num_retries))
+        return CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            transient_retry_policy=transient_retry_policy,
+            **kwargs)
+
+    def _fetch_patch(self, codes):
+        """Returns a patch of the async HTTP client's fetch() which
+        responds to each request with the next of ```codes```.
+        """
+        codes = list(codes)
+
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, codes.pop(0), {"_id": "doc", "_rev": "2-b"}))
+
+        return mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch)
+
+    def test_transient_failures_are_retried(self):
+        db = self._create_db()
+        with self._fetch_patch([599, httplib.SERVICE_UNAVAILABLE, httplib.OK]) as fetch_patch:
+            ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            callback = mock.Mock()
+            ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+
+        self.assertEqual(3, fetch_patch.call_count)
+        self.assertEqual(1, callback.call_count)
+        self.assertTrue(callback.call_args[0][0])
+        self.assertEqual(2, ac.num_retries)
+        self.assertEqual(CouchDBAsyncHTTPClient.FFD_OK, ac.fetch_failure_detail)
+        self.assertEqual(2, db.request_metrics.counters["transient_retries"])
+
+    def test_retries_exhausted(self):
+        db = self._create_db(max_num_retries=2)
+        with self._fetch_patch([599, httplib.SERVICE_UNAVAILABLE]) as fetch_patch:
+            ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            callback = mock.Mock()
+            ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+
+        self.assertEqual(2, fetch_patch.call_count)
+        self.assertEqual(1, callback.call_count)
+        self.assertFalse(callback.call_args[0][0])
+        self.assertEqual(1, ac.num_retries)
+        self.assertEqual(CouchDBAsyncHTTPClient.FFD_SERVER_ERROR, ac.fetch_failure_detail)
+        self.assertEqual(1, db.request_metrics.counters["transient_retries"])
+        self.assertEqual(1, db.request_metrics.counters["transient_retries_exhausted"])
+
+    def test_idempotent_writes_are_retried(self):
+        db = self._create_db()
+        with self._fetch_patch([599, httplib.CREATED]) as fetch_patch:
+            ac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=db)
+            callback = mock.Mock()
+            request = CouchDBAsyncHTTPRequest("doc", "PUT", {"_id": "doc", "_rev": "1-a"}, db=db)
+            ac.fetch(request, callback)
+
+        self.assertEqual(2, fetch_patch.call_count)
+        self.assertTrue(callback.call_args[0][0])
+
+    def test_non_idempotent_writes_are_not_retried(self):
+        db = self._create_db()
+        with self._fetch_patch([599]) as fetch_patch:
+            ac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=db)
+            callback = mock.Mock()
+            ac.fetch(CouchDBAsyncHTTPRequest("", "POST", {}, db=db), callback)
+
+        self.assertEqual(1, fetch_patch.call_count)
+        self.assertFalse(callback.call_args[0][0])
+        self.assertEqual(0, ac.num_retries)
+        self.assertEqual(CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR, ac.fetch_failure_detail)
+
+    def test_non_transient_failures_are_not_retried(self):
+        db = self._create_db()
+        with self._fetch_patch([httplib.CONFLICT]) as fetch_patch:
+            ac = CouchDBAsyncHTTPClient(httplib.CREATED, None, db=db)
+            callback = mock.Mock()
+            request = CouchDBAsyncHTTPRequest("doc", "PUT", {"_id": "doc", "_rev": "1-a"}, db=db)
+            ac.fetch(request, callback)
+
+        self.assertEqual(1, fetch_patch.call_count)
+        self.assertEqual((False, True), callback.call_args[0][:2])
+
+    def test_retry_releases_and_reacquires_concurrency_limiter(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        db = self._create_db(concurrency_limiter=concurrency_limiter)
+
+        num_in_flight = []
+
+        with self._fetch_patch([599, httplib.OK]) as fetch_patch:
+            fetch = fetch_patch.side_effect
+
+            def fetch_and_track_in_flight(request, callback):
+                num_in_flight.append(concurrency_limiter.num_in_flight)
+                fetch(request, callback)
+
+            fetch_patch.side_effect = fetch_and_track_in_flight
+
+            ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            callback = mock.Mock()
+            ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+
+        self.assertEqual([1, 1], num_in_flight)
+        self.assertEqual(0, concurrency_limiter.num_in_flight)
+        self.assertTrue(callback.call_args[0][0])
+
+    def test_followers_wait_for_retries(self):
+        db = self._create_db(single_flight=True)
+        path = uuid.uuid4().hex
+
+        callbacks = []
+
+        def fetch_patch(request, callback):
+            callbacks.append(callback)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            leader = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            leader_callback = mock.Mock()
+            leader.fetch(CouchDBAsyncHTTPRequest(path, "GET", None, db=db), leader_callback)
+
+            follower = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            follower_callback = mock.Mock()
+            follower.fetch(CouchDBAsyncHTTPRequest(path, "GET", None, db=db), follower_callback)
+
+            self.assertEqual(1, len(callbacks))
+
+            response = mock.Mock()
+            response.code = 599
+            response.error = None
+            response.body = None
+            response.time_info = {}
+            response.request_time = 0.01
+            response.effective_url = "http://127.0.0.1:5984/%s" % path
+            response.request = mock.Mock(method="GET")
+            callbacks.pop(0)(response)
+
+            self.assertEqual(1, len(callbacks))
+            self.assertEqual(0, leader_callback.call_count)
+            self.assertEqual(0, follower_callback.call_count)
+
+            response.code = httplib.OK
+            response.body = json.dumps({})
+            callbacks.pop(0)(response)
+
+        self.assertTrue(leader_callback.call_args[0][0])
+        self.assertTrue(follower_callback.call_args[0][0])
+        self.assertEqual(0, follower.num_retries)
+
+    def _create_budgeted_db(self, retry_budget):
+        transient_retry_policy = TransientRetryPolicy(
+            create_retry_strategy=lambda: ImmediateBudgetedRetryStrategy(max_num_retries=3, retry_budget=retry_budget))
+        return CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            transient_retry_policy=transient_retry_policy)
+
+    def test_each_request_deposits_into_retry_budget_once(self):
+        retry_budget = RetryBudget(retry_ratio=0.25, min_retries_per_second=0, max_num_tokens=10)
+        while retry_budget.withdraw():
+            pass
+        db = self._create_budgeted_db(retry_budget)
+
+        with self._fetch_patch([httplib.OK, httplib.OK]):
+            for i in range(2):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), mock.Mock())
+
+        self.assertEqual(0.5, retry_budget.num_tokens)
+
+    def test_retry_budget_limits_retries_of_concurrent_requests(self):
+        retry_budget = RetryBudget(retry_ratio=0.5, min_retries_per_second=0, max_num_tokens=10)
+        while retry_budget.withdraw():
+            pass
+        num_withdrawn = retry_budget.num_withdrawn
+        num_rejected = retry_budget.num_rejected
+        db = self._create_budgeted_db(retry_budget)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            acs = []
+            callbacks = []
+            for i in range(6):
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                callback = mock.Mock()
+                ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+                acs.append(ac)
+                callbacks.append(callback)
+
+            self.assertEqual(6, len(fetch_callbacks))
+
+            while fetch_callbacks:
+                (request, callback) = fetch_callbacks.pop(0)
+                callback(_create_mock_response(request, httplib.SERVICE_UNAVAILABLE))
+
+        # without the budget each request would be retried twice
+        self.assertEqual(3, sum(ac.num_retries for ac in acs))
+        self.assertEqual(3, retry_budget.num_withdrawn - num_withdrawn)
+        self.assertEqual(6, retry_budget.num_rejected - num_rejected)
+        self.assertEqual(3, db.request_metrics.counters["transient_retries"])
+        for callback in callbacks:
+            self.assertEqual(1, callback.call_count)
+            self.assertFalse(callback.call_args[0][0])
+
+    def test_retry_strategy_deadline_is_request_deadline(self):
+        retry_strategy = mock.Mock()
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            transient_retry_policy=TransientRetryPolicy(create_retry_strategy=lambda: retry_strategy))
+        deadline = time.time() + 60
+        with self._fetch_patch([599]):
+            ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+            ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=deadline), mock.Mock())
+
+        self.assertEqual(deadline, retry_strategy.deadline)
+        self.assertEqual(1, retry_strategy.wait.call_count)
+
+
+class CouchDBAsyncHTTPClientConcurrencyLimiterTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming the database's concurrency limiter is consulted and informed."""
+
+    def test_requests_are_queued_and_shed(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_size=1)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            concurrency_limiter=concurrency_limiter)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                acs = []
+                callbacks = []
+                for i in range(3):
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "PUT", {}, db=db), callback)
+                    acs.append(ac)
+                    callbacks.append(callback)
+
+                self.assertEqual(len(fetch_callbacks), 1)
+                self.assertEqual(concurrency_limiter.queue_size, 1)
+
+                self.assertEqual(callbacks[0].call_count, 0)
+                self.assertEqual(callbacks[1].call_count, 0)
+                callbacks[2].assert_called_once_with(False, False, None, None, None, acs[2])
+                self.assertEqual(acs[2].fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_LOAD_SHED)
+                self.assertEqual(db.request_metrics.counters["load_shed"], 1)
+
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request, request_time=0.012, time_info={"queue": 0.002}))
+                self.assertEqual(callbacks[0].call_count, 1)
+                self.assertEqual(len(fetch_callbacks), 1)
+                self.assertAlmostEqual(concurrency_limiter.no_load_latency_in_ms, 10)
+
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request, request_time=0.012, time_info={"queue": 0.002}))
+                self.assertEqual(callbacks[1].call_count, 1)
+
+        self.assertEqual(concurrency_limiter.num_in_flight, 0)
+
+    def test_queued_get_rejected_by_circuit_breaker_fails_followers(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        circuit_breaker = mock.Mock()
+        circuit_breaker.allow_request.return_value = True
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            concurrency_limiter=concurrency_limiter,
+            circuit_breaker=circuit_breaker,
+            single_flight=True)
+        path = uuid.uuid4().hex
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                callbacks = []
+                for the_path in [uuid.uuid4().hex, path, path]:
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(the_path, "GET", None, db=db), callback)
+                    callbacks.append(callback)
+
+                self.assertEqual(len(fetch_callbacks), 1)
+                self.assertEqual(concurrency_limiter.queue_size, 1)
+
+                circuit_breaker.allow_request.return_value = False
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request, request_time=0.012, time_info={"queue": 0.002}))
+
+        self.assertEqual(len(fetch_callbacks), 0)
+        for callback in callbacks[1:]:
+            self.assertEqual(callback.call_count, 1)
+            self.assertFalse(callback.call_args[0][0])
+            self.assertEqual(callback.call_args[0][-1].fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN)
+        self.assertEqual(concurrency_limiter.num_in_flight, 0)
+        self.assertEqual(db._in_flight_gets, {})
+
+    def test_many_queued_requests_rejected_by_circuit_breaker(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_size=10000)
+        priority_scheduler = PriorityScheduler({PRIORITY_INTERACTIVE: 10000, PRIORITY_BACKGROUND: 1})
+        circuit_breaker = mock.Mock()
+        circuit_breaker.allow_request.return_value = True
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            concurrency_limiter=concurrency_limiter,
+            priority_scheduler=priority_scheduler,
+            circuit_breaker=circuit_breaker)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                callbacks = []
+                for i in range(2000):
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+                    callbacks.append(callback)
+
+                self.assertEqual(len(fetch_callbacks), 1)
+
+                circuit_breaker.allow_request.return_value = False
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request, request_time=0.012, time_info={"queue": 0.002}))
+
+        for callback in callbacks:
+            self.assertEqual(callback.call_count, 1)
+        self.assertEqual(concurrency_limiter.num_in_flight, 0)
+        self.assertEqual(concurrency_limiter.queue_size, 0)
+        self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_INTERACTIVE], 0)
+
+
+class CouchDBAsyncHTTPClientDeadlineTestCase(unittest.TestCase):
+    """A collection of unit tests for CouchDBAsyncHTTPRequest and
+    CouchDBAsyncHTTPClient confirming deadlines are respected."""
+
+    def test_timeouts_reduced_to_time_remaining(self):
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            connect_timeout=1.0,
+            request_timeout=10.0)
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+            request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=1002.5)
+        self.assertEqual(request.deadline, 1002.5)
+        self.assertEqual(request.connect_timeout, 1.0)
+        self.assertEqual(request.request_timeout, 2.5)
+
+    def test_timeouts_without_deadline(self):
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            request_timeout=10.0)
+        request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db)
+        self.assertIsNone(request.deadline)
+        self.assertIsNone(request.connect_timeout)
+        self.assertEqual(request.request_timeout, 10.0)
+
+    def test_request_not_sent_after_deadline(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+            request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=1001.0)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch") as fetch_patch:
+            with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1001.0):
+                with mock.patch(__name__ + '.async_model_actions._logger'):
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(request, callback)
+
+        self.assertEqual(fetch_patch.call_count, 0)
+        callback.assert_called_once_with(False, False, None, None, None, ac)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+        self.assertEqual(db.request_metrics.counters["deadline_exceeded"], 1)
+        self.assertEqual(db._in_flight_gets, {})
+
+    def test_action_deadline_used_for_requests(self):
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch") as fetch_patch:
+            with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+                ac = AsyncCouchDBHealthCheck(deadline=1000.5)
+                self.assertEqual(ac.deadline, 1000.5)
+                ac.check()
+        self.assertEqual(fetch_patch.call_count, 1)
+        request = fetch_patch.call_args[0][0]
+        self.assertEqual(request.deadline, 1000.5)
+        self.assertEqual(request.request_timeout, 0.5)
+
+    def _timeout(self, now_when_response_arrives):
+        """Send a request with a deadline of 1001.0 at 1000.0 which times
+        out at ```now_when_response_arrives```.
+        """
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+            request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=1001.0)
+            with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch") as fetch_patch:
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                callback = mock.Mock()
+                ac.fetch(request, callback)
+
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=now_when_response_arrives):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                fetch_callback = fetch_patch.call_args[1]["callback"]
+                fetch_callback(_create_mock_response(request, 599))
+
+        callback.assert_called_once_with(False, False, None, None, None, ac)
+        return (db, ac)
+
+    def test_timeout_after_deadline_is_deadline_exceeded(self):
+        (db, ac) = self._timeout(1001.0)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+        self.assertEqual(db.request_metrics.counters["deadline_exceeded"], 1)
+        self.assertNotIn("errors", db.request_metrics.counters)
+
+    def test_timeout_before_deadline_is_transport_error(self):
+        (db, ac) = self._timeout(1000.5)
+        self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR)
+        self.assertNotIn("deadline_exceeded", db.request_metrics.counters)
+        self.assertEqual(db.request_metrics.counters["errors"], 1)
+
+    def test_single_flight_only_follows_gets_with_no_later_deadline(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+                callbacks = []
+                # the first GET is sent and then only GETs whose deadline
+                # is no earlier than the first GET's deadline follow it
+                for deadline in [1002.0, 1001.0, 1003.0, None, 1002.0]:
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(path, "GET", None, db=db, deadline=deadline), callback)
+                    callbacks.append(callback)
+
+                self.assertEqual([1002.0, 1001.0], [request.deadline for (request, _) in fetch_callbacks])
+
+                while fetch_callbacks:
+                    (request, fetch_callback) = fetch_callbacks.pop(0)
+                    fetch_callback(_create_mock_response(request, body={"_id": path, "_rev": "1-a"}))
+
+        for callback in callbacks:
+            self.assertEqual(1, callback.call_count)
+            self.assertTrue(callback.call_args[0][0])
+        self.assertEqual(db._in_flight_gets, {})
+
+    def test_single_flight_follower_after_deadline(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, single_flight=True)
+        path = uuid.uuid4().hex
+
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+            leader_request = CouchDBAsyncHTTPRequest(path, "GET", None, db=db, deadline=1001.0)
+            follower_request = CouchDBAsyncHTTPRequest(path, "GET", None, db=db, deadline=1002.0)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch") as fetch_patch:
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+                    leader = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    leader.fetch(leader_request, mock.Mock())
+
+                with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1002.0):
+                    follower = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    follower.fetch(follower_request, callback)
+
+        self.assertEqual(fetch_patch.call_count, 1)
+        callback.assert_called_once_with(False, False, None, None, None, follower)
+        self.assertEqual(follower.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+        # the first GET is still waiting on CouchDB
+        self.assertEqual([leader], list(db._in_flight_gets.values()))
+
+    def test_deadline_passes_while_queued_behind_full_limiter(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            concurrency_limiter=concurrency_limiter)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                io_loop = current_patch.return_value
+                with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+                    # no deadline so no timeout
+                    in_flight = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    in_flight_callback = mock.Mock()
+                    in_flight.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), in_flight_callback)
+                    self.assertEqual(0, io_loop.add_timeout.call_count)
+
+                    request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=1001.5)
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                    callback = mock.Mock()
+                    ac.fetch(request, callback)
+
+                self.assertEqual(1, len(fetch_callbacks))
+                self.assertEqual(1, concurrency_limiter.queue_size)
+                self.assertEqual(1, io_loop.add_timeout.call_count)
+                (delay, on_timeout) = io_loop.add_timeout.call_args[0]
+                self.assertEqual(delay.total_seconds(), 1.5)
+
+                with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1001.5):
+                    with mock.patch(__name__ + '.async_model_actions._logger'):
+                        on_timeout()
+
+                callback.assert_called_once_with(False, False, None, None, None, ac)
+                self.assertEqual(ac.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+                self.assertEqual(db.request_metrics.counters["deadline_exceeded"], 1)
+                self.assertEqual(0, concurrency_limiter.queue_size)
+
+                # the request which timed out is never sent
+                (in_flight_request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(in_flight_request))
+                self.assertEqual(1, in_flight_callback.call_count)
+                self.assertTrue(in_flight_callback.call_args[0][0])
+                self.assertEqual([], fetch_callbacks)
+                self.assertEqual(0, concurrency_limiter.num_in_flight)
+                self.assertEqual(1, callback.call_count)
+
+    def test_deadline_timeout_stopped_when_dequeued(self):
+        priority_scheduler = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            priority_scheduler=priority_scheduler)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                io_loop = current_patch.return_value
+                with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+                    callbacks = []
+                    for i in range(2):
+                        request = CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db, deadline=1002.0)
+                        ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db)
+                        callback = mock.Mock()
+                        ac.fetch(request, callback)
+                        callbacks.append(callback)
+
+                    self.assertEqual(1, len(fetch_callbacks))
+                    self.assertEqual(1, priority_scheduler.queue_size(PRIORITY_INTERACTIVE))
+                    # the first request's timeout is stopped as soon as it starts
+                    self.assertEqual(2, io_loop.add_timeout.call_count)
+                    self.assertEqual(1, io_loop.remove_timeout.call_count)
+
+                    while fetch_callbacks:
+                        (request, fetch_callback) = fetch_callbacks.pop(0)
+                        fetch_callback(_create_mock_response(request))
+
+                self.assertEqual(2, io_loop.remove_timeout.call_count)
+                for callback in callbacks:
+                    self.assertEqual(1, callback.call_count)
+                    self.assertTrue(callback.call_args[0][0])
+
+
+class CouchDBAsyncHTTPClientPrioritySchedulerTestCase(unittest.TestCase):
+    """A collection of unit tests for the CouchDBAsyncHTTPClient class
+    confirming requests are scheduled by the database's priority scheduler."""
+
+    def test_background_requests_do_not_hold_up_interactive_requests(self):
+        priority_scheduler = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            priority_scheduler=priority_scheduler)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                callbacks = []
+                for priority in [PRIORITY_BACKGROUND, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE]:
+                    ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db, priority=priority)
+                    callback = mock.Mock()
+                    ac.fetch(CouchDBAsyncHTTPRequest(uuid.uuid4().hex, "GET", None, db=db), callback)
+                    callbacks.append(callback)
+
+                self.assertEqual(len(fetch_callbacks), 2)
+                self.assertEqual(priority_scheduler.queue_size(PRIORITY_BACKGROUND), 1)
+
+                (request, fetch_callback) = fetch_callbacks.pop(0)
+                fetch_callback(_create_mock_response(request))
+                self.assertEqual(callbacks[0].call_count, 1)
+                self.assertEqual(len(fetch_callbacks), 2)
+
+                while fetch_callbacks:
+                    (request, fetch_callback) = fetch_callbacks.pop(0)
+                    fetch_callback(_create_mock_response(request))
+
+        for callback in callbacks:
+            self.assertEqual(callback.call_count, 1)
+        self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_INTERACTIVE], 0)
+        self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_BACKGROUND], 0)
+
+    def test_changes_requests_do_not_hold_background_slots(self):
+        priority_scheduler = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            priority_scheduler=priority_scheduler)
+
+        fetch_callbacks = []
+
+        def fetch_patch(request, callback):
+            fetch_callbacks.append((request, callback))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                changes_callback = mock.Mock()
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db, priority=PRIORITY_BACKGROUND)
+                ac.fetch(CouchDBAsyncHTTPRequest("_changes?feed=longpoll", "GET", None, db=db), changes_callback)
+
+                # the pending _changes request doesn't hold the only background slot
+                self.assertEqual(len(fetch_callbacks), 1)
+                self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_BACKGROUND], 0)
+
+                callback = mock.Mock()
+                ac = CouchDBAsyncHTTPClient(httplib.OK, None, db=db, priority=PRIORITY_BACKGROUND)
+                ac.fetch(CouchDBAsyncHTTPRequest("", "GET", None, db=db), callback)
+                self.assertEqual(len(fetch_callbacks), 2)
+                self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_BACKGROUND], 1)
+
+                while fetch_callbacks:
+                    (request, fetch_callback) = fetch_callbacks.pop()
+                    fetch_callback(_create_mock_response(request))
+
+        self.assertEqual(changes_callback.call_count, 1)
+        self.assertEqual(callback.call_count, 1)
+        self.assertEqual(priority_scheduler.num_in_flight_by_priority[PRIORITY_BACKGROUND], 0)
+
+    def test_action_priority(self):
+        self.assertEqual(AsyncModelRetriever.priority, PRIORITY_INTERACTIVE)
+        self.assertEqual(AsyncCouchDBHealthCheck.priority, PRIORITY_INTERACTIVE)
+        self.assertEqual(AsyncDatabaseMetricsRetriever.priority, PRIORITY_BACKGROUND)
+        self.assertEqual(AsyncChangesFollower.priority, PRIORITY_BACKGROUND)
+
+        self.assertEqual(AsyncAction(None).priority, PRIORITY_INTERACTIVE)
+        self.assertEqual(AsyncAction(None, priority=PRIORITY_BACKGROUND).priority, PRIORITY_BACKGROUND)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient") as cac_patch:
+            ac = AsyncCouchDBHealthCheck()
+            ac.priority = PRIORITY_BACKGROUND
+            ac.check()
+            self.assertEqual(cac_patch.call_args[1]["priority"], PRIORITY_BACKGROUND)
+
+    def test_action_priority_constructor_argument(self):
+        model = MyModel(_id=uuid.uuid4().hex, _rev=uuid.uuid4().hex)
+        actions = [
+            (AsyncCouchDBHealthCheck(priority=PRIORITY_BACKGROUND), "check"),
+            (AsyncDeleter(model, priority=PRIORITY_BACKGROUND), "delete"),
+            (AsyncPersister(model, [], None, priority=PRIORITY_BACKGROUND), "persist"),
+            (MyModelRetrieverByDocumentID(model._id, None, priority=PRIORITY_BACKGROUND), "fetch"),
+            (AsyncCompactor(priority=PRIORITY_INTERACTIVE), "compact"),
+        ]
+        for (ac, method) in actions:
+            with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient") as cac_patch:
+                getattr(ac, method)()
+                self.assertNotEqual(ac.priority, type(ac).priority)
+                self.assertEqual(cac_patch.call_args[1]["priority"], ac.priority)
+
+        self.assertEqual(AsyncChangesFollower(priority=PRIORITY_INTERACTIVE).priority, PRIORITY_INTERACTIVE)
+
+    def test_model_updater_persists_with_its_priority(self):
+        document_id = uuid.uuid4().hex
+        priorities = []
+
+        def fetch_patch(cac, request, callback):
+            priorities.append(cac.priority)
+            if request.method == "GET":
+                callback(True, False, MyModel(_id=document_id, _rev="1-a"), None, None, cac)
+            else:
+                callback(True, False, None, document_id, "2-a", cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            amu = MyModelUpdater(document_id, lambda model: True, priority=PRIORITY_BACKGROUND)
+            callback = mock.Mock()
+            amu.update(callback)
+
+        self.assertEqual(callback.call_args[0][0], True)
+        self.assertEqual(priorities, [PRIORITY_BACKGROUND, PRIORITY_BACKGROUND])
+
+    def test_batch_helper_priority(self):
+        self.assertEqual(AllDocsDocumentLoader().priority, PRIORITY_INTERACTIVE)
+        self.assertEqual(BulkDocsWriteCoalescer().priority, PRIORITY_INTERACTIVE)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient") as cac_patch:
+            with mock.patch("tornado.ioloop.IOLoop.current"):
+                dl = AllDocsDocumentLoader(priority=PRIORITY_BACKGROUND)
+                dl.load(uuid.uuid4().hex, mock.Mock())
+                dl._flush()
+            self.assertEqual(cac_patch.call_args[1]["priority"], PRIORITY_BACKGROUND)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient") as cac_patch:
+            wc = BulkDocsWriteCoalescer(max_batch_size=1, priority=PRIORITY_BACKGROUND)
+            wc.persist({"_id": uuid.uuid4().hex}, mock.Mock())
+            self.assertEqual(cac_patch.call_args[1]["priority"], PRIORITY_BACKGROUND)
+
+
+class MyModelRetrieverByDocumentID(AsyncModelRetrieverByDocumentID):
+
+    def create_model_from_doc(self, doc):
+        return MyModel(doc=doc)
+
+
+class AsyncActionFutureUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests confirming async actions return
+    futures as well as calling callbacks."""
+
+    def test_future_and_callback(self):
+        model = mock.Mock()
+        model._id = None
+        model._rev = None
+
+        ad = AsyncDeleter(model)
+
+        callback = mock.Mock()
+        future = ad.delete(callback)
+        callback.assert_called_once_with(False, False, ad)
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), (False, False, ad))
+
+    def test_future_without_callback(self):
+        the_id = uuid.uuid4().hex
+        the_rev = uuid.uuid4().hex
+        with CouchDBAsyncHTTPClientPatcher(True, False, None, the_id, the_rev):
+            model = mock.Mock()
+            model._id = the_id
+            model._rev = the_rev
+
+            ad = AsyncDeleter(model)
+            future = ad.delete()
+            self.assertTrue(future.done())
+            self.assertEqual(future.result(), (True, False, ad))
+
+    def test_concurrent_actions_in_coroutine(self):
+        models = {}
+
+        def fetch_patch(cac, request, callback):
+            document_id = request.url.split("/")[-1]
+            models[document_id] = MyModel(_id=document_id)
+            tornado.ioloop.IOLoop.current().add_callback(
+                callback,
+                True,
+                False,
+                models[document_id],
+                None,
+                None,
+                cac)
+
+        document_ids = [uuid.uuid4().hex for i in range(5)]
+
+        @tornado.gen.coroutine
+        def fetch_all():
+            results = yield [
+                MyModelRetrieverByDocumentID(document_id, None).fetch()
+                for document_id in document_ids
+            ]
+            raise tornado.gen.Return(results)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            io_loop = tornado.ioloop.IOLoop(make_current=False)
+            try:
+                results = io_loop.run_sync(fetch_all)
+            finally:
+                io_loop.close()
+
+        self.assertEqual(len(results), len(document_ids))
+        for (document_id, (is_ok, model, amr)) in zip(document_ids, results):
+            self.assertTrue(is_ok)
+            self.assertIs(model, models[document_id])
+            self.assertEqual(amr.document_id, document_id)
+
+
+class AsyncActionFetchFailureDetailUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests confirming async actions expose
+    the fetch_failure_detail of the requests they send to CouchDB."""
+
+    def _run(self, start, code=httplib.OK, body=None):
+        """Start an async action by calling ```start``` (with a callback)
+        while CouchDB responds to every request with ```code``` and ```body```.
+        Returns the arguments the async action's callback was called with.
+        """
+        def fetch_patch(request, callback):
+            callback(_create_mock_response(request, code, body))
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                callback = mock.Mock()
+                start(callback)
+        self.assertEqual(callback.call_count, 1)
+        return callback.call_args[0]
+
+    def test_default(self):
+        self.assertIsNone(AsyncCouchDBHealthCheck().fetch_failure_detail)
+
+    def test_ok(self):
+        ahc = AsyncCouchDBHealthCheck()
+        (is_ok, _) = self._run(ahc.check)
+        self.assertTrue(is_ok)
+        self.assertEqual(ahc.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_OK)
+
+    def test_server_error(self):
+        model = MyModel(doc={})
+        ap = AsyncPersister(model, [], None)
+        (is_ok, is_conflict, _) = self._run(ap.persist, httplib.INTERNAL_SERVER_ERROR)
+        self.assertFalse(is_ok)
+        self.assertFalse(is_conflict)
+        self.assertEqual(ap.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_SERVER_ERROR)
+
+    def test_transport_error(self):
+        amr = MyModelRetrieverByDocumentID(uuid.uuid4().hex, None)
+        (is_ok, model, _) = self._run(amr.fetch, 599)
+        self.assertFalse(is_ok)
+        self.assertIsNone(model)
+        self.assertEqual(amr.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR)
+
+    def test_conflict(self):
+        model = MyModel(_id=uuid.uuid4().hex, _rev=uuid.uuid4().hex)
+        ad = AsyncDeleter(model)
+        (is_ok, is_conflict, _) = self._run(ad.delete, httplib.CONFLICT)
+        self.assertFalse(is_ok)
+        self.assertTrue(is_conflict)
+        self.assertEqual(ad.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CONFLICT)
+
+    def test_circuit_open(self):
+        circuit_breaker = CircuitBreaker(window_size=1, min_num_requests=1)
+        circuit_breaker.record(True, 10)
+        self.assertEqual(circuit_breaker.state, CircuitBreaker.STATE_OPEN)
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker)
+
+        ahc = AsyncCouchDBHealthCheck(db=db)
+        (is_ok, _) = self._run(ahc.check)
+        self.assertFalse(is_ok)
+        self.assertEqual(ahc.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN)
+
+    def test_load_shed(self):
+        concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_size=0)
+        concurrency_limiter.num_in_flight = 1
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            concurrency_limiter=concurrency_limiter)
+
+        model = MyModel(_id=uuid.uuid4().hex, _rev=uuid.uuid4().hex)
+        ad = AsyncDeleter(model, db=db)
+        (is_ok, is_conflict, _) = self._run(ad.delete)
+        self.assertFalse(is_ok)
+        self.assertFalse(is_conflict)
+        self.assertEqual(ad.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_LOAD_SHED)
+
+    def test_deadline_exceeded(self):
+        with mock.patch(__name__ + ".async_model_actions.time.time", return_value=1000.0):
+            amr = MyModelRetrieverByDocumentID(uuid.uuid4().hex, None, deadline=999.0)
+            (is_ok, model, _) = self._run(amr.fetch)
+        self.assertFalse(is_ok)
+        self.assertEqual(amr.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+
+    def test_failure_without_request(self):
+        model = MyModel()
+        ad = AsyncDeleter(model)
+        (is_ok, is_conflict, _) = self._run(ad.delete)
+        self.assertFalse(is_ok)
+        self.assertEqual(ad.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_ERROR)
+
+    def test_model_updater_persist_failure(self):
+        document_id = uuid.uuid4().hex
+        responses = [
+            (httplib.OK, {"_id": document_id, "_rev": "1-a"}),
+            (httplib.SERVICE_UNAVAILABLE, {}),
+        ]
+
+        def fetch_patch(request, callback):
+            (code, body) = responses.pop(0)
+            callback(_create_mock_response(request, code, body))
+
+        amu = MyModelUpdater(document_id, lambda model: True)
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                callback = mock.Mock()
+                amu.update(callback)
+        callback.assert_called_once_with(False, False, None, amu)
+        self.assertEqual(amu.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_SERVER_ERROR)
+
+    def test_document_loader(self):
+        def fetch_patch(cac, request, callback):
+            cac.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN
+            callback(False, False, None, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                amr = MyModelRetrieverByDocumentID(uuid.uuid4().hex, None, document_loader=AllDocsDocumentLoader())
+                callback = mock.Mock()
+                amr.fetch(callback)
+                flush = current_patch.return_value.add_callback.call_args[0][0]
+                flush()
+
+        callback.assert_called_once_with(False, None, amr)
+        self.assertEqual(amr.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN)
+
+    def test_document_loader_deadline_exceeded(self):
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch") as fetch_patch:
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                amr = MyModelRetrieverByDocumentID(
+                    uuid.uuid4().hex,
+                    None,
+                    document_loader=AllDocsDocumentLoader(),
+                    deadline=time.time() - 1)
+                callback = mock.Mock()
+                amr.fetch(callback)
+                self.assertEqual(current_patch.return_value.add_callback.call_count, 0)
+        self.assertEqual(fetch_patch.call_count, 0)
+
+        callback.assert_called_once_with(False, None, amr)
+        self.assertEqual(amr.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+
+    def test_write_coalescer_deadline_exceeded(self):
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch") as fetch_patch:
+            wc = BulkDocsWriteCoalescer(max_batch_size=1)
+            ap = AsyncPersister(MyModel(_id="a", _rev="1-a"), [], None, write_coalescer=wc, deadline=time.time() - 1)
+            callback = mock.Mock()
+            ap.persist(callback)
+        self.assertEqual(fetch_patch.call_count, 0)
+
+        callback.assert_called_once_with(False, False, ap)
+        self.assertEqual(ap.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+
+    def test_write_coalescer_conflict(self):
+        def fetch_patch(cac, request, callback):
+            cac.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_OK
+            results = [{"id": "a", "error": "conflict", "reason": "Document update conflict."}]
+            callback(True, False, results, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            wc = BulkDocsWriteCoalescer(max_batch_size=1)
+            ap = AsyncPersister(MyModel(_id="a", _rev="1-a"), [], None, write_coalescer=wc)
+            callback = mock.Mock()
+            ap.persist(callback)
+
+        callback.assert_called_once_with(False, True, ap)
+        self.assertEqual(ap.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CONFLICT)
+
+
+class AllDocsDocumentLoaderUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AllDocsDocumentLoader class."""
+
+    def _load(self, document_loader, document_ids, is_ok, rows, deadlines=None):
+        """Retrieve ```document_ids``` using ```document_loader``` and
+        return a tuple of the requests sent to CouchDB and the result
+        of each retrieval. ```deadlines``` is the deadline of each
+        retrieval.
+        """
+        requests = []
+
+        def fetch_patch(cac, request, callback):
+            requests.append(request)
+            callback(is_ok, False, {"rows": rows} if is_ok else None, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                io_loop = current_patch.return_value
+
+                callbacks = []
+                for (document_id, deadline) in zip(document_ids, deadlines or [None] * len(document_ids)):
+                    callback = mock.Mock()
+                    callbacks.append(callback)
+                    amr = MyModelRetrieverByDocumentID(
+                        document_id,
+                        None,
+                        document_loader=document_loader,
+                        deadline=deadline)
+                    amr.fetch(callback)
+
+                self.assertEqual(0, len(requests))
+                self.assertEqual(1, io_loop.add_callback.call_count)
+                flush = io_loop.add_callback.call_args[0][0]
+                flush()
+
+        results = [(cb.call_args[0][0], cb.call_args[0][1]) for cb in callbacks]
+        return (requests, results)
+
+    def test_ctr(self):
+        dl = AllDocsDocumentLoader()
+        self.assertEqual(100, dl.max_batch_size)
+        self.assertIsNotNone(dl.db)
+
+    def test_one_request_per_iteration(self):
+        rows = [
+            {"id": "a", "key": "a", "value": {"rev": "1-a"}, "doc": {"_id": "a", "_rev": "1-a"}},
+            {"key": "b", "error": "not_found"},
+            {"id": "c", "key": "c", "value": {"rev": "2-c", "deleted": True}, "doc": None},
+        ]
+        (requests, results) = self._load(AllDocsDocumentLoader(), ["a", "b", "a", "c"], True, rows)
+
+        self.assertEqual(1, len(requests))
+        self.assertTrue(requests[0].url.endswith("/_all_docs?include_docs=true"))
+        self.assertEqual("POST", requests[0].method)
+        self.assertEqual({"keys": ["a", "b", "c"]}, json.loads(requests[0].body))
+
+        self.assertTrue(results[0][0])
+        self.assertEqual("a", results[0][1]._id)
+        self.assertEqual((False, None), results[1])
+        self.assertTrue(results[2][0])
+        self.assertEqual("a", results[2][1]._id)
+        self.assertFalse(results[0][1] is results[2][1])
+        self.assertEqual((False, None), results[3])
+
+    def test_chunking(self):
+        rows = [{"key": "x", "error": "not_found"}]
+        (requests, results) = self._load(AllDocsDocumentLoader(max_batch_size=2), ["a", "b", "c"], True, rows)
+        self.assertEqual(2, len(requests))
+        self.assertEqual({"keys": ["a", "b"]}, json.loads(requests[0].body))
+        self.assertEqual({"keys": ["c"]}, json.loads(requests[1].body))
+        self.assertEqual([(False, None)] * 3, results)
+
+    def test_no_deadline(self):
+        (requests, results) = self._load(AllDocsDocumentLoader(), ["a", "b"], False, None)
+        self.assertIsNone(requests[0].deadline)
+
+    def test_deadline_is_earliest_deadline(self):
+        now = time.time()
+        deadlines = [None, now + 60, now + 30, None, now + 45]
+        (requests, results) = self._load(
+            AllDocsDocumentLoader(max_batch_size=2),
+            ["a", "b", "c", "b", "d"],
+            False,
+            None,
+            deadlines)
+        self.assertEqual(2, len(requests))
+        self.assertEqual(now + 60, requests[0].deadline)
+        self.assertEqual(now + 30, requests[1].deadline)
+        self.assertTrue(requests[1].request_timeout <= 30)
+
+    def test_error_talking_to_couchdb(self):
+        (requests, results) = self._load(AllDocsDocumentLoader(), ["a", "b"], False, None)
+        self.assertEqual(1, len(requests))
+        self.assertEqual([(False, None)] * 2, results)
+
+    def test_tampering_detected(self):
+        rows = [
+            {"id": "a", "key": "a", "value": {"rev": "1-a"}, "doc": {"_id": "a", "_rev": "1-a"}},
+        ]
+        signer = mock.Mock()
+        signer.Verify.return_value = False
+        with mock.patch(__name__ + ".async_model_actions.tampering_signer", signer):
+            (requests, results) = self._load(AllDocsDocumentLoader(), ["a"], True, rows)
+        self.assertEqual([(False, None)], results)
+
+
+class AsyncModelRetrieverByDocumentIDWithDocumentCacheUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for AsyncModelRetrieverByDocumentID
+    when used with a DocumentCache.
+    """
+
+    def _fetch(self, document_cache, document_id, code, body):
+        response = mock.Mock()
+        response.code = code
+        response.error = None if code == httplib.OK else uuid.uuid4().hex
+        response.body = json.dumps(body) if body is not None else None
+        response.time_info = {}
+        response.effective_url = "http://www.example.com/%s" % document_id
+        response.request_time = 0.01
+        response.request = mock.Mock()
+        response.request.method = "GET"
+
+        requests = []
+
+        def fetch_patch(request, callback):
+            requests.append(request)
+            callback(response)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            amr = MyModelRetrieverByDocumentID(document_id, None, document_cache=document_cache)
+            callback = mock.Mock()
+            amr.fetch(callback)
+
+        self.assertEqual(1, len(requests))
+        self.assertEqual(1, callback.call_count)
+        return (requests[0], callback.call_args[0][0], callback.call_args[0][1])
+
+    def test_miss_then_hit(self):
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+
+        (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.OK, doc)
+        self.assertNotIn("If-None-Match", request.headers)
+        self.assertTrue(is_ok)
+        self.assertEqual(doc["_rev"], model._rev)
+        self.assertEqual((0, 1), (dc.hits, dc.misses))
+
+        signer = mock.Mock()
+        with mock.patch(__name__ + ".async_model_actions.tampering_signer", signer):
+            (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.NOT_MODIFIED, None)
+        self.assertEqual('"1-a"', request.headers["If-None-Match"])
+        self.assertTrue(is_ok)
+        self.assertEqual(doc["_id"], model._id)
+        self.assertEqual(doc["_rev"], model._rev)
+        self.assertEqual((1, 1), (dc.hits, dc.misses))
+        # cached revisions aren't re-verified
+        self.assertEqual(0, signer.Verify.call_count)
+
+    def test_changed_doc_replaces_cached_doc(self):
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+        dc.put(doc["_id"], doc)
+
+        new_doc = {"_id": doc["_id"], "_rev": "2-b"}
+        (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.OK, new_doc)
+        self.assertEqual('"1-a"', request.headers["If-None-Match"])
+        self.assertTrue(is_ok)
+        self.assertEqual("2-b", model._rev)
+        self.assertEqual("2-b", dc.get(doc["_id"])["_rev"])
+        self.assertEqual((0, 1), (dc.hits, dc.misses))
+
+    def test_deleted_doc_is_removed_from_cache(self):
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+        dc.put(doc["_id"], doc)
+
+        (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.NOT_FOUND, {"error": "not_found"})
+        self.assertFalse(is_ok)
+        self.assertIsNone(model)
+        self.assertEqual(0, len(dc))
+
+    def test_server_error_leaves_cached_doc(self):
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+        dc.put(doc["_id"], doc)
+
+        with mock.patch(__name__ + '.async_model_actions._logger'):
+            (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.SERVICE_UNAVAILABLE, {"error": "unavailable"})
+        self.assertFalse(is_ok)
+        self.assertIsNone(model)
+        self.assertEqual(doc, dc.get(doc["_id"]))
+        self.assertEqual((0, 0), (dc.hits, dc.misses))
+
+    def test_open_circuit_breaker_leaves_cached_doc(self):
+        circuit_breaker = mock.Mock()
+        circuit_breaker.allow_request.return_value = False
+        db = CouchDBDatabase(
+            "http://127.0.0.1:5984/%s" % uuid.uuid4().hex,
+            circuit_breaker=circuit_breaker)
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+        dc.put(doc["_id"], doc)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch") as fetch_patch:
+            with mock.patch(__name__ + '.async_model_actions._logger'):
+                amr = MyModelRetrieverByDocumentID(doc["_id"], None, db=db, document_cache=dc)
+                callback = mock.Mock()
+                amr.fetch(callback)
+
+        self.assertEqual(0, fetch_patch.call_count)
+        callback.assert_called_once_with(False, None, amr)
+        self.assertEqual(amr.fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN)
+        self.assertEqual(doc, dc.get(doc["_id"]))
+
+    def test_tampered_doc_is_not_cached(self):
+        dc = DocumentCache()
+        doc = {"_id": uuid.uuid4().hex, "_rev": "1-a"}
+
+        signer = mock.Mock()
+        signer.Verify.return_value = False
+        with mock.patch(__name__ + ".async_model_actions.tampering_signer", signer):
+            (request, is_ok, model) = self._fetch(dc, doc["_id"], httplib.OK, doc)
+        self.assertFalse(is_ok)
+        self.assertIsNone(model)
+        self.assertEqual(0, len(dc))
+
+
 class BaseAsyncModelRetrieverUnitTaseCase(unittest.TestCase):
     """A collection of unit tests for the BaseAsyncModelRetriever class."""
 
@@ -452,6 +2272,244 @@ class AsyncModelsRetrieverUnitTaseCase(unittest.TestCase):
         good.create_model_from_doc({})
 
 
+class MyModelsPageRetriever(AsyncModelsPageRetriever):
+
+    def create_model_from_doc(self, doc):
+        return MyModel(doc=doc)
+
+
+class AsyncModelsPageRetrieverUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AsyncModelsPageRetriever class."""
+
+    def _fetch(self, ampr, is_ok, rows):
+        requests = []
+
+        def fetch_patch(cac, request, callback):
+            requests.append(request)
+            callback(is_ok, False, {"rows": rows} if is_ok else None, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            callback = mock.Mock()
+            ampr.fetch(callback)
+
+        self.assertEqual(1, len(requests))
+        self.assertEqual(1, callback.call_count)
+        self.assertTrue(callback.call_args[0][3] is ampr)
+        query = dict(urlparse.parse_qsl(urlparse.urlparse(requests[0].url).query))
+        return (query, callback.call_args[0][0], callback.call_args[0][1], callback.call_args[0][2])
+
+    def _rows(self, ids):
+        return [{"id": _id, "key": ["k", _id], "value": None, "doc": {"_id": _id}} for _id in ids]
+
+    def test_ctr(self):
+        ampr = AsyncModelsPageRetriever("dd")
+        self.assertEqual("dd", ampr.design_doc)
+        self.assertIsNone(ampr.start_key)
+        self.assertIsNone(ampr.end_key)
+        self.assertEqual(100, ampr.page_size)
+        self.assertIsNone(ampr.cursor)
+        self.assertFalse(ampr.descending)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidPageCursorException):
+            AsyncModelsPageRetriever("dd", cursor="dave was here")
+
+    def test_page_through_view(self):
+        ampr = MyModelsPageRetriever("dd", start_key=["k"], end_key=["k", {}], page_size=2)
+        (query, is_ok, models, cursor) = self._fetch(ampr, True, self._rows(["1", "2", "3"]))
+
+        self.assertEqual("3", query["limit"])
+        self.assertEqual(["k"], json.loads(query["startkey"]))
+        self.assertEqual(["k", {}], json.loads(query["endkey"]))
+        self.assertNotIn("startkey_docid", query)
+        self.assertTrue(is_ok)
+        self.assertEqual(["1", "2"], [model._id for model in models])
+        self.assertIsNotNone(cursor)
+
+        ampr = MyModelsPageRetriever("dd", start_key=["k"], end_key=["k", {}], page_size=2, cursor=cursor)
+        (query, is_ok, models, cursor) = self._fetch(ampr, True, self._rows(["3"]))
+
+        self.assertEqual("3", query["limit"])
+        self.assertEqual(["k", "3"], json.loads(query["startkey"]))
+        self.assertEqual("3", query["startkey_docid"])
+        self.assertEqual(["k", {}], json.loads(query["endkey"]))
+        self.assertTrue(is_ok)
+        self.assertEqual(["3"], [model._id for model in models])
+        self.assertIsNone(cursor)
+
+    def test_cursor_from_different_view_or_query(self):
+        ampr = MyModelsPageRetriever("dd", end_key=["k", {}], page_size=2)
+        (query, is_ok, models, cursor) = self._fetch(ampr, True, self._rows(["1", "2", "3"]))
+        self.assertIsNotNone(cursor)
+
+        # same view and query but a different page size is fine
+        MyModelsPageRetriever("dd", end_key=["k", {}], page_size=10, cursor=cursor)
+
+        with self.assertRaises(InvalidPageCursorException):
+            MyModelsPageRetriever("dd2", end_key=["k", {}], page_size=2, cursor=cursor)
+        with self.assertRaises(InvalidPageCursorException):
+            MyModelsPageRetriever("dd", end_key=["j", {}], page_size=2, cursor=cursor)
+        with self.assertRaises(InvalidPageCursorException):
+            MyModelsPageRetriever("dd", end_key=["k", {}], page_size=2, cursor=cursor, descending=True)
+
+    def test_descending(self):
+        ampr = MyModelsPageRetriever("dd", page_size=1, descending=True)
+        (query, is_ok, models, cursor) = self._fetch(ampr, True, self._rows(["1"]))
+        self.assertEqual("true", query["descending"])
+
+    def test_error(self):
+        ampr = MyModelsPageRetriever("dd")
+        (query, is_ok, models, cursor) = self._fetch(ampr, False, None)
+        self.assertFalse(is_ok)
+        self.assertIsNone(models)
+        self.assertIsNone(cursor)
+
+
+class MyMultiKeyModelsRetriever(AsyncMultiKeyModelsRetriever):
+
+    def create_model_from_doc(self, doc):
+        return MyModel(doc=doc)
+
+
+class AsyncMultiKeyModelsRetrieverUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AsyncMultiKeyModelsRetriever class."""
+
+    def _fetch(self, amkmr, is_oks, rows):
+        requests = []
+
+        def fetch_patch(cac, request, callback):
+            i = len(requests)
+            requests.append(request)
+            callback(is_oks[i], False, {"rows": rows[i]} if is_oks[i] else None, None, None, cac)
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            callback = mock.Mock()
+            amkmr.fetch(callback)
+
+        self.assertEqual(1, callback.call_count)
+        self.assertTrue(callback.call_args[0][2] is amkmr)
+        return (requests, callback.call_args[0][0], callback.call_args[0][1])
+
+    def test_ctr(self):
+        the_design_doc = uuid.uuid4().hex
+        the_keys = [uuid.uuid4().hex]
+        the_async_state = uuid.uuid4().hex
+
+        amkmr = AsyncMultiKeyModelsRetriever(the_design_doc, the_keys, the_async_state)
+
+        self.assertTrue(amkmr.design_doc is the_design_doc)
+        self.assertTrue(amkmr.keys is the_keys)
+        self.assertTrue(amkmr.async_state is the_async_state)
+        self.assertEqual(100, amkmr.max_keys_per_request)
+
+    def test_implementation_for_create_model_from_doc_required(self):
+        amkmr = AsyncMultiKeyModelsRetriever("dd", [])
+        with self.assertRaises(NotImplementedError):
+            amkmr.create_model_from_doc({})
+
+    def test_no_keys(self):
+        (requests, is_ok, models_by_key) = self._fetch(MyMultiKeyModelsRetriever("dd", []), [], [])
+        self.assertEqual(0, len(requests))
+        self.assertTrue(is_ok)
+        self.assertEqual({}, models_by_key)
+
+    def test_all_good(self):
+        rows = [
+            {"id": "1", "key": "a", "value": None, "doc": {"_id": "1", "_rev": "1-1"}},
+            {"id": "2", "key": "a", "value": None, "doc": {"_id": "2", "_rev": "1-2"}},
+            {"id": "3", "key": ["c", 1], "value": None, "doc": {"_id": "3", "_rev": "1-3"}},
+        ]
+        amkmr = MyMultiKeyModelsRetriever("dd", ["a", "b", ["c", 1]])
+        (requests, is_ok, models_by_key) = self._fetch(amkmr, [True], [rows])
+
+        self.assertEqual(1, len(requests))
+        self.assertEqual("POST", requests[0].method)
+        self.assertTrue(requests[0].url.endswith("/_design/dd/_view/dd?include_docs=true"))
+        self.assertEqual({"keys": ["a", "b", ["c", 1]]}, json.loads(requests[0].body))
+
+        self.assertTrue(is_ok)
+        self.assertEqual(["1", "2"], [model._id for model in models_by_key["a"]])
+        self.assertEqual([], models_by_key["b"])
+        self.assertEqual(["3"], [model._id for model in models_by_key[("c", 1)]])
+
+    def test_keys_are_chunked(self):
+        rows = [
+            [{"id": "1", "key": "a", "value": None, "doc": {"_id": "1"}}],
+            [{"id": "3", "key": "c", "value": None, "doc": {"_id": "3"}}],
+        ]
+        amkmr = MyMultiKeyModelsRetriever("dd", ["a", "b", "c"], max_keys_per_request=2)
+        (requests, is_ok, models_by_key) = self._fetch(amkmr, [True, True], rows)
+
+        self.assertEqual(2, len(requests))
+        self.assertEqual({"keys": ["a", "b"]}, json.loads(requests[0].body))
+        self.assertEqual({"keys": ["c"]}, json.loads(requests[1].body))
+        self.assertTrue(is_ok)
+        self.assertEqual(["a", "b", "c"], sorted(models_by_key.keys()))
+        self.assertEqual(["3"], [model._id for model in models_by_key["c"]])
+
+    def test_error_on_one_chunk(self):
+        amkmr = MyMultiKeyModelsRetriever("dd", ["a", "b", "c"], max_keys_per_request=1)
+        (requests, is_ok, models_by_key) = self._fetch(amkmr, [True, False, True], [[], None, []])
+        self.assertEqual(3, len(requests))
+        self.assertFalse(is_ok)
+        self.assertIsNone(models_by_key)
+
+
+class AsyncModelsRetrieverStreamUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for AsyncModelsRetriever.stream()."""
+
+    class MyModelsRetriever(AsyncModelsRetriever):
+
+        def create_model_from_doc(self, doc):
+            return MyModel(doc=doc)
+
+    def _stream(self, code, chunks):
+        response = mock.Mock()
+        response.code = code
+        response.error = None
+        response.body = None
+        response.time_info = {}
+        response.effective_url = "http://www.example.com/%s" % uuid.uuid4().hex
+        response.request_time = 0.01
+        response.request = mock.Mock()
+        response.request.method = "GET"
+
+        streamed = []
+
+        def fetch_patch(request, callback):
+            for chunk in chunks:
+                request.streaming_callback(chunk)
+                # each model is handed over as soon as its row is parsed
+                streamed.append(len(model_callback.call_args_list))
+            callback(response)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            amr = type(self).MyModelsRetriever("dd")
+            model_callback = mock.Mock()
+            callback = mock.Mock()
+            amr.stream(model_callback, callback)
+
+        return (amr, model_callback, callback, streamed)
+
+    def test_happy_path(self):
+        chunks = [
+            '{"total_rows":2,"offset":0,"rows":[{"id":"1","key":"a","value":null,',
+            '"doc":{"_id":"1"}},{"id":"2","key":"b"',
+            ',"value":null,"doc":{"_id":"2"}}]}',
+        ]
+        (amr, model_callback, callback, streamed) = self._stream(httplib.OK, chunks)
+        self.assertEqual([0, 1, 2], streamed)
+        self.assertEqual(["1", "2"], [c[0][0]._id for c in model_callback.call_args_list])
+        self.assertTrue(all(c[0][1] is amr for c in model_callback.call_args_list))
+        callback.assert_called_once_with(True, 2, amr)
+
+    def test_error(self):
+        chunks = ['{"error":"not_found","reason":"missing"}']
+        (amr, model_callback, callback, streamed) = self._stream(httplib.NOT_FOUND, chunks)
+        self.assertEqual(0, model_callback.call_count)
+        callback.assert_called_once_with(False, None, amr)
+
+
 class AsyncPersisterUnitTaseCase(unittest.TestCase):
     """A collection of unit tests for the AsyncPersister class."""
 
@@ -530,6 +2588,156 @@ class AsyncPersisterUnitTaseCase(unittest.TestCase):
                 the_ap.persist(callback)
 
 
+class BulkDocsWriteCoalescerUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the BulkDocsWriteCoalescer class."""
+
+    def _fetch_patch(self, is_ok, results, requests):
+
+        def fetch_patch(cac, request, callback):
+            requests.append(request)
+            callback(is_ok, False, results, None, None, cac)
+
+        return mock.patch(
+            __name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch",
+            fetch_patch)
+
+    def test_ctr(self):
+        wc = BulkDocsWriteCoalescer()
+        self.assertEqual(100, wc.max_batch_size)
+        self.assertEqual(10, wc.max_wait_in_ms)
+        self.assertIsNotNone(wc.db)
+
+    def test_flush_on_max_batch_size(self):
+        the_results = [
+            {"ok": True, "id": uuid.uuid4().hex, "rev": uuid.uuid4().hex},
+            {"id": uuid.uuid4().hex, "error": "conflict", "reason": "Document update conflict."},
+            {"id": uuid.uuid4().hex, "error": "forbidden", "reason": "bad"},
+        ]
+        requests = []
+        with self._fetch_patch(True, the_results, requests):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                io_loop = current_patch.return_value
+
+                wc = BulkDocsWriteCoalescer(max_batch_size=3)
+                callbacks = [mock.Mock(), mock.Mock(), mock.Mock()]
+                docs = [{"type": "mymodel_v1.0", "i": i} for i in range(len(callbacks))]
+
+                wc.persist(docs[0], callbacks[0])
+                wc.persist(docs[1], callbacks[1])
+                self.assertEqual(0, len(requests))
+                self.assertEqual(1, io_loop.add_timeout.call_count)
+
+                wc.persist(docs[2], callbacks[2])
+                self.assertEqual(1, len(requests))
+                io_loop.remove_timeout.assert_called_once_with(io_loop.add_timeout.return_value)
+
+        self.assertTrue(requests[0].url.endswith("/_bulk_docs"))
+        self.assertEqual("POST", requests[0].method)
+        self.assertEqual({"docs": docs}, json.loads(requests[0].body))
+
+        self.assertEqual(
+            callbacks[0].call_args[0][:5],
+            (True, False, None, the_results[0]["id"], the_results[0]["rev"]))
+        self.assertEqual(callbacks[1].call_args[0][:5], (False, True, None, None, None))
+        self.assertEqual(callbacks[2].call_args[0][:5], (False, False, None, None, None))
+
+    def test_flush_on_max_wait(self):
+        requests = []
+        with self._fetch_patch(True, [{"ok": True, "id": "1", "rev": "1-a"}], requests):
+            with mock.patch("tornado.ioloop.IOLoop.current") as current_patch:
+                io_loop = current_patch.return_value
+
+                wc = BulkDocsWriteCoalescer(max_wait_in_ms=25)
+                callback = mock.Mock()
+                wc.persist({"type": "mymodel_v1.0"}, callback)
+                self.assertEqual(0, len(requests))
+
+                self.assertEqual(1, io_loop.add_timeout.call_count)
+                (delay, timeout_callback) = io_loop.add_timeout.call_args[0]
+                self.assertEqual(0.025, delay.total_seconds())
+                timeout_callback()
+
+                self.assertEqual(1, len(requests))
+                self.assertEqual(callback.call_args[0][:5], (True, False, None, "1", "1-a"))
+
+                # nothing left to write
+                wc.flush()
+                self.assertEqual(1, len(requests))
+
+    def test_bulk_docs_request_fails(self):
+        requests = []
+        with self._fetch_patch(False, None, requests):
+            wc = BulkDocsWriteCoalescer(max_batch_size=2)
+            callbacks = [mock.Mock(), mock.Mock()]
+            wc.persist({"type": "mymodel_v1.0"}, callbacks[0])
+            wc.persist({"type": "mymodel_v1.0"}, callbacks[1])
+
+        for callback in callbacks:
+            self.assertEqual(callback.call_args[0][:5], (False, False, None, None, None))
+
+    def test_deadline_is_earliest_deadline(self):
+        now = time.time()
+        requests = []
+        with self._fetch_patch(False, None, requests):
+            wc = BulkDocsWriteCoalescer(max_batch_size=3)
+            wc.persist({"type": "mymodel_v1.0"}, mock.Mock(), now + 60)
+            wc.persist({"type": "mymodel_v1.0"}, mock.Mock())
+            wc.persist({"type": "mymodel_v1.0"}, mock.Mock(), now + 30)
+            wc.persist({"type": "mymodel_v1.0"}, mock.Mock())
+            wc.flush()
+
+        self.assertEqual(2, len(requests))
+        self.assertEqual(now + 30, requests[0].deadline)
+        self.assertTrue(requests[0].request_timeout <= 30)
+        self.assertIsNone(requests[1].deadline)
+
+    def test_deadline_passed(self):
+        requests = []
+        with self._fetch_patch(True, [{"ok": True, "id": "1", "rev": "1-a"}], requests):
+            wc = BulkDocsWriteCoalescer(max_batch_size=1)
+            callback = mock.Mock()
+            wc.persist({"type": "mymodel_v1.0"}, callback, time.time() - 1)
+
+        self.assertEqual(0, len(requests))
+        self.assertEqual(callback.call_args[0][:5], (False, False, None, None, None))
+        self.assertEqual(callback.call_args[0][5].fetch_failure_detail, CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED)
+
+    def test_each_doc_is_signed(self):
+        signer = mock.Mock()
+        signer.Sign.return_value = "sig"
+        requests = []
+        with self._fetch_patch(True, [{"ok": True, "id": "1", "rev": "1-a"}], requests):
+            with mock.patch(__name__ + ".async_model_actions.tampering_signer", signer):
+                wc = BulkDocsWriteCoalescer(max_batch_size=1)
+                wc.persist({"type": "mymodel_v1.0"}, mock.Mock())
+
+        body = json.loads(requests[0].body)
+        self.assertEqual(["docs"], body.keys())
+        self.assertEqual(1, signer.Sign.call_count)
+        self.assertIn("sig", body["docs"][0].values())
+
+    def test_persister_with_write_coalescer(self):
+        the_model = MyModel(doc={})
+        the_id = uuid.uuid4().hex
+        the_rev = uuid.uuid4().hex
+        requests = []
+        with self._fetch_patch(True, [{"ok": True, "id": the_id, "rev": the_rev}], requests):
+            wc = BulkDocsWriteCoalescer(max_batch_size=1)
+            the_ap = AsyncPersister(the_model, [], None, write_coalescer=wc)
+            callback = mock.Mock()
+            the_ap.persist(callback)
+            callback.assert_called_once_with(True, False, the_ap)
+
+        self.assertEqual(the_model._id, the_id)
+        self.assertEqual(the_model._rev, the_rev)
+
+    def test_persister_with_write_coalescer_and_invalid_type_property(self):
+        wc = BulkDocsWriteCoalescer()
+        the_ap = AsyncPersister(MyModelWithBadType(doc={}), [], None, write_coalescer=wc)
+        with self.assertRaises(InvalidTypeInDocForStoreException):
+            the_ap.persist(mock.Mock())
+
+
 class AsyncDeleterUnitTaseCase(unittest.TestCase):
     """A collection of unit tests for the AsyncDeleter class."""
 
@@ -624,6 +2832,386 @@ class AsyncDeleterUnitTaseCase(unittest.TestCase):
             callback.assert_called_once_with(True, False, ad)
 
 
+class MyModelUpdater(AsyncModelUpdater):
+
+    def create_model_from_doc(self, doc):
+        model = MyModel(doc=doc)
+        model.color = doc.get("color")
+        return model
+
+
+class ImmediateRetryStrategy(object):
+    """A retry strategy which retries (after pretending to wait
+    ```waited_in_ms```) at most ```max_num_retries``` times.
+    """
+
+    def __init__(self, max_num_retries=3, waited_in_ms=10):
+        object.__init__(self)
+
+        self.max_num_retries = max_num_retries
+        self.waited_in_ms = waited_in_ms
+        self.num_retries = 0
+        self.deadline = None
+
+    def reset(self):
+        self.num_retries = 0
+
+    def wait(self, callback, *callback_args, **callback_kwargs):
+        self.num_retries += 1
+        waited_in_ms = self.waited_in_ms if self.num_retries < self.max_num_retries else 0
+        callback(waited_in_ms, *callback_args, **callback_kwargs)
+
+
+class ImmediateBudgetedRetryStrategy(RetryStrategy):
+    """A retry strategy which retries (after pretending to wait
+    ```waited_in_ms```) as permitted by ```RetryStrategy.next_attempt()```
+    and so by the strategy's retry budget.
+    """
+
+    def __init__(self, max_num_retries=3, retry_budget=None, waited_in_ms=10):
+        RetryStrategy.__init__(self, max_num_retries=max_num_retries, retry_budget=retry_budget)
+
+        self.waited_in_ms = waited_in_ms
+
+    def wait(self, callback, *callback_args, **callback_kwargs):
+        waited_in_ms = self.waited_in_ms if self.next_attempt(self.waited_in_ms) else 0
+        callback(waited_in_ms, *callback_args, **callback_kwargs)
+
+
+class AsyncModelUpdaterUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AsyncModelUpdater class."""
+
+    def setUp(self):
+        self._logger_patcher = mock.patch(__name__ + ".async_model_actions._logger")
+        self._logger_patcher.start()
+
+    def tearDown(self):
+        self._logger_patcher.stop()
+
+    def _update(self, amu, responses):
+        """```responses``` is a list of (response code, response body as dict)
+        tuples - one per request ```amu``` is expected to send to CouchDB.
+        Returns the requests ```amu``` sent to CouchDB and the arguments
+        ```amu```'s callback was called with.
+        """
+        responses = list(responses)
+        requests = []
+
+        def fetch_patch(request, callback):
+            requests.append(request)
+            (code, body_as_dict) = responses.pop(0)
+            response = mock.Mock()
+            response.code = code
+            response.error = None
+            response.body = json.dumps(body_as_dict) if body_as_dict is not None else None
+            response.headers = {}
+            response.time_info = {}
+            response.request_time = 0.01
+            response.effective_url = request.url
+            response.request = request
+            callback(response)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            callback = mock.Mock()
+            amu.update(callback)
+            self.assertEqual(1, callback.call_count)
+
+        self.assertEqual([], responses)
+        return (requests, callback.call_args[0])
+
+    def _set_color(self, color):
+        def mutate(model):
+            if model.color == color:
+                return False
+            model.color = color
+            return True
+        return mutate
+
+    def test_ctr(self):
+        document_id = uuid.uuid4().hex
+        mutate = mock.Mock()
+        async_state = mock.Mock()
+
+        amu = MyModelUpdater(document_id, mutate, async_state=async_state)
+        self.assertEqual(document_id, amu.document_id)
+        self.assertTrue(amu.mutate is mutate)
+        self.assertEqual([], amu.model_as_doc_for_store_args)
+        self.assertIsNone(amu.create_retry_strategy)
+        self.assertTrue(amu.async_state is async_state)
+        self.assertIsNone(amu.deadline)
+        self.assertEqual(0, amu.num_attempts)
+        self.assertEqual(0, amu.num_conflicts)
+        self.assertEqual(0, amu.waited_in_ms)
+
+    def test_create_model_from_doc_not_implemented(self):
+        amu = AsyncModelUpdater(uuid.uuid4().hex, mock.Mock())
+        with self.assertRaises(NotImplementedError):
+            amu.create_model_from_doc({})
+
+    def test_happy_path(self):
+        document_id = uuid.uuid4().hex
+        amu = MyModelUpdater(document_id, self._set_color("green"))
+        (requests, callback_args) = self._update(
+            amu,
+            [
+                (httplib.OK, {"_id": document_id, "_rev": "1-a", "color": "red"}),
+                (httplib.CREATED, {"id": document_id, "rev": "2-b"}),
+            ])
+
+        self.assertEqual(["GET", "PUT"], [request.method for request in requests])
+        self.assertTrue(requests[0].url.endswith("/%s" % document_id))
+        self.assertEqual("1-a", json.loads(requests[1].body)["_rev"])
+
+        (is_ok, is_conflict, model, the_amu) = callback_args
+        self.assertTrue(is_ok)
+        self.assertFalse(is_conflict)
+        self.assertEqual("green", model.color)
+        self.assertEqual("2-b", model._rev)
+        self.assertTrue(the_amu is amu)
+
+        self.assertEqual(1, amu.num_attempts)
+        self.assertEqual(0, amu.num_conflicts)
+        self.assertEqual(0, amu.waited_in_ms)
+
+    def test_no_change_required(self):
+        document_id = uuid.uuid4().hex
+        amu = MyModelUpdater(document_id, self._set_color("green"))
+        (requests, callback_args) = self._update(
+            amu,
+            [
+                (httplib.OK, {"_id": document_id, "_rev": "1-a", "color": "green"}),
+            ])
+
+        (is_ok, is_conflict, model, _) = callback_args
+        self.assertTrue(is_ok)
+        self.assertFalse(is_conflict)
+        self.assertEqual("1-a", model._rev)
+
+    def test_document_not_found(self):
+        amu = MyModelUpdater(uuid.uuid4().hex, self._set_color("green"))
+        (requests, callback_args) = self._update(amu, [(httplib.NOT_FOUND, None)])
+        self.assertEqual((True, False, None, amu), callback_args)
+        self.assertEqual(0, amu.num_attempts)
+
+    def test_error_on_fetch(self):
+        amu = MyModelUpdater(uuid.uuid4().hex, self._set_color("green"))
+        (requests, callback_args) = self._update(amu, [(httplib.INTERNAL_SERVER_ERROR, None)])
+        self.assertEqual((False, False, None, amu), callback_args)
+
+    def test_error_on_persist(self):
+        document_id = uuid.uuid4().hex
+        amu = MyModelUpdater(document_id, self._set_color("green"))
+        (requests, callback_args) = self._update(
+            amu,
+            [
+                (httplib.OK, {"_id": document_id, "_rev": "1-a", "color": "red"}),
+                (httplib.INTERNAL_SERVER_ERROR, None),
+            ])
+        self.assertEqual((False, False, None, amu), callback_args)
+
+    def test_conflict_rereads_by_document_id_and_reapplies_mutate(self):
+        document_id = uuid.uuid4().hex
+        mutate = mock.Mock(side_effect=self._set_color("green"))
+        amu = MyModelUpdater(
+            document_id,
+            mutate,
+            create_retry_strategy=ImmediateRetryStrategy)
+        (requests, callback_args) = self._update(
+            amu,
+            [
+                (httplib.OK, {"_id": document_id, "_rev": "1-a", "color": "red"}),
+                (httplib.CONFLICT, None),
+                (httplib.OK, {"_id": document_id, "_rev": "2-b", "color": "blue"}),
+                (httplib.CREATED, {"id": document_id, "rev": "3-c"}),
+            ])
+
+        self.assertEqual(
+            ["GET", "PUT", "GET", "PUT"],
+            [request.method for request in requests])
+        self.assertEqual(requests[0].url, requests[2].url)
+        self.assertEqual("2-b", json.loads(requests[3].body)["_rev"])
+
+        (is_ok, is_conflict, model, _) = callback_args
+        self.assertTrue(is_ok)
+        self.assertFalse(is_conflict)
+        self.assertEqual("3-c", model._rev)
+
+        self.assertEqual(2, mutate.call_count)
+        self.assertEqual(2, amu.num_attempts)
+        self.assertEqual(1, amu.num_conflicts)
+        self.assertEqual(10, amu.waited_in_ms)
+
+    def test_conflict_retries_exhausted(self):
+        document_id = uuid.uuid4().hex
+        amu = MyModelUpdater(
+            document_id,
+            self._set_color("green"),
+            create_retry_strategy=lambda: ImmediateRetryStrategy(max_num_retries=2))
+        (requests, callback_args) = self._update(
+            amu,
+            [
+                (httplib.OK, {"_id": document_id, "_rev": "1-a", "color": "red"}),
+                (httplib.CONFLICT, None),
+                (httplib.OK, {"_id": document_id, "_rev": "2-b", "color": "red"}),
+                (httplib.CONFLICT, None),
+            ])
+
+        self.assertEqual((False, True, None, amu), callback_args)
+        self.assertEqual(2, amu.num_attempts)
+        self.assertEqual(2, amu.num_conflicts)
+        self.assertEqual(10, amu.waited_in_ms)
+
+    def test_default_retry_strategy(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        deadline = uuid.uuid4().hex
+        amu = MyModelUpdater(uuid.uuid4().hex, mock.Mock(), db=db, deadline=deadline)
+        with mock.patch(__name__ + ".async_model_actions.ExponentialBackoffRetryStrategy") as rs_patch:
+            with mock.patch.object(amu, "_fetch"):
+                amu.update()
+        rs_patch.assert_called_once_with(request_metrics=db.request_metrics, deadline=deadline)
+
+    def test_deadline_applied_to_created_retry_strategy(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        for (rs_deadline, deadline, expected_deadline) in [(None, 1000.0, 1000.0),
+                                                           (2000.0, 1000.0, 1000.0),
+                                                           (500.0, 1000.0, 500.0),
+                                                           (500.0, None, 500.0)]:
+            rs = ExponentialBackoffRetryStrategy(deadline=rs_deadline)
+            amu = MyModelUpdater(
+                uuid.uuid4().hex,
+                mock.Mock(),
+                create_retry_strategy=lambda: rs,
+                db=db,
+                deadline=deadline)
+            with mock.patch.object(amu, "_fetch"):
+                amu.update()
+            self.assertEqual(expected_deadline, rs.deadline)
+
+
+class AsyncDocumentUpdaterUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AsyncDocumentUpdater class."""
+
+    def setUp(self):
+        self._logger_patcher = mock.patch(__name__ + ".async_model_actions._logger")
+        self._logger_patcher.start()
+
+    def tearDown(self):
+        self._logger_patcher.stop()
+
+    def _update(self, adu, code, headers=None, body=None):
+        response = mock.Mock()
+        response.code = code
+        response.error = None
+        response.body = body
+        response.headers = headers if headers is not None else {}
+        response.time_info = {}
+        response.request_time = 0.01
+        response.effective_url = "http://www.example.com/%s" % uuid.uuid4().hex
+
+        requests = []
+
+        def fetch_patch(request, callback):
+            requests.append(request)
+            response.request = request
+            callback(response)
+
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            callback = mock.Mock()
+            adu.update(callback)
+            callback.assert_called_once_with(code in (httplib.OK, httplib.CREATED), code == httplib.CONFLICT, adu)
+
+        self.assertEqual(1, len(requests))
+        return requests[0]
+
+    def test_ctr(self):
+        design_doc = uuid.uuid4().hex
+        update_handler = uuid.uuid4().hex
+        async_state = mock.Mock()
+
+        adu = AsyncDocumentUpdater(design_doc, update_handler, async_state=async_state)
+        self.assertEqual(design_doc, adu.design_doc)
+        self.assertEqual(update_handler, adu.update_handler)
+        self.assertIsNone(adu.document_id)
+        self.assertIsNone(adu.body_as_dict)
+        self.assertIsNone(adu.query)
+        self.assertTrue(adu.async_state is async_state)
+        self.assertIsNone(adu._id)
+        self.assertIsNone(adu._rev)
+        self.assertIsNone(adu.response_body)
+
+    def test_tampering_signer_not_supported(self):
+        with mock.patch(__name__ + ".async_model_actions.tampering_signer", mock.Mock()):
+            with self.assertRaises(ValueError):
+                AsyncDocumentUpdater("fruit_updates", "change_color", document_id=uuid.uuid4().hex)
+
+    def test_tampering_signer_of_db_not_supported(self):
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex, tampering_signer=mock.Mock())
+        with self.assertRaises(ValueError):
+            AsyncDocumentUpdater("fruit_updates", "change_color", db=db)
+
+    def test_update_existing_document(self):
+        document_id = "a/%s" % uuid.uuid4().hex
+        _rev = "2-%s" % uuid.uuid4().hex
+        body_as_dict = {"color": "red"}
+        adu = AsyncDocumentUpdater(
+            "fruit_updates",
+            "change_color",
+            document_id=document_id,
+            body_as_dict=body_as_dict,
+            query={"source": "unit test"})
+        request = self._update(
+            adu,
+            httplib.CREATED,
+            headers={"X-Couch-Id": document_id, "X-Couch-Update-NewRev": _rev},
+            body='{"color": "red"}')
+
+        self.assertEqual("PUT", request.method)
+        url = urlparse.urlparse(request.url)
+        expected_path = "/_design/fruit_updates/_update/change_color/a%%2F%s" % document_id[2:]
+        self.assertTrue(url.path.endswith(expected_path))
+        self.assertEqual({"source": ["unit test"]}, urlparse.parse_qs(url.query))
+        self.assertEqual(body_as_dict, json.loads(request.body))
+
+        self.assertEqual(document_id, adu._id)
+        self.assertEqual(_rev, adu._rev)
+        self.assertEqual('{"color": "red"}', adu.response_body)
+
+    def test_create_document(self):
+        _id = uuid.uuid4().hex
+        _rev = "1-%s" % uuid.uuid4().hex
+        adu = AsyncDocumentUpdater("fruit_updates", "create")
+        request = self._update(
+            adu,
+            httplib.CREATED,
+            headers={"X-Couch-Id": _id, "X-Couch-Update-NewRev": _rev})
+
+        self.assertEqual("POST", request.method)
+        self.assertTrue(urlparse.urlparse(request.url).path.endswith("/_design/fruit_updates/_update/create"))
+        self.assertEqual({}, json.loads(request.body))
+
+        self.assertEqual(_id, adu._id)
+        self.assertEqual(_rev, adu._rev)
+
+    def test_no_document_saved(self):
+        adu = AsyncDocumentUpdater("fruit_updates", "change_color", document_id=uuid.uuid4().hex)
+        self._update(adu, httplib.OK, body="nothing to do")
+        self.assertIsNone(adu._id)
+        self.assertIsNone(adu._rev)
+        self.assertEqual("nothing to do", adu.response_body)
+
+    def test_conflict(self):
+        adu = AsyncDocumentUpdater("fruit_updates", "change_color", document_id=uuid.uuid4().hex)
+        self._update(adu, httplib.CONFLICT)
+        self.assertIsNone(adu._rev)
+        self.assertIsNone(adu.response_body)
+
+    def test_error(self):
+        adu = AsyncDocumentUpdater("fruit_updates", "change_color", document_id=uuid.uuid4().hex)
+        self._update(adu, httplib.NOT_FOUND)
+        self.assertIsNone(adu._rev)
+        self.assertIsNone(adu.response_body)
+
+
 class AsyncCouchDBHealthCheckCheckUnitTaseCase(unittest.TestCase):
     """A collection of unit tests for the AsyncCouchDBHealthCheck class."""
 
@@ -663,6 +3251,288 @@ class AsyncCouchDBHealthCheckCheckUnitTaseCase(unittest.TestCase):
             callback.called_once_with(True, the_achc)
 
 
+class AsyncChangesFollowerUnitTaseCase(unittest.TestCase):
+    """A collection of unit tests for the AsyncChangesFollower class."""
+
+    def _follow(self, acf, responses, stop_after_num_batches=1):
+        """Follow ```acf```'s feed. ```responses``` is a list of
+        (is_ok, response_body, chunks) tuples - one per request.
+        Requests which aren't ok fail as if they had timed out.
+        """
+        requests = []
+        batches = []
+
+        def fetch_patch(cac, request, callback):
+            (is_ok, response_body, chunks) = responses[len(requests)]
+            requests.append(request)
+            for chunk in chunks:
+                request.streaming_callback(chunk)
+            cac.fetch_failure_detail = type(cac).FFD_OK if is_ok else type(cac).FFD_TRANSPORT_ERROR
+            callback(is_ok, False, response_body, None, None, cac)
+
+        def changes_callback(changes, since, acf):
+            batches.append((changes, since))
+            if stop_after_num_batches <= len(batches):
+                acf.stop()
+
+        with mock.patch(__name__ + ".async_model_actions.CouchDBAsyncHTTPClient.fetch", fetch_patch):
+            callback = mock.Mock()
+            acf.follow(changes_callback, callback)
+
+        queries = [dict(urlparse.parse_qsl(urlparse.urlparse(request.url).query)) for request in requests]
+        return (queries, batches, callback)
+
+    def test_ctr(self):
+        acf = AsyncChangesFollower()
+        self.assertEqual(0, acf.since)
+        self.assertEqual(AsyncChangesFollower.FEED_LONGPOLL, acf.feed)
+        self.assertIsNone(acf.filter)
+        self.assertFalse(acf.include_docs)
+
+    def test_longpoll(self):
+        responses = [
+            (True, {"results": [], "last_seq": "1-a"}, []),
+            (True, {"results": [{"seq": "2-b", "id": "x"}], "last_seq": "2-b"}, []),
+        ]
+        acf = AsyncChangesFollower(
+            filter="_view",
+            filter_params={"view": "dd/dd"},
+            include_docs=True)
+        (queries, batches, callback) = self._follow(acf, responses)
+
+        # stop() was called while the follower wasn't waiting on CouchDB
+        # so the follower stopped without issuing another request
+        self.assertEqual(2, len(queries))
+        self.assertEqual("longpoll", queries[0]["feed"])
+        self.assertNotIn("heartbeat", queries[0])
+        self.assertEqual("0", queries[0]["since"])
+        self.assertEqual("true", queries[0]["include_docs"])
+        self.assertEqual("_view", queries[0]["filter"])
+        self.assertEqual("dd/dd", queries[0]["view"])
+        self.assertEqual("1-a", queries[1]["since"])
+
+        self.assertEqual([([{"seq": "2-b", "id": "x"}], "2-b")], batches)
+        self.assertEqual("2-b", acf.since)
+        callback.assert_called_once_with(True, acf)
+
+    def test_continuous(self):
+        chunks = [
+            '{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n{"seq":"2-b",',
+            '"id":"y","changes":[{"rev":"1-y"}]}\n\n',
+            '{"last_seq":"2-b","pending":0}\n',
+        ]
+        responses = [
+            (True, {}, chunks),
+            (True, {}, ['{"seq":"3-c","id":"z","changes":[{"rev":"1-z"}]}\n']),
+        ]
+        acf = AsyncChangesFollower(since="now", feed=AsyncChangesFollower.FEED_CONTINUOUS)
+        (queries, batches, callback) = self._follow(acf, responses, stop_after_num_batches=3)
+
+        self.assertEqual(2, len(queries))
+        self.assertEqual("continuous", queries[0]["feed"])
+        self.assertEqual("now", queries[0]["since"])
+        self.assertEqual("10000", queries[0]["heartbeat"])
+        self.assertEqual("2-b", queries[1]["since"])
+        self.assertEqual(["1-a", "2-b", "3-c"], [batch[1] for batch in batches])
+        self.assertEqual(["x", "y", "z"], [batch[0][0]["id"] for batch in batches])
+        callback.assert_called_once_with(True, acf)
+
+    def test_continuous_reconnect_after_malformed_line(self):
+        chunks = [
+            '{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n{"seq":"2-b","id":"y"\n',
+            '{"seq":"3-c","id":"z","changes":[{"rev":"1-z"}]}\n',
+        ]
+        responses = [
+            (True, {}, chunks),
+            (True, {}, ['{"seq":"2-b","id":"y","changes":[{"rev":"1-y"}]}\n']),
+        ]
+        rs = mock.Mock()
+        rs.wait.side_effect = lambda callback: callback(25)
+        acf = AsyncChangesFollower(feed=AsyncChangesFollower.FEED_CONTINUOUS, create_retry_strategy=lambda: rs)
+        with mock.patch(__name__ + ".async_model_actions._logger") as logger_patch:
+            (queries, batches, callback) = self._follow(acf, responses, stop_after_num_batches=2)
+
+        self.assertEqual(1, logger_patch.error.call_count)
+        self.assertEqual(1, rs.wait.call_count)
+
+        # the changes before the malformed line are delivered, the rest
+        # of the first request's response is ignored and the follower
+        # reconnects from the last delivered sequence
+        self.assertEqual(2, len(queries))
+        self.assertEqual("1-a", queries[1]["since"])
+        self.assertEqual([("x", "1-a"), ("y", "2-b")], [(batch[0][0]["id"], batch[1]) for batch in batches])
+        self.assertEqual("2-b", acf.since)
+        callback.assert_called_once_with(True, acf)
+
+    def test_continuous_timeouts_after_streaming_are_not_errors(self):
+        # each request streams a batch of changes or a heartbeat
+        # and then times out
+        responses = [
+            (False, None, ['{"seq":"%d-a","id":"x%d","changes":[{"rev":"1-x"}]}\n' % (i, i)])
+            for i in range(1, 6)
+        ]
+        responses.insert(3, (False, None, ['\n']))
+        acf = AsyncChangesFollower(
+            feed=AsyncChangesFollower.FEED_CONTINUOUS,
+            create_retry_strategy=lambda: ImmediateRetryStrategy(max_num_retries=1))
+        (queries, batches, callback) = self._follow(acf, responses, stop_after_num_batches=5)
+
+        self.assertEqual(6, len(queries))
+        self.assertEqual(["0", "1-a", "2-a", "3-a", "3-a", "4-a"], [query["since"] for query in queries])
+        self.assertEqual(["1-a", "2-a", "3-a", "4-a", "5-a"], [batch[1] for batch in batches])
+        self.assertEqual("5-a", acf.since)
+        callback.assert_called_once_with(True, acf)
+
+    def test_continuous_chunks_reset_retry_strategy(self):
+        chunks = [
+            '{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n',
+            '\n',
+            '{"seq":"2-b","id":"y","changes":[{"rev":"1-y"}]}\n',
+        ]
+        rs = mock.Mock()
+        create_retry_strategy = mock.Mock(return_value=rs)
+        acf = AsyncChangesFollower(
+            feed=AsyncChangesFollower.FEED_CONTINUOUS,
+            create_retry_strategy=create_retry_strategy)
+        (queries, batches, callback) = self._follow(acf, [(True, {}, chunks)], stop_after_num_batches=2)
+
+        # one retry strategy for the life of the follower which is reset
+        # by each chunk and when the request succeeds
+        self.assertEqual(1, create_retry_strategy.call_count)
+        self.assertEqual(4, rs.reset.call_count)
+        callback.assert_called_once_with(True, acf)
+
+    def test_streaming_does_not_deposit_into_retry_budget(self):
+        chunks = [
+            '{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n',
+            '\n',
+            '\n',
+            '{"seq":"2-b","id":"y","changes":[{"rev":"1-y"}]}\n',
+        ]
+        responses = [
+            (True, {}, chunks[:2]),
+            (False, None, chunks[2:]),
+        ]
+        retry_budget = RetryBudget(retry_ratio=1, min_retries_per_second=0, max_num_tokens=100)
+        for i in range(50):
+            retry_budget.withdraw()
+        num_tokens = retry_budget.num_tokens
+        acf = AsyncChangesFollower(
+            feed=AsyncChangesFollower.FEED_CONTINUOUS,
+            create_retry_strategy=lambda: ExponentialBackoffRetryStrategy(retry_budget=retry_budget))
+        (queries, batches, callback) = self._follow(acf, responses, stop_after_num_batches=2)
+
+        self.assertEqual(2, len(queries))
+        self.assertEqual(2, len(batches))
+        # only the follower's first attempt deposited into the budget
+        self.assertEqual(num_tokens + 1, retry_budget.num_tokens)
+        callback.assert_called_once_with(True, acf)
+
+    def _follow_continuous_feed(self, responses):
+        """Follow a continuous feed using a ```CouchDBAsyncHTTPClient```.
+        ```responses``` is a list of (chunks, code, request_time) tuples
+        - one per request. ```request_time``` is a function of the request's
+        request timeout. Returns the follower's database.
+        """
+        db = CouchDBDatabase("http://127.0.0.1:5984/%s" % uuid.uuid4().hex)
+        responses = list(responses)
+
+        def fetch_patch(request, callback):
+            (chunks, code, request_time) = responses.pop(0)
+            for chunk in chunks:
+                request.streaming_callback(chunk)
+            callback(_create_mock_response(request, code, request_time=request_time(request.request_timeout)))
+
+        def changes_callback(changes, since, acf):
+            if not responses:
+                acf.stop()
+
+        acf = AsyncChangesFollower(
+            feed=AsyncChangesFollower.FEED_CONTINUOUS,
+            create_retry_strategy=lambda: ImmediateRetryStrategy(max_num_retries=2),
+            db=db)
+        with mock.patch("tornado.httpclient.AsyncHTTPClient.fetch", side_effect=fetch_patch):
+            with mock.patch(__name__ + ".async_model_actions._logger") as logger:
+                callback = mock.Mock()
+                acf.follow(changes_callback, callback)
+
+        self.assertEqual(0, len(responses))
+        callback.assert_called_once_with(True, acf)
+        return (db, logger)
+
+    def test_continuous_feed_timeout_is_not_an_error(self):
+        responses = [
+            (
+                ['{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n', '\n'],
+                599,
+                lambda request_timeout: request_timeout,
+            ),
+            (['{"seq":"2-b","id":"y","changes":[{"rev":"1-y"}]}\n'], httplib.OK, lambda request_timeout: 0.01),
+        ]
+        (db, logger) = self._follow_continuous_feed(responses)
+
+        self.assertEqual(0, db.request_metrics.counters.get("errors", 0))
+        self.assertEqual(0, logger.error.call_count)
+        # only the request which didn't time out is in the latency metrics
+        self.assertEqual(["2xx"], [series["status_class"] for series in db.request_metrics.snapshot()])
+
+    def test_continuous_feed_connection_failure_is_an_error(self):
+        responses = [
+            ([], 599, lambda request_timeout: 0.01),
+            (['{"seq":"1-a","id":"x","changes":[{"rev":"1-x"}]}\n'], httplib.OK, lambda request_timeout: 0.01),
+        ]
+        (db, logger) = self._follow_continuous_feed(responses)
+
+        self.assertEqual(1, db.request_metrics.counters.get("errors", 0))
+        self.assertEqual(1, logger.error.call_count)
+        self.assertEqual(["2xx", "error"], [series["status_class"] for series in db.request_metrics.snapshot()])
+
+    def test_reconnect_after_error(self):
+        responses = [
+            (False, None, []),
+            (True, {"results": [{"seq": "1-a", "id": "x"}], "last_seq": "1-a"}, []),
+        ]
+        rs = mock.Mock()
+        rs.wait.side_effect = lambda callback: callback(25)
+        acf = AsyncChangesFollower(create_retry_strategy=lambda: rs)
+        (queries, batches, callback) = self._follow(acf, responses)
+
+        self.assertEqual(2, len(queries))
+        self.assertEqual(1, rs.wait.call_count)
+        self.assertEqual(1, len(batches))
+        callback.assert_called_once_with(True, acf)
+
+    def test_give_up_reconnecting(self):
+        rs = mock.Mock()
+        rs.wait.side_effect = lambda callback: callback(0)
+        acf = AsyncChangesFollower(create_retry_strategy=lambda: rs)
+        (queries, batches, callback) = self._follow(acf, [(False, None, [])])
+
+        self.assertEqual(1, len(queries))
+        self.assertEqual([], batches)
+        callback.assert_called_once_with(False, acf)
+
+    def test_tampered_docs_are_removed(self):
+        results = [
+            {"seq": "1-a", "id": "x", "doc": {"_id": "x", "_rev": "1-x"}},
+            {"seq": "2-b", "id": "_design/dd", "doc": {"_id": "_design/dd", "_rev": "1-dd"}},
+            {"seq": "3-c", "id": "y", "doc": {"_id": "y", "_rev": "2-y", "_deleted": True}, "deleted": True},
+        ]
+        responses = [
+            (True, {"results": results, "last_seq": "3-c"}, []),
+            (True, {"results": [], "last_seq": "3-c"}, []),
+        ]
+        signer = mock.Mock()
+        acf = AsyncChangesFollower(include_docs=True)
+        with mock.patch(__name__ + ".async_model_actions.tampering_signer", signer):
+            (queries, batches, callback) = self._follow(acf, responses)
+
+        changes = batches[0][0]
+        self.assertIsNone(changes[0]["doc"])
+        self.assertIsNotNone(changes[1]["doc"])
+        self.assertIsNotNone(changes[2]["doc"])
+
+
 class ViewMetricsUnitTaseCase(unittest.TestCase):
     """A collection of unit tests for the ViewMetrics class."""
 
@@ -756,6 +3626,16 @@ class AsyncViewMetricsRetrieverUnitTaseCase(unittest.TestCase):
 
             the_avmr.fetch(callback)
 
+    def test_fetch_circuit_open(self):
+        with CouchDBAsyncHTTPClientPatcher(False, False, None, None, None, CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN):
+            callback = mock.Mock()
+
+            avmr = AsyncViewMetricsRetriever(mock.Mock())
+            avmr.fetch(callback)
+
+            callback.assert_called_once_with(False, None, avmr)
+            self.assertEqual(CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN, avmr.fetch_failure_detail)
+
     def test_fetch_invalid_response_body_no_view_index(self):
         the_is_ok = True
         the_is_conflict = False
@@ -896,6 +3776,37 @@ class AsyncAllViewMetricsRetrieverUnitTaseCase(unittest.TestCase):
             callback.assert_called_once_with(False, None, aavmr)
             self.assertEqual(type(aavmr).FFD_ERROR_TALKING_TO_COUCHDB, aavmr.fetch_failure_detail)
 
+    def test_fetch_load_shed(self):
+        with CouchDBAsyncHTTPClientPatcher(False, False, None, None, None, CouchDBAsyncHTTPClient.FFD_LOAD_SHED):
+            callback = mock.Mock()
+
+            aavmr = AsyncAllViewMetricsRetriever()
+            aavmr.fetch(callback)
+
+            callback.assert_called_once_with(False, None, aavmr)
+            self.assertEqual(CouchDBAsyncHTTPClient.FFD_LOAD_SHED, aavmr.fetch_failure_detail)
+
+    def test_fetch_view_metrics_deadline_exceeded(self):
+        the_response_body = {
+            'rows': [
+                {'key': '_design/fruit_by_fruit_id'},
+            ]
+        }
+
+        def fetch_patch(avmr, callback):
+            avmr.fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED
+            callback(False, None, avmr)
+
+        with CouchDBAsyncHTTPClientPatcher(True, False, the_response_body, None, None):
+            with mock.patch(__name__ + ".async_model_actions.AsyncViewMetricsRetriever.fetch", fetch_patch):
+                callback = mock.Mock()
+
+                aavmr = AsyncAllViewMetricsRetriever()
+                aavmr.fetch(callback)
+
+        callback.assert_called_once_with(False, None, aavmr)
+        self.assertEqual(CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED, aavmr.fetch_failure_detail)
+
     def test_fetch_database_has_no_design_docs_in_database(self):
         the_is_ok = True
         the_is_conflict = False
@@ -965,6 +3876,82 @@ class AsyncAllViewMetricsRetrieverUnitTaseCase(unittest.TestCase):
                 callback.assert_called_once_with(True, view_metrics, aavmr)
                 self.assertEqual(type(aavmr).FFD_OK, aavmr.fetch_failure_detail)
 
+    def _design_docs_response_body(self, design_docs):
+        return {
+            'rows': [{'key': '_design/%s' % design_doc} for design_doc in design_docs],
+        }
+
+    def test_fetch_concurrency_is_bounded(self):
+        design_docs = [uuid.uuid4().hex for i in range(7)]
+        fetches = []
+
+        def fetch_patch(avmr, callback):
+            fetches.append((avmr, callback))
+
+        with CouchDBAsyncHTTPClientPatcher(True, False, self._design_docs_response_body(design_docs), None, None):
+            with mock.patch(__name__ + ".async_model_actions.AsyncViewMetricsRetriever.fetch", fetch_patch):
+                callback = mock.Mock()
+
+                aavmr = AsyncAllViewMetricsRetriever(max_concurrency=3)
+                aavmr.fetch(callback)
+
+                num_completed = 0
+                while num_completed < len(design_docs):
+                    self.assertEqual(min(3, len(design_docs) - num_completed), len(fetches))
+                    (avmr, avmr_callback) = fetches.pop(0)
+                    self.assertEqual(design_docs[num_completed], avmr.design_doc)
+                    avmr_callback(True, ViewMetrics(avmr.design_doc, 1, 2), avmr)
+                    num_completed += 1
+
+                self.assertEqual(0, len(fetches))
+                self.assertEqual(1, callback.call_count)
+                (is_ok, view_metrics, the_aavmr) = callback.call_args[0]
+                self.assertTrue(is_ok)
+                self.assertEqual(design_docs, [vm.design_doc for vm in view_metrics])
+                self.assertEqual(type(aavmr).FFD_OK, aavmr.fetch_failure_detail)
+
+    def test_fetch_error_stops_starting_fetches(self):
+        design_docs = [uuid.uuid4().hex for i in range(5)]
+        fetches = []
+
+        def fetch_patch(avmr, callback):
+            fetches.append((avmr, callback))
+
+        with CouchDBAsyncHTTPClientPatcher(True, False, self._design_docs_response_body(design_docs), None, None):
+            with mock.patch(__name__ + ".async_model_actions.AsyncViewMetricsRetriever.fetch", fetch_patch):
+                callback = mock.Mock()
+
+                aavmr = AsyncAllViewMetricsRetriever(max_concurrency=2)
+                aavmr.fetch(callback)
+
+                (avmr, avmr_callback) = fetches.pop(0)
+                avmr_callback(False, None, avmr)
+                callback.assert_called_once_with(False, None, aavmr)
+                self.assertEqual(type(aavmr).FFD_ERROR_FETCHING_VIEW_METRICS, aavmr.fetch_failure_detail)
+
+                (avmr, avmr_callback) = fetches.pop(0)
+                avmr_callback(True, ViewMetrics(avmr.design_doc, 1, 2), avmr)
+                self.assertEqual(0, len(fetches))
+                self.assertEqual(1, callback.call_count)
+
+    def test_fetch_partial_results(self):
+        design_docs = [uuid.uuid4().hex for i in range(3)]
+        view_metrics = [
+            ViewMetrics(design_docs[0], 1, 2),
+            None,
+            ViewMetrics(design_docs[2], 3, 4),
+        ]
+        with CouchDBAsyncHTTPClientPatcher(True, False, self._design_docs_response_body(design_docs), None, None):
+            with AsyncViewMetricsRetrieverPatcher([True, False, True], view_metrics):
+                callback = mock.Mock()
+
+                aavmr = AsyncAllViewMetricsRetriever(allow_partial_results=True)
+                aavmr.fetch(callback)
+
+                callback.assert_called_once_with(True, [view_metrics[0], view_metrics[2]], aavmr)
+                self.assertEqual(type(aavmr).FFD_PARTIAL_RESULTS, aavmr.fetch_failure_detail)
+                self.assertEqual([design_docs[1]], aavmr.failed_design_docs)
+
 
 class AsyncAllViewMetricsRetrieverPatcher(object):
 
@@ -1015,6 +4002,36 @@ class AsyncDatabaseMetricsRetrieverUnitTaseCase(unittest.TestCase):
             callback.assert_called_once_with(False, None, admr)
             self.assertEqual(type(admr).FFD_ERROR_TALKING_TO_COUCHDB, admr.fetch_failure_detail)
 
+    def test_fetch_failure_detail_passed_through(self):
+        fetch_failure_details = [
+            CouchDBAsyncHTTPClient.FFD_CIRCUIT_OPEN,
+            CouchDBAsyncHTTPClient.FFD_LOAD_SHED,
+            CouchDBAsyncHTTPClient.FFD_DEADLINE_EXCEEDED,
+            CouchDBAsyncHTTPClient.FFD_TRANSPORT_ERROR,
+            CouchDBAsyncHTTPClient.FFD_SERVER_ERROR,
+        ]
+        for fetch_failure_detail in fetch_failure_details:
+            with CouchDBAsyncHTTPClientPatcher(False, False, None, None, None, fetch_failure_detail):
+                callback = mock.Mock()
+
+                admr = AsyncDatabaseMetricsRetriever()
+                admr.fetch(callback)
+
+                callback.assert_called_once_with(False, None, admr)
+                self.assertEqual(fetch_failure_detail, admr.fetch_failure_detail)
+
+    def test_overlapping_fetch_failure_detail_not_passed_through(self):
+        # FFD_UNEXPECTED_RESPONSE_CODE has the same value as FFD_ERROR_GETTING_VIEW_METRICS
+        fetch_failure_detail = CouchDBAsyncHTTPClient.FFD_UNEXPECTED_RESPONSE_CODE
+        with CouchDBAsyncHTTPClientPatcher(False, False, None, None, None, fetch_failure_detail):
+            callback = mock.Mock()
+
+            admr = AsyncDatabaseMetricsRetriever()
+            admr.fetch(callback)
+
+            callback.assert_called_once_with(False, None, admr)
+            self.assertEqual(type(admr).FFD_ERROR_TALKING_TO_COUCHDB, admr.fetch_failure_detail)
+
     def test_fetch_error_getting_view_metrics(self):
         the_is_ok = True
         the_is_conflict = False
@@ -1059,3 +4076,32 @@ class AsyncDatabaseMetricsRetrieverUnitTaseCase(unittest.TestCase):
                 self.assertIsNotNone(database_metrics.view_metrics is the_view_metrics)
                 self.assertTrue(callback.call_args[0][2] is admr)
                 self.assertEqual(type(admr).FFD_OK, admr.fetch_failure_detail)
+
+    def test_partial_view_metrics(self):
+        the_response_body = {
+            "doc_count": 42,
+            "data_size": 43,
+            "disk_size": 44,
+        }
+        the_failed_design_doc = uuid.uuid4().hex
+
+        def fetch_patch(aavmr, callback):
+            self.assertEqual(5, aavmr.max_concurrency)
+            self.assertTrue(aavmr.allow_partial_results)
+            aavmr.failed_design_docs.append(the_failed_design_doc)
+            callback(True, [], aavmr)
+
+        with CouchDBAsyncHTTPClientPatcher(True, False, the_response_body, None, None):
+            with mock.patch(__name__ + ".async_model_actions.AsyncAllViewMetricsRetriever.fetch", fetch_patch):
+                callback = mock.Mock()
+
+                admr = AsyncDatabaseMetricsRetriever(
+                    max_view_metrics_concurrency=5,
+                    allow_partial_view_metrics=True)
+                admr.fetch(callback)
+
+                self.assertEqual(1, callback.call_count)
+                (is_ok, database_metrics, the_admr) = callback.call_args[0]
+                self.assertTrue(is_ok)
+                self.assertEqual([the_failed_design_doc], database_metrics.missing_view_metrics)
+                self.assertEqual(type(admr).FFD_PARTIAL_VIEW_METRICS, admr.fetch_failure_detail)
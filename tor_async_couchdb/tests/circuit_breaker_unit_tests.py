@@ -0,0 +1,161 @@
+"""This module contains the circuit_breaker module's unit tests."""
+
+import unittest
+
+import mock
+
+from ..circuit_breaker import CircuitBreaker
+from .. import circuit_breaker  # noqa, needed for patching using relative path
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    """A collection of unit tests for the CircuitBreaker class."""
+
+    def setUp(self):
+        self._patchers = [
+            mock.patch(__name__ + ".circuit_breaker._logger"),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+
+        self._time_patcher = mock.patch(__name__ + ".circuit_breaker.time.time")
+        self.time_patch = self._time_patcher.start()
+        self.time_patch.return_value = 1000.0
+
+    def tearDown(self):
+        for patcher in self._patchers:
+            patcher.stop()
+        self._time_patcher.stop()
+
+    def _request(self, cb, is_failure, request_time_in_ms=1):
+        self.assertTrue(cb.allow_request())
+        cb.record(is_failure, request_time_in_ms)
+
+    def test_ctr(self):
+        cb = CircuitBreaker()
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+        self.assertEqual(0, cb.num_rejected)
+        self.assertEqual(0, cb.num_times_opened)
+        self.assertTrue(cb.allow_request())
+
+    def test_stays_closed_below_min_num_requests(self):
+        cb = CircuitBreaker(window_size=10, min_num_requests=5)
+        for i in range(4):
+            self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+
+    def test_stays_closed_below_failure_rate_threshold(self):
+        cb = CircuitBreaker(failure_rate_threshold=0.5, window_size=10, min_num_requests=10)
+        for i in range(6):
+            self._request(cb, False)
+        for i in range(4):
+            self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+
+    def test_opens_on_failure_rate(self):
+        cb = CircuitBreaker(failure_rate_threshold=0.5, window_size=10, min_num_requests=10)
+        for i in range(5):
+            self._request(cb, False)
+        for i in range(5):
+            self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+        self.assertEqual(1, cb.num_times_opened)
+
+        self.assertFalse(cb.allow_request())
+        self.assertFalse(cb.allow_request())
+        self.assertEqual(2, cb.num_rejected)
+
+    def test_opens_on_slow_request_rate(self):
+        cb = CircuitBreaker(
+            slow_request_threshold_in_ms=100,
+            slow_request_rate_threshold=0.5,
+            window_size=4,
+            min_num_requests=4)
+        for i in range(2):
+            self._request(cb, False, 10)
+        for i in range(2):
+            self._request(cb, False, 500)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+
+    def test_window_is_rolling(self):
+        cb = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_num_requests=4)
+        for i in range(3):
+            self._request(cb, False)
+        self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+
+        # the oldest success drops out of the window
+        self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+
+    def _open(self, cb):
+        for i in range(cb.min_num_requests):
+            self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+
+    def test_half_open_after_open_duration(self):
+        cb = CircuitBreaker(window_size=2, min_num_requests=2, open_duration_in_ms=5000)
+        self._open(cb)
+
+        self.time_patch.return_value += 4.999
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+
+        self.time_patch.return_value += 0.001
+        self.assertEqual(CircuitBreaker.STATE_HALF_OPEN, cb.state)
+
+    def test_half_open_limits_trial_requests(self):
+        cb = CircuitBreaker(
+            window_size=2,
+            min_num_requests=2,
+            open_duration_in_ms=1000,
+            num_half_open_requests=2)
+        self._open(cb)
+        self.time_patch.return_value += 1
+        self.assertTrue(cb.allow_request())
+        self.assertTrue(cb.allow_request())
+        self.assertFalse(cb.allow_request())
+        self.assertEqual(CircuitBreaker.STATE_HALF_OPEN, cb.state)
+
+    def test_half_open_closes_after_successful_trials(self):
+        cb = CircuitBreaker(
+            window_size=2,
+            min_num_requests=2,
+            open_duration_in_ms=1000,
+            num_half_open_requests=2)
+        self._open(cb)
+        self.time_patch.return_value += 1
+        self._request(cb, False)
+        self.assertEqual(CircuitBreaker.STATE_HALF_OPEN, cb.state)
+        self._request(cb, False)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+
+        # window was cleared so a single failure doesn't reopen
+        self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, cb.state)
+
+    def test_half_open_reopens_after_failed_trial(self):
+        cb = CircuitBreaker(window_size=2, min_num_requests=2, open_duration_in_ms=1000)
+        self._open(cb)
+        self.time_patch.return_value += 1
+        self._request(cb, True)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+        self.assertEqual(2, cb.num_times_opened)
+
+    def test_half_open_reopens_after_slow_trial(self):
+        cb = CircuitBreaker(
+            slow_request_threshold_in_ms=100,
+            window_size=2,
+            min_num_requests=2,
+            open_duration_in_ms=1000)
+        self._open(cb)
+        self.time_patch.return_value += 1
+        self._request(cb, False, 500)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+
+    def test_responses_while_open_are_ignored(self):
+        cb = CircuitBreaker(window_size=2, min_num_requests=2)
+        self._open(cb)
+        cb.record(False, 1)
+        cb.record(True, 1)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, cb.state)
+        self.assertEqual(1, cb.num_times_opened)
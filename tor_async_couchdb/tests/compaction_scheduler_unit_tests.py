@@ -0,0 +1,188 @@
+"""This module contains the compaction_scheduler module's unit tests."""
+
+import datetime
+import unittest
+import uuid
+
+import mock
+
+from ..async_model_actions import DatabaseMetrics
+from ..async_model_actions import ViewMetrics
+from ..async_model_actions import get_default_db
+from ..compaction_scheduler import CompactionScheduler
+from .. import compaction_scheduler  # noqa, needed for patching using relative path
+
+
+class CompactionSchedulerTestCase(unittest.TestCase):
+    """A collection of unit tests for the CompactionScheduler class."""
+
+    def setUp(self):
+        self.active_tasks = []
+        self.database_metrics = None
+        self.compactions = []
+        self.compact_is_ok = True
+
+        def active_tasks_fetch_patch(aatr, callback):
+            callback(self.active_tasks is not None, self.active_tasks, aatr)
+
+        def metrics_fetch_patch(adbmr, callback):
+            callback(self.database_metrics is not None, self.database_metrics, adbmr)
+
+        def compact_patch(compactor, callback):
+            self.compactions.append(compactor.design_doc)
+            callback(self.compact_is_ok, compactor)
+
+        self._patchers = [
+            mock.patch(__name__ + ".compaction_scheduler.AsyncActiveTasksRetriever.fetch", active_tasks_fetch_patch),
+            mock.patch(__name__ + ".compaction_scheduler.AsyncDatabaseMetricsRetriever.fetch", metrics_fetch_patch),
+            mock.patch(__name__ + ".compaction_scheduler.AsyncCompactor.compact", compact_patch),
+            mock.patch(__name__ + ".compaction_scheduler._logger"),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+
+        self._current_patcher = mock.patch("tornado.ioloop.IOLoop.current")
+        self.io_loop = self._current_patcher.start().return_value
+
+    def tearDown(self):
+        for patcher in self._patchers:
+            patcher.stop()
+        self._current_patcher.stop()
+
+    def _database_metrics(self, fragmentation, views=None):
+        disk_size = 100 * 1024 * 1024
+        data_size = disk_size * (100 - fragmentation) / 100
+        view_metrics = [
+            ViewMetrics(design_doc, disk_size * (100 - view_fragmentation) / 100, disk_size)
+            for (design_doc, view_fragmentation) in (views or [])
+        ]
+        return DatabaseMetrics(uuid.uuid4().hex, 10, data_size, disk_size, view_metrics)
+
+    def _check(self, cs):
+        """Returns the (is_started, target) pair ```cs.check()``` calls back with."""
+        callback = mock.Mock()
+        cs.check(callback)
+        self.assertEqual(1, callback.call_count)
+        (is_started, target, the_cs) = callback.call_args[0]
+        self.assertIs(cs, the_cs)
+        if not is_started:
+            self.assertIsNone(target)
+        return (is_started, target)
+
+    def test_ctr(self):
+        cs = CompactionScheduler()
+        self.assertIs(cs.db, get_default_db())
+        self.assertTrue(0 < cs.fragmentation_threshold)
+        self.assertIsNone(cs.quiet_hours)
+        self.assertEqual([], cs.compactions)
+        self.assertEqual([], cs.active_compactions)
+
+    def test_is_in_quiet_hours(self):
+        def at(hour):
+            return datetime.datetime(2016, 1, 1, hour, 30)
+
+        cs = CompactionScheduler()
+        self.assertTrue(all(cs.is_in_quiet_hours(at(hour)) for hour in range(24)))
+
+        cs = CompactionScheduler(quiet_hours=(1, 5))
+        self.assertEqual([1, 2, 3, 4], [hour for hour in range(24) if cs.is_in_quiet_hours(at(hour))])
+
+        cs = CompactionScheduler(quiet_hours=(22, 2))
+        self.assertEqual([0, 1, 22, 23], [hour for hour in range(24) if cs.is_in_quiet_hours(at(hour))])
+
+    def test_outside_quiet_hours(self):
+        now = datetime.datetime.utcnow()
+        cs = CompactionScheduler(quiet_hours=((now.hour + 2) % 24, (now.hour + 3) % 24))
+        self.database_metrics = self._database_metrics(90)
+        self.assertEqual((False, None), self._check(cs))
+        self.assertEqual([], self.compactions)
+
+    def test_compacts_database_when_threshold_crossed(self):
+        cs = CompactionScheduler(fragmentation_threshold=50)
+        self.database_metrics = self._database_metrics(60)
+        self.assertEqual((True, None), self._check(cs))
+        self.assertEqual([None], self.compactions)
+        self.assertEqual(1, len(cs.compactions))
+        self.assertIsNone(cs.compactions[0][0])
+
+    def test_nothing_to_compact(self):
+        cs = CompactionScheduler(fragmentation_threshold=50)
+        self.database_metrics = self._database_metrics(40, [("dd", 49)])
+        self.assertEqual((False, None), self._check(cs))
+        self.assertEqual([], self.compactions)
+
+    def test_small_databases_are_not_compacted(self):
+        cs = CompactionScheduler(min_disk_size=1024 * 1024 * 1024)
+        self.database_metrics = self._database_metrics(90)
+        self.assertEqual((False, None), self._check(cs))
+
+    def test_most_fragmented_target_is_compacted(self):
+        cs = CompactionScheduler(fragmentation_threshold=50)
+        self.database_metrics = self._database_metrics(60, [("dd1", 70), ("dd2", 80)])
+        self.assertEqual((True, "dd2"), self._check(cs))
+        self.assertEqual(["dd2"], self.compactions)
+
+    def test_one_compaction_at_a_time(self):
+        cs = CompactionScheduler()
+        self.database_metrics = self._database_metrics(90)
+        self.active_tasks = [
+            {"type": "indexer", "progress": 10},
+            {"type": "view_compaction", "progress": 42},
+        ]
+        self.assertEqual((False, None), self._check(cs))
+        self.assertEqual([], self.compactions)
+        self.assertEqual([self.active_tasks[1]], cs.active_compactions)
+
+    def test_compactions_are_rate_limited(self):
+        cs = CompactionScheduler(min_interval_between_compactions_in_ms=60 * 60 * 1000)
+        self.database_metrics = self._database_metrics(90, [("dd", 60)])
+        self.assertEqual((True, None), self._check(cs))
+        self.assertEqual((True, "dd"), self._check(cs))
+        self.assertEqual((False, None), self._check(cs))
+        self.assertEqual([None, "dd"], self.compactions)
+
+    def test_failures(self):
+        cs = CompactionScheduler()
+
+        self.active_tasks = None
+        self.assertEqual((False, None), self._check(cs))
+
+        self.active_tasks = []
+        self.database_metrics = None
+        self.assertEqual((False, None), self._check(cs))
+
+        self.database_metrics = self._database_metrics(90)
+        self.compact_is_ok = False
+        self.assertEqual((False, None), self._check(cs))
+        self.assertEqual([None], self.compactions)
+        self.assertEqual([], cs.compactions)
+
+    def test_check_in_progress(self):
+        cs = CompactionScheduler()
+        self.database_metrics = self._database_metrics(90)
+        first_callback = mock.Mock()
+
+        def active_tasks_fetch_patch(aatr, callback):
+            second_callback = mock.Mock()
+            cs.check(second_callback)
+            second_callback.assert_called_once_with(False, None, cs)
+            callback(True, [], aatr)
+
+        with mock.patch(__name__ + ".compaction_scheduler.AsyncActiveTasksRetriever.fetch", active_tasks_fetch_patch):
+            cs.check(first_callback)
+
+        first_callback.assert_called_once_with(True, None, cs)
+
+    def test_start_schedules_checks(self):
+        cs = CompactionScheduler(check_interval_in_ms=1000)
+        cs.start()
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+        (delay, on_timeout) = self.io_loop.add_timeout.call_args[0]
+        self.assertEqual(1.0, delay.total_seconds())
+
+        self.database_metrics = self._database_metrics(10)
+        on_timeout()
+        self.assertEqual(2, self.io_loop.add_timeout.call_count)
+
+        cs.stop()
+        self.io_loop.remove_timeout.assert_called_once_with(self.io_loop.add_timeout.return_value)
@@ -0,0 +1,223 @@
+"""This module contains the concurrency_limiter module's unit tests."""
+
+import unittest
+
+import mock
+
+from ..concurrency_limiter import AdaptiveConcurrencyLimiter
+from ..priority_scheduler import PRIORITY_BACKGROUND
+from ..priority_scheduler import PRIORITY_INTERACTIVE
+from .. import concurrency_limiter  # noqa, needed for patching using relative path
+
+
+class AdaptiveConcurrencyLimiterTestCase(unittest.TestCase):
+    """A collection of unit tests for the AdaptiveConcurrencyLimiter class."""
+
+    def setUp(self):
+        self._patchers = [
+            mock.patch(__name__ + ".concurrency_limiter._logger"),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+
+        self._time_patcher = mock.patch(__name__ + ".concurrency_limiter.time.time")
+        self.time_patch = self._time_patcher.start()
+        self.time_patch.return_value = 1000.0
+
+    def tearDown(self):
+        for patcher in self._patchers:
+            patcher.stop()
+        self._time_patcher.stop()
+
+    def test_ctr(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=5)
+        self.assertEqual(5, acl.limit)
+        self.assertEqual(0, acl.num_in_flight)
+        self.assertEqual(0, acl.queue_size)
+        self.assertEqual(0, acl.num_shed)
+        self.assertIsNone(acl.no_load_latency_in_ms)
+
+    def test_requests_within_limit_start_immediately(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=2)
+        callbacks = [mock.Mock() for i in range(2)]
+        for callback in callbacks:
+            self.assertTrue(acl.acquire(callback))
+            callback.assert_called_once_with()
+        self.assertEqual(2, acl.num_in_flight)
+
+    def test_excess_requests_are_queued_then_shed(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_size=2)
+        callbacks = [mock.Mock() for i in range(4)]
+        self.assertTrue(acl.acquire(callbacks[0]))
+        self.assertTrue(acl.acquire(callbacks[1]))
+        self.assertTrue(acl.acquire(callbacks[2]))
+        self.assertFalse(acl.acquire(callbacks[3]))
+
+        self.assertEqual(1, acl.num_in_flight)
+        self.assertEqual(2, acl.queue_size)
+        self.assertEqual(1, acl.num_shed)
+        self.assertEqual(0, callbacks[1].call_count)
+
+        acl.release()
+        callbacks[1].assert_called_once_with()
+        self.assertEqual(0, callbacks[2].call_count)
+        self.assertEqual(1, acl.num_in_flight)
+        self.assertEqual(1, acl.queue_size)
+
+        acl.release()
+        callbacks[2].assert_called_once_with()
+        self.assertEqual(0, callbacks[3].call_count)
+
+    def test_queued_interactive_requests_start_first(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acl.acquire(mock.Mock())
+        background = mock.Mock()
+        acl.acquire(background, PRIORITY_BACKGROUND)
+        interactive = mock.Mock()
+        acl.acquire(interactive, PRIORITY_INTERACTIVE)
+        self.assertEqual(2, acl.queue_size)
+
+        acl.release()
+        interactive.assert_called_once_with()
+        self.assertEqual(0, background.call_count)
+
+        acl.release()
+        background.assert_called_once_with()
+
+    def test_cancel(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1)
+        started = mock.Mock()
+        acl.acquire(started)
+        queued = mock.Mock()
+        acl.acquire(queued, PRIORITY_BACKGROUND)
+
+        self.assertFalse(acl.cancel(started))
+        self.assertFalse(acl.cancel(queued, PRIORITY_INTERACTIVE))
+        self.assertTrue(acl.cancel(queued, PRIORITY_BACKGROUND))
+        self.assertEqual(0, acl.queue_size)
+
+        acl.release()
+        self.assertEqual(0, queued.call_count)
+        self.assertEqual(0, acl.num_in_flight)
+
+    def test_release_without_latency_does_not_adjust_limit(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acl.acquire(mock.Mock())
+        acl.release()
+        self.assertEqual(1, acl.limit)
+        self.assertIsNone(acl.no_load_latency_in_ms)
+
+    def test_additive_increase_when_limit_is_used(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+        for i in range(4):
+            acl.acquire(mock.Mock())
+            acl.acquire(mock.Mock())
+            acl.release(False, 10)
+            acl.release(False, 10)
+        self.assertEqual(3, acl.limit)
+
+        # never above max_limit
+        for i in range(10):
+            for j in range(3):
+                acl.acquire(mock.Mock())
+            for j in range(3):
+                acl.release(False, 10)
+        self.assertEqual(3, acl.limit)
+
+    def test_no_increase_when_limit_is_not_used(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=2)
+        for i in range(10):
+            acl.acquire(mock.Mock())
+            acl.release(False, 10)
+        self.assertEqual(2, acl.limit)
+
+    def test_multiplicative_decrease_on_slow_response(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=20, latency_tolerance=2.0, backoff_ratio=0.5)
+        acl.acquire(mock.Mock())
+        acl.release(False, 10)
+        self.assertEqual(10, acl.no_load_latency_in_ms)
+        self.assertEqual(20, acl.limit)
+
+        acl.acquire(mock.Mock())
+        acl.release(False, 100)
+        self.assertEqual(10, acl.limit)
+
+    def test_multiplicative_decrease_on_failure(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=20, backoff_ratio=0.5)
+        acl.acquire(mock.Mock())
+        acl.release(True, 10)
+        self.assertEqual(10, acl.limit)
+
+    def test_backs_off_once_per_latency(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=20, backoff_ratio=0.5)
+        for i in range(5):
+            acl.acquire(mock.Mock())
+        for i in range(5):
+            acl.release(True, 100)
+        self.assertEqual(10, acl.limit)
+
+        self.time_patch.return_value += 0.1
+        acl.acquire(mock.Mock())
+        acl.release(True, 100)
+        self.assertEqual(5, acl.limit)
+
+    def test_never_below_min_limit(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2, backoff_ratio=0.5)
+        acl.acquire(mock.Mock())
+        acl.release(True, 10)
+        self.assertEqual(2, acl.limit)
+
+    def test_reduced_limit_holds_back_queue(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, backoff_ratio=0.5)
+        acl.acquire(mock.Mock())
+        acl.acquire(mock.Mock())
+        queued = mock.Mock()
+        acl.acquire(queued)
+
+        acl.release(True, 10)
+        self.assertEqual(1, acl.limit)
+        self.assertEqual(0, queued.call_count)
+
+        acl.release(False, 10)
+        queued.assert_called_once_with()
+
+    def test_no_load_latency_decays(self):
+        acl = AdaptiveConcurrencyLimiter(no_load_latency_decay=0.5, latency_tolerance=100)
+        acl.acquire(mock.Mock())
+        acl.release(False, 10)
+        acl.acquire(mock.Mock())
+        acl.release(False, 30)
+        self.assertEqual(20, acl.no_load_latency_in_ms)
+        acl.acquire(mock.Mock())
+        acl.release(False, 5)
+        self.assertEqual(5, acl.no_load_latency_in_ms)
+
+    def test_requests_released_while_starting_do_not_recurse(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_size=10000)
+        acl.acquire(mock.Mock())
+
+        # each queued request completes (ex fails fast) as soon as it starts
+        callbacks = [mock.Mock(side_effect=lambda: acl.release()) for i in range(5000)]
+        for callback in callbacks:
+            acl.acquire(callback)
+
+        acl.release()
+        for callback in callbacks:
+            callback.assert_called_once_with()
+        self.assertEqual(0, acl.num_in_flight)
+        self.assertEqual(0, acl.queue_size)
+
+    def test_requests_queued_while_draining_are_started(self):
+        acl = AdaptiveConcurrencyLimiter(initial_limit=1)
+        acl.acquire(mock.Mock())
+
+        late = mock.Mock()
+
+        def queue_another_and_release():
+            acl.acquire(late, PRIORITY_BACKGROUND)
+            acl.release()
+
+        acl.acquire(queue_another_and_release)
+        acl.release()
+        late.assert_called_once_with()
+        self.assertEqual(1, acl.num_in_flight)
@@ -0,0 +1,40 @@
+"""This module contains the contention_monitor module's unit tests."""
+
+import unittest
+
+from ..contention_monitor import ContentionMonitor
+
+
+class ContentionMonitorTestCase(unittest.TestCase):
+    """A collection of unit tests for the ContentionMonitor class."""
+
+    def test_ctr(self):
+        cm = ContentionMonitor(decay=0.25)
+        self.assertEqual(0.25, cm.decay)
+        self.assertEqual(0, cm.num_writes)
+        self.assertEqual(0, cm.num_conflicts)
+        self.assertEqual(0.0, cm.conflict_rate)
+        self.assertIsNone(cm.latency_in_ms)
+
+    def test_first_latency_is_used_as_is(self):
+        cm = ContentionMonitor()
+        cm.record(False, 42)
+        self.assertEqual(42, cm.latency_in_ms)
+        self.assertEqual(0.0, cm.conflict_rate)
+
+    def test_moving_averages(self):
+        cm = ContentionMonitor(decay=0.5)
+        cm.record(True, 10)
+        self.assertEqual(0.5, cm.conflict_rate)
+        self.assertEqual(10, cm.latency_in_ms)
+
+        cm.record(True, 30)
+        self.assertEqual(0.75, cm.conflict_rate)
+        self.assertEqual(20, cm.latency_in_ms)
+
+        cm.record(False, 20)
+        self.assertEqual(0.375, cm.conflict_rate)
+        self.assertEqual(20, cm.latency_in_ms)
+
+        self.assertEqual(3, cm.num_writes)
+        self.assertEqual(2, cm.num_conflicts)
@@ -0,0 +1,122 @@
+"""This module contains the database_metrics_collector module's unit tests."""
+
+import unittest
+import uuid
+
+import mock
+
+from ..async_model_actions import AsyncDatabaseMetricsRetriever
+from ..async_model_actions import CouchDBDatabase
+from ..async_model_actions import get_default_db
+from ..database_metrics_collector import DatabaseMetricsCollector
+from .. import database_metrics_collector  # noqa, needed for patching using relative path
+
+
+class DatabaseMetricsCollectorTestCase(unittest.TestCase):
+    """A collection of unit tests for the DatabaseMetricsCollector class."""
+
+    def setUp(self):
+        self.fetch_callbacks = []
+
+        def fetch_patch(adbmr, callback):
+            self.fetch_callbacks.append((adbmr, callback))
+
+        self._fetch_patcher = mock.patch(
+            __name__ + ".database_metrics_collector.AsyncDatabaseMetricsRetriever.fetch",
+            fetch_patch)
+        self._fetch_patcher.start()
+
+        self._current_patcher = mock.patch("tornado.ioloop.IOLoop.current")
+        self.io_loop = self._current_patcher.start().return_value
+
+    def tearDown(self):
+        self._fetch_patcher.stop()
+        self._current_patcher.stop()
+
+    def _complete_fetch(self, is_ok, database_metrics=None):
+        (adbmr, callback) = self.fetch_callbacks.pop(0)
+        if not is_ok:
+            adbmr.fetch_failure_detail = AsyncDatabaseMetricsRetriever.FFD_ERROR_TALKING_TO_COUCHDB
+        callback(is_ok, database_metrics, adbmr)
+
+    def test_ctr(self):
+        db = CouchDBDatabase(uuid.uuid4().hex)
+        dmc = DatabaseMetricsCollector(refresh_interval_in_ms=500, db=db)
+        self.assertEqual(500, dmc.refresh_interval_in_ms)
+        self.assertIs(db, dmc.db)
+        self.assertIsNone(dmc.database_metrics)
+        self.assertIsNone(dmc.collected_at)
+        self.assertIsNone(dmc.staleness_in_ms)
+        self.assertIsNone(dmc.last_refresh_ok)
+
+        self.assertIs(get_default_db(), DatabaseMetricsCollector().db)
+
+    def test_start_refreshes_and_schedules_next_refresh(self):
+        dmc = DatabaseMetricsCollector(refresh_interval_in_ms=500)
+        dmc.start()
+        self.assertEqual(1, len(self.fetch_callbacks))
+        self.assertEqual(0, self.io_loop.add_timeout.call_count)
+
+        database_metrics = mock.Mock()
+        self._complete_fetch(True, database_metrics)
+        self.assertIs(database_metrics, dmc.database_metrics)
+        self.assertTrue(dmc.last_refresh_ok)
+        self.assertIsNotNone(dmc.collected_at)
+        self.assertTrue(0 <= dmc.staleness_in_ms)
+
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+        (delay, on_timeout) = self.io_loop.add_timeout.call_args[0]
+        self.assertEqual(0.5, delay.total_seconds())
+
+        on_timeout()
+        self.assertEqual(1, len(self.fetch_callbacks))
+
+        dmc.stop()
+        self._complete_fetch(True, mock.Mock())
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+
+    def test_failed_refresh_keeps_previous_snapshot(self):
+        dmc = DatabaseMetricsCollector()
+        database_metrics = mock.Mock()
+
+        dmc.refresh()
+        self._complete_fetch(True, database_metrics)
+        collected_at = dmc.collected_at
+
+        callback = mock.Mock()
+        with mock.patch(__name__ + ".database_metrics_collector._logger"):
+            dmc.refresh(callback)
+            self._complete_fetch(False)
+
+        self.assertFalse(dmc.last_refresh_ok)
+        self.assertIs(database_metrics, dmc.database_metrics)
+        self.assertEqual(collected_at, dmc.collected_at)
+        callback.assert_called_once_with(False, None, dmc)
+
+    def test_concurrent_refreshes_are_collapsed(self):
+        dmc = DatabaseMetricsCollector()
+
+        callbacks = [mock.Mock() for i in range(3)]
+        for callback in callbacks:
+            dmc.refresh(callback)
+        dmc.refresh()
+
+        self.assertEqual(1, len(self.fetch_callbacks))
+
+        database_metrics = mock.Mock()
+        self._complete_fetch(True, database_metrics)
+
+        for callback in callbacks:
+            callback.assert_called_once_with(True, database_metrics, dmc)
+
+        dmc.refresh()
+        self.assertEqual(1, len(self.fetch_callbacks))
+
+    def test_refresh_cancels_scheduled_refresh(self):
+        dmc = DatabaseMetricsCollector()
+        dmc.start()
+        self._complete_fetch(True, mock.Mock())
+        timeout = self.io_loop.add_timeout.return_value
+
+        dmc.refresh()
+        self.io_loop.remove_timeout.assert_called_once_with(timeout)
@@ -0,0 +1,110 @@
+"""This module contains the document_cache module's unit tests."""
+
+import unittest
+import uuid
+
+from ..document_cache import DocumentCache
+
+
+def _doc(size=0):
+    return {
+        "_id": uuid.uuid4().hex,
+        "_rev": "1-%s" % uuid.uuid4().hex,
+        "padding": "x" * size,
+    }
+
+
+class DocumentCacheTestCase(unittest.TestCase):
+    """A collection of unit tests for the DocumentCache class."""
+
+    def test_ctr(self):
+        dc = DocumentCache()
+        self.assertTrue(0 < dc.max_docs)
+        self.assertTrue(0 < dc.max_bytes)
+        self.assertEqual(0, dc.hits)
+        self.assertEqual(0, dc.misses)
+        self.assertEqual(0, dc.evictions)
+        self.assertEqual(0, len(dc))
+        self.assertEqual(0, dc.num_bytes)
+
+    def test_get_returns_copy(self):
+        dc = DocumentCache()
+        doc = _doc()
+        dc.put(doc["_id"], doc)
+        self.assertIsNone(dc.get(uuid.uuid4().hex))
+
+        cached_doc = dc.get(doc["_id"])
+        self.assertEqual(doc, cached_doc)
+        cached_doc["padding"] = "changed"
+        self.assertEqual(doc, dc.get(doc["_id"]))
+
+    def test_put_replaces_previous_revision(self):
+        dc = DocumentCache()
+        doc = _doc()
+        dc.put(doc["_id"], doc)
+        doc["_rev"] = "2-%s" % uuid.uuid4().hex
+        dc.put(doc["_id"], doc)
+        self.assertEqual(1, len(dc))
+        self.assertEqual(doc["_rev"], dc.get(doc["_id"])["_rev"])
+
+    def test_remove(self):
+        dc = DocumentCache()
+        doc = _doc()
+        dc.put(doc["_id"], doc)
+        dc.remove(doc["_id"])
+        dc.remove(doc["_id"])
+        self.assertEqual(0, len(dc))
+        self.assertEqual(0, dc.num_bytes)
+        self.assertIsNone(dc.get(doc["_id"]))
+
+    def test_revalidated(self):
+        dc = DocumentCache()
+        doc = _doc()
+        dc.revalidated(doc["_id"], doc)
+        self.assertEqual((0, 1), (dc.hits, dc.misses))
+        self.assertEqual(doc, dc.get(doc["_id"]))
+
+        dc.revalidated(doc["_id"])
+        self.assertEqual((1, 1), (dc.hits, dc.misses))
+        self.assertEqual(doc, dc.get(doc["_id"]))
+
+        doc["_rev"] = "2-%s" % uuid.uuid4().hex
+        dc.revalidated(doc["_id"], doc)
+        self.assertEqual((1, 2), (dc.hits, dc.misses))
+        self.assertEqual(1, len(dc))
+        self.assertEqual(doc["_rev"], dc.get(doc["_id"])["_rev"])
+
+    def test_count_bounded_lru_eviction(self):
+        dc = DocumentCache(max_docs=2)
+        docs = [_doc() for i in range(3)]
+
+        dc.put(docs[0]["_id"], docs[0])
+        dc.put(docs[1]["_id"], docs[1])
+        # make docs[0] the most recently used
+        dc.get(docs[0]["_id"])
+        dc.put(docs[2]["_id"], docs[2])
+
+        self.assertEqual(2, len(dc))
+        self.assertEqual(1, dc.evictions)
+        self.assertIsNotNone(dc.get(docs[0]["_id"]))
+        self.assertIsNone(dc.get(docs[1]["_id"]))
+        self.assertIsNotNone(dc.get(docs[2]["_id"]))
+
+    def test_size_bounded_eviction(self):
+        docs = [_doc(1000) for i in range(3)]
+        dc = DocumentCache(max_bytes=2500)
+
+        for doc in docs:
+            dc.put(doc["_id"], doc)
+
+        self.assertEqual(2, len(dc))
+        self.assertEqual(1, dc.evictions)
+        self.assertTrue(dc.num_bytes <= dc.max_bytes)
+        self.assertIsNone(dc.get(docs[0]["_id"]))
+
+    def test_doc_bigger_than_cache_is_not_cached(self):
+        dc = DocumentCache(max_bytes=100)
+        doc = _doc(1000)
+        dc.put(doc["_id"], doc)
+        self.assertEqual(0, len(dc))
+        self.assertEqual(0, dc.evictions)
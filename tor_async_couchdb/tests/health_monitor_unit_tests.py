@@ -0,0 +1,167 @@
+"""This module contains the health_monitor module's unit tests."""
+
+import json
+import unittest
+import uuid
+
+import mock
+
+from ..async_model_actions import CouchDBDatabase
+from ..async_model_actions import get_default_db
+from ..circuit_breaker import CircuitBreaker
+from ..health_monitor import HealthMonitor
+from .. import health_monitor  # noqa, needed for patching using relative path
+
+
+class HealthMonitorTestCase(unittest.TestCase):
+    """A collection of unit tests for the HealthMonitor class."""
+
+    def setUp(self):
+        self.checks = []
+
+        def check_patch(acdbhc, callback):
+            self.checks.append((acdbhc, callback))
+
+        self._patchers = [
+            mock.patch(__name__ + ".health_monitor.AsyncCouchDBHealthCheck.check", check_patch),
+            mock.patch(__name__ + ".health_monitor._logger"),
+        ]
+        for patcher in self._patchers:
+            patcher.start()
+
+        self._time_patcher = mock.patch(__name__ + ".health_monitor.time.time")
+        self.time_patch = self._time_patcher.start()
+        self.time_patch.return_value = 1000.0
+
+        self._current_patcher = mock.patch("tornado.ioloop.IOLoop.current")
+        self.io_loop = self._current_patcher.start().return_value
+
+    def tearDown(self):
+        for patcher in self._patchers:
+            patcher.stop()
+        self._time_patcher.stop()
+        self._current_patcher.stop()
+
+    def _probe(self, hm, is_ok, latency_in_ms):
+        hm.probe()
+        (acdbhc, callback) = self.checks.pop(0)
+        self.time_patch.return_value += latency_in_ms / 1000.0
+        callback(is_ok, acdbhc)
+
+    def test_ctr(self):
+        db = CouchDBDatabase(uuid.uuid4().hex)
+        hm = HealthMonitor(db=db)
+        self.assertIs(db, hm.db)
+        self.assertEqual(0, hm.num_probes)
+        self.assertIsNone(hm.success_rate)
+        self.assertIsNone(hm.latency_percentile(50))
+        self.assertIsNone(hm.last_probe_ok)
+        self.assertEqual(HealthMonitor.STATUS_RED, hm.status)
+
+        self.assertIs(get_default_db(), HealthMonitor().db)
+
+    def test_green(self):
+        hm = HealthMonitor(latency_slo_in_ms=100)
+        for i in range(10):
+            self._probe(hm, True, 10)
+        self.assertEqual(1.0, hm.success_rate)
+        self.assertAlmostEqual(10, hm.latency_percentile(50), places=3)
+        self.assertEqual(HealthMonitor.STATUS_GREEN, hm.status)
+
+    def test_yellow_when_latency_slo_exceeded(self):
+        hm = HealthMonitor(latency_slo_in_ms=100, latency_slo_percentile=90)
+        for i in range(9):
+            self._probe(hm, True, 10)
+        self._probe(hm, True, 500)
+        self.assertEqual(HealthMonitor.STATUS_GREEN, hm.status)
+        self._probe(hm, True, 500)
+        self.assertEqual(HealthMonitor.STATUS_YELLOW, hm.status)
+
+    def test_yellow_then_red_as_probes_fail(self):
+        hm = HealthMonitor(window_size=10, min_success_rate=0.8)
+        for i in range(10):
+            self._probe(hm, True, 1)
+
+        self._probe(hm, False, 1)
+        self.assertFalse(hm.last_probe_ok)
+        self.assertEqual(HealthMonitor.STATUS_YELLOW, hm.status)
+
+        self._probe(hm, False, 1)
+        self.assertEqual(HealthMonitor.STATUS_YELLOW, hm.status)
+
+        self._probe(hm, False, 1)
+        self.assertAlmostEqual(0.7, hm.success_rate)
+        self.assertEqual(HealthMonitor.STATUS_RED, hm.status)
+
+    def test_window_is_rolling(self):
+        hm = HealthMonitor(window_size=3)
+        self._probe(hm, False, 1)
+        for i in range(3):
+            self._probe(hm, True, 1)
+        self.assertEqual(3, hm.num_probes)
+        self.assertEqual(1.0, hm.success_rate)
+
+    def test_concurrent_probes_are_collapsed(self):
+        hm = HealthMonitor()
+        callbacks = [mock.Mock() for i in range(3)]
+        for callback in callbacks:
+            hm.probe(callback)
+        self.assertEqual(1, len(self.checks))
+
+        (acdbhc, check_callback) = self.checks.pop(0)
+        check_callback(True, acdbhc)
+        for callback in callbacks:
+            callback.assert_called_once_with(True, hm)
+        self.assertEqual(1, hm.num_probes)
+
+    def test_start_schedules_probes(self):
+        hm = HealthMonitor(probe_interval_in_ms=2000)
+        hm.start()
+        self.assertEqual(1, len(self.checks))
+        (acdbhc, check_callback) = self.checks.pop(0)
+        check_callback(True, acdbhc)
+
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+        (delay, on_timeout) = self.io_loop.add_timeout.call_args[0]
+        self.assertEqual(2.0, delay.total_seconds())
+
+        on_timeout()
+        self.assertEqual(1, len(self.checks))
+
+        hm.stop()
+        (acdbhc, check_callback) = self.checks.pop(0)
+        check_callback(True, acdbhc)
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+
+    def test_snapshot(self):
+        hm = HealthMonitor()
+        self._probe(hm, True, 20)
+        snapshot = hm.snapshot()
+        json.dumps(snapshot)
+        self.assertEqual(HealthMonitor.STATUS_GREEN, snapshot["status"])
+        self.assertEqual(1, snapshot["num_probes"])
+        self.assertEqual(1.0, snapshot["success_rate"])
+        self.assertTrue(snapshot["last_probe_ok"])
+        self.assertIsNotNone(snapshot["last_probe_at"])
+        self.assertAlmostEqual(20, snapshot["latency_in_ms"]["p99"], places=3)
+
+    def test_circuit_breaker_state(self):
+        circuit_breaker = mock.Mock()
+        circuit_breaker.state = CircuitBreaker.STATE_CLOSED
+        db = CouchDBDatabase(uuid.uuid4().hex, circuit_breaker=circuit_breaker)
+        hm = HealthMonitor(db=db)
+        self._probe(hm, True, 1)
+        self.assertEqual(CircuitBreaker.STATE_CLOSED, hm.circuit_breaker_state)
+        self.assertEqual(HealthMonitor.STATUS_GREEN, hm.status)
+
+        circuit_breaker.state = CircuitBreaker.STATE_HALF_OPEN
+        self.assertEqual(HealthMonitor.STATUS_YELLOW, hm.status)
+
+        circuit_breaker.state = CircuitBreaker.STATE_OPEN
+        self.assertEqual(HealthMonitor.STATUS_RED, hm.status)
+        self.assertEqual(CircuitBreaker.STATE_OPEN, hm.snapshot()["circuit_breaker"])
+
+    def test_no_circuit_breaker(self):
+        hm = HealthMonitor(db=CouchDBDatabase(uuid.uuid4().hex))
+        self.assertIsNone(hm.circuit_breaker_state)
+        self.assertIsNone(hm.snapshot()["circuit_breaker"])
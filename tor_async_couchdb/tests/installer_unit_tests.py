@@ -1,13 +1,20 @@
 """This module contains the installer module's unit/integration tests."""
 
+import httplib
+import json
+import os
+import shutil
 import sys
+import tempfile
 import uuid
 import unittest
 
 import mock
 
 from ..installer import CommandLineParser
+from ..installer import _create_design_docs
 from ..installer import main
+from .. import installer  # noqa, needed for patching using relative path
 
 
 class SysDotArgcPatcher(object):
@@ -63,6 +70,107 @@ class CommandLineParserTestCase(unittest.TestCase):
                 self.assertIsNotNone(mock_op_exit.call_args[0][1])
 
 
+class CreateDesignDocsTestCase(unittest.TestCase):
+    """Unit tests for installer._create_design_docs() function."""
+
+    def setUp(self):
+        self.design_docs_folder = tempfile.mkdtemp()
+        self.design_doc = {
+            "language": "javascript",
+            "views": {
+                "fruit_by_color": {
+                    "map": "function(doc) { emit(doc.color, null) }",
+                },
+            },
+        }
+        with open(os.path.join(self.design_docs_folder, "fruit_by_color.json"), "w") as design_doc_file:
+            json.dump(self.design_doc, design_doc_file)
+
+        self.database = "aaa%s" % uuid.uuid4().hex
+        self.host = "http://127.0.0.1:5984"
+        self.url = "%s/%s/_design/fruit_by_color" % (self.host, self.database)
+
+        self._logger_patcher = mock.patch(__name__ + ".installer._logger")
+        self._logger_patcher.start()
+
+    def tearDown(self):
+        self._logger_patcher.stop()
+        shutil.rmtree(self.design_docs_folder)
+
+    def _create_session(self, existing_design_doc):
+        session = mock.Mock()
+        if existing_design_doc is None:
+            session.get.return_value.status_code = httplib.NOT_FOUND
+        else:
+            session.get.return_value.status_code = httplib.OK
+            session.get.return_value.json.return_value = existing_design_doc
+        session.put.return_value.status_code = httplib.CREATED
+        return session
+
+    def _create_design_docs(self, session, update_design_docs):
+        return _create_design_docs(
+            self.database,
+            self.host,
+            session,
+            True,
+            self.design_docs_folder,
+            update_design_docs)
+
+    def test_new_design_doc(self):
+        session = self._create_session(None)
+        self.assertTrue(self._create_design_docs(session, False))
+
+        session.get.assert_called_once_with(self.url, verify=True)
+        self.assertEqual(session.put.call_count, 1)
+        self.assertEqual(session.put.call_args[0][0], self.url)
+        self.assertEqual(json.loads(session.put.call_args[1]["data"]), self.design_doc)
+
+    def test_unchanged_design_doc(self):
+        existing_design_doc = dict(self.design_doc, _id="_design/fruit_by_color", _rev="1-a")
+        for update_design_docs in [True, False]:
+            session = self._create_session(dict(existing_design_doc))
+            self.assertTrue(self._create_design_docs(session, update_design_docs))
+            self.assertEqual(session.get.call_count, 1)
+            self.assertEqual(session.put.call_count, 0)
+
+    def test_changed_design_doc_with_updates_enabled(self):
+        existing_design_doc = {
+            "_id": "_design/fruit_by_color",
+            "_rev": "1-a",
+            "language": "javascript",
+            "views": {},
+        }
+        session = self._create_session(existing_design_doc)
+        self.assertTrue(self._create_design_docs(session, True))
+
+        self.assertEqual(session.put.call_count, 1)
+        self.assertEqual(session.put.call_args[0][0], self.url)
+        expected_design_doc = dict(self.design_doc, _rev="1-a")
+        self.assertEqual(json.loads(session.put.call_args[1]["data"]), expected_design_doc)
+
+    def test_changed_design_doc_with_updates_disabled(self):
+        existing_design_doc = {
+            "_id": "_design/fruit_by_color",
+            "_rev": "1-a",
+            "language": "javascript",
+            "views": {},
+        }
+        session = self._create_session(existing_design_doc)
+        self.assertTrue(self._create_design_docs(session, False))
+
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual(session.put.call_count, 0)
+
+    def test_update_fails(self):
+        existing_design_doc = {
+            "_id": "_design/fruit_by_color",
+            "_rev": "1-a",
+        }
+        session = self._create_session(existing_design_doc)
+        session.put.return_value.status_code = httplib.CONFLICT
+        self.assertFalse(self._create_design_docs(session, True))
+
+
 class MainTestCase(unittest.TestCase):
     """Unit/integration tests for installer.main() function."""
 
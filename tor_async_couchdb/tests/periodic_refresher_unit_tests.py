@@ -0,0 +1,88 @@
+"""This module contains the periodic_refresher module's unit tests."""
+
+import unittest
+
+import mock
+
+from ..periodic_refresher import PeriodicRefresher
+
+
+class PeriodicRefresherTestCase(unittest.TestCase):
+    """A collection of unit tests for the PeriodicRefresher class."""
+
+    def setUp(self):
+        self.dones = []
+
+        self._current_patcher = mock.patch("tornado.ioloop.IOLoop.current")
+        self.io_loop = self._current_patcher.start().return_value
+
+    def tearDown(self):
+        self._current_patcher.stop()
+
+    def _refresh(self, done):
+        self.dones.append(done)
+
+    def test_ctr(self):
+        pr = PeriodicRefresher(self._refresh, 500)
+        self.assertEqual(self._refresh, pr.refresh_function)
+        self.assertEqual(500, pr.refresh_interval_in_ms)
+        self.assertFalse(pr.is_started)
+        self.assertEqual(0, len(self.dones))
+
+    def test_start_refreshes_and_schedules_next_refresh(self):
+        pr = PeriodicRefresher(self._refresh, 500)
+        pr.start()
+        self.assertTrue(pr.is_started)
+        self.assertEqual(1, len(self.dones))
+        self.assertEqual(0, self.io_loop.add_timeout.call_count)
+
+        self.dones.pop(0)()
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+        (delay, on_timeout) = self.io_loop.add_timeout.call_args[0]
+        self.assertEqual(0.5, delay.total_seconds())
+
+        on_timeout()
+        self.assertEqual(1, len(self.dones))
+
+        pr.stop()
+        self.assertFalse(pr.is_started)
+        self.dones.pop(0)()
+        self.assertEqual(1, self.io_loop.add_timeout.call_count)
+
+    def test_concurrent_refreshes_are_collapsed(self):
+        pr = PeriodicRefresher(self._refresh, 500)
+
+        callbacks = [mock.Mock() for i in range(3)]
+        for callback in callbacks:
+            pr.refresh(callback)
+        pr.refresh()
+        self.assertEqual(1, len(self.dones))
+
+        args = (True, mock.Mock())
+        self.dones.pop(0)(*args)
+        for callback in callbacks:
+            callback.assert_called_once_with(*args)
+
+        pr.refresh()
+        self.assertEqual(1, len(self.dones))
+
+    def test_refresh_cancels_scheduled_refresh(self):
+        pr = PeriodicRefresher(self._refresh, 500)
+        pr.start()
+        self.dones.pop(0)()
+        timeout = self.io_loop.add_timeout.return_value
+
+        pr.refresh()
+        self.io_loop.remove_timeout.assert_called_once_with(timeout)
+        self.assertEqual(1, len(self.dones))
+
+    def test_stop_cancels_scheduled_refresh(self):
+        pr = PeriodicRefresher(self._refresh, 500)
+        pr.start()
+        self.dones.pop(0)()
+        timeout = self.io_loop.add_timeout.return_value
+
+        pr.stop()
+        self.io_loop.remove_timeout.assert_called_once_with(timeout)
+        pr.stop()
+        self.assertEqual(1, self.io_loop.remove_timeout.call_count)
@@ -0,0 +1,130 @@
+"""This module contains the priority_scheduler module's unit tests."""
+
+import unittest
+
+import mock
+
+from ..priority_scheduler import PRIORITY_BACKGROUND
+from ..priority_scheduler import PRIORITY_INTERACTIVE
+from ..priority_scheduler import PriorityScheduler
+from ..priority_scheduler import QueueDrainer
+
+
+class QueueDrainerTestCase(unittest.TestCase):
+    """A collection of unit tests for the QueueDrainer class."""
+
+    def test_drain(self):
+        callbacks = [mock.Mock() for i in range(3)]
+        queue = list(callbacks)
+        qd = QueueDrainer()
+        qd.drain(lambda: queue.pop(0) if queue else None)
+        for callback in callbacks:
+            callback.assert_called_once_with()
+
+    def test_nested_drains_leave_draining_to_outermost_drain(self):
+        qd = QueueDrainer()
+        started = []
+        nested_start_next = mock.Mock(return_value=None)
+
+        def start_next():
+            if 3 <= len(started):
+                return None
+            started.append(len(started))
+            return lambda: qd.drain(nested_start_next)
+
+        qd.drain(start_next)
+        self.assertEqual([0, 1, 2], started)
+        self.assertEqual(0, nested_start_next.call_count)
+
+        # once the outermost drain is done drain() works again
+        qd.drain(nested_start_next)
+        nested_start_next.assert_called_once_with()
+
+
+class PrioritySchedulerTestCase(unittest.TestCase):
+    """A collection of unit tests for the PriorityScheduler class."""
+
+    def test_ctr(self):
+        ps = PriorityScheduler()
+        self.assertEqual(PriorityScheduler.default_max_concurrency_by_priority, ps.max_concurrency_by_priority)
+        for priority in [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]:
+            self.assertEqual(0, ps.num_in_flight_by_priority[priority])
+            self.assertEqual(0, ps.queue_size(priority))
+
+    def test_lanes_have_separate_budgets(self):
+        ps = PriorityScheduler({PRIORITY_INTERACTIVE: 2, PRIORITY_BACKGROUND: 1})
+
+        background_callbacks = [mock.Mock() for i in range(3)]
+        for callback in background_callbacks:
+            ps.acquire(PRIORITY_BACKGROUND, callback)
+        self.assertEqual(1, background_callbacks[0].call_count)
+        self.assertEqual(0, background_callbacks[1].call_count)
+        self.assertEqual(2, ps.queue_size(PRIORITY_BACKGROUND))
+
+        # a full background lane doesn't hold up interactive requests
+        interactive_callbacks = [mock.Mock() for i in range(2)]
+        for callback in interactive_callbacks:
+            ps.acquire(PRIORITY_INTERACTIVE, callback)
+            callback.assert_called_once_with()
+        self.assertEqual(2, ps.num_in_flight_by_priority[PRIORITY_INTERACTIVE])
+        self.assertEqual(1, ps.num_in_flight_by_priority[PRIORITY_BACKGROUND])
+
+    def test_release_starts_queued_requests_in_order(self):
+        ps = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        callbacks = [mock.Mock() for i in range(3)]
+        for callback in callbacks:
+            ps.acquire(PRIORITY_BACKGROUND, callback)
+
+        ps.release(PRIORITY_BACKGROUND)
+        callbacks[1].assert_called_once_with()
+        self.assertEqual(0, callbacks[2].call_count)
+
+        ps.release(PRIORITY_BACKGROUND)
+        callbacks[2].assert_called_once_with()
+
+        ps.release(PRIORITY_BACKGROUND)
+        self.assertEqual(0, ps.num_in_flight_by_priority[PRIORITY_BACKGROUND])
+
+    def test_cancel(self):
+        ps = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        started = mock.Mock()
+        ps.acquire(PRIORITY_BACKGROUND, started)
+        queued = mock.Mock()
+        ps.acquire(PRIORITY_BACKGROUND, queued)
+
+        self.assertFalse(ps.cancel(PRIORITY_BACKGROUND, started))
+        self.assertFalse(ps.cancel(PRIORITY_INTERACTIVE, queued))
+        self.assertTrue(ps.cancel(PRIORITY_BACKGROUND, queued))
+        self.assertEqual(0, ps.queue_size(PRIORITY_BACKGROUND))
+
+        ps.release(PRIORITY_BACKGROUND)
+        self.assertEqual(0, queued.call_count)
+        self.assertEqual(0, ps.num_in_flight_by_priority[PRIORITY_BACKGROUND])
+
+    def test_release_only_starts_same_priority(self):
+        ps = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        ps.acquire(PRIORITY_BACKGROUND, mock.Mock())
+        ps.acquire(PRIORITY_INTERACTIVE, mock.Mock())
+        queued = mock.Mock()
+        ps.acquire(PRIORITY_BACKGROUND, queued)
+
+        ps.release(PRIORITY_INTERACTIVE)
+        self.assertEqual(0, queued.call_count)
+
+    def test_requests_released_while_starting_do_not_recurse(self):
+        ps = PriorityScheduler({PRIORITY_INTERACTIVE: 1, PRIORITY_BACKGROUND: 1})
+        ps.acquire(PRIORITY_INTERACTIVE, mock.Mock())
+
+        # each queued request completes (ex fails fast) as soon as it starts
+        callbacks = [
+            mock.Mock(side_effect=lambda: ps.release(PRIORITY_INTERACTIVE))
+            for i in range(5000)
+        ]
+        for callback in callbacks:
+            ps.acquire(PRIORITY_INTERACTIVE, callback)
+
+        ps.release(PRIORITY_INTERACTIVE)
+        for callback in callbacks:
+            callback.assert_called_once_with()
+        self.assertEqual(0, ps.num_in_flight_by_priority[PRIORITY_INTERACTIVE])
+        self.assertEqual(0, ps.queue_size(PRIORITY_INTERACTIVE))
@@ -0,0 +1,133 @@
+"""This module contains the request_metrics module's unit tests."""
+
+import json
+import unittest
+import uuid
+
+from ..request_metrics import LatencyHistogram
+from ..request_metrics import RequestMetrics
+from ..request_metrics import status_class
+
+
+class StatusClassTestCase(unittest.TestCase):
+    """A collection of unit tests for the status_class function."""
+
+    def test_status_class(self):
+        self.assertEqual("2xx", status_class(200))
+        self.assertEqual("2xx", status_class(201))
+        self.assertEqual("3xx", status_class(304))
+        self.assertEqual("4xx", status_class(409))
+        self.assertEqual("5xx", status_class(503))
+        self.assertEqual("error", status_class(599))
+        self.assertEqual("error", status_class(None))
+
+
+class LatencyHistogramTestCase(unittest.TestCase):
+    """A collection of unit tests for the LatencyHistogram class."""
+
+    def test_empty(self):
+        h = LatencyHistogram()
+        self.assertEqual(0, h.count)
+        self.assertIsNone(h.min_in_ms)
+        self.assertIsNone(h.max_in_ms)
+        self.assertIsNone(h.percentile(50))
+
+    def test_single_value(self):
+        h = LatencyHistogram()
+        h.record(42.0)
+        self.assertEqual(1, h.count)
+        self.assertEqual(42.0, h.sum_in_ms)
+        self.assertEqual(42.0, h.min_in_ms)
+        self.assertEqual(42.0, h.max_in_ms)
+        for percentile in [0, 50, 99.9, 100]:
+            self.assertEqual(42.0, h.percentile(percentile))
+
+    def test_zero(self):
+        h = LatencyHistogram()
+        h.record(0)
+        self.assertEqual(0, h.percentile(50))
+
+    def test_percentiles_within_relative_error(self):
+        h = LatencyHistogram()
+        for value_in_ms in range(1, 10001):
+            h.record(value_in_ms / 10.0)
+
+        self.assertEqual(10000, h.count)
+        for (percentile, expected_in_ms) in [(50, 500.0), (90, 900.0), (99, 990.0), (99.9, 999.0)]:
+            value_in_ms = h.percentile(percentile)
+            self.assertTrue(
+                abs(value_in_ms - expected_in_ms) / expected_in_ms < 0.05,
+                (percentile, value_in_ms))
+
+        self.assertEqual(1000.0, h.percentile(100))
+
+    def test_number_of_buckets_is_bounded(self):
+        h = LatencyHistogram()
+        for value_in_ms in range(1, 100001):
+            h.record(float(value_in_ms))
+        self.assertTrue(len(h._counts_by_bucket) < 300)
+
+
+class RequestMetricsTestCase(unittest.TestCase):
+    """A collection of unit tests for the RequestMetrics class."""
+
+    def test_empty(self):
+        rm = RequestMetrics()
+        self.assertEqual([], rm.snapshot())
+
+    def test_record_and_snapshot(self):
+        rm = RequestMetrics()
+        rm.record("by_id", "GET", 200, 10.0, {"queue": 1.0, "total": 9.0})
+        rm.record("by_id", "GET", 200, 20.0, {"queue": 2.0, "total": 19.0})
+        rm.record("by_id", "GET", 404, 5.0)
+        rm.record("persist", "PUT", 409, 7.0, {})
+
+        snapshot = rm.snapshot(percentiles=[50, 100])
+
+        # snapshots are meant to be returned directly by request handlers
+        json.dumps(snapshot)
+
+        keys = [(s["operation"], s["method"], s["status_class"]) for s in snapshot]
+        self.assertEqual(
+            keys,
+            [
+                ("by_id", "GET", "2xx"),
+                ("by_id", "GET", "4xx"),
+                ("persist", "PUT", "4xx"),
+            ])
+
+        series = snapshot[0]
+        self.assertEqual(2, series["request_time"]["count"])
+        self.assertEqual(30.0, series["request_time"]["sum_in_ms"])
+        self.assertEqual(10.0, series["request_time"]["min_in_ms"])
+        self.assertEqual(20.0, series["request_time"]["max_in_ms"])
+        self.assertEqual(20.0, series["request_time"]["p100"])
+        self.assertIn("p50", series["request_time"])
+        self.assertEqual(["queue", "total"], sorted(series["phases"].keys()))
+        self.assertEqual(2, series["phases"]["queue"]["count"])
+
+        self.assertEqual({}, snapshot[1]["phases"])
+        self.assertEqual({}, snapshot[2]["phases"])
+
+    def test_default_percentiles(self):
+        rm = RequestMetrics()
+        rm.record(uuid.uuid4().hex, "GET", 200, 1.0)
+        request_time = rm.snapshot()[0]["request_time"]
+        for key in ["p50", "p90", "p99", "p99.9"]:
+            self.assertEqual(1.0, request_time[key])
+
+    def test_counters(self):
+        rm = RequestMetrics()
+        self.assertEqual({}, rm.counters)
+        rm.increment("conflicts")
+        rm.increment("conflicts")
+        rm.increment("retries", 3)
+        self.assertEqual({"conflicts": 2, "retries": 3}, rm.counters)
+
+    def test_reset(self):
+        rm = RequestMetrics()
+        rm.record(uuid.uuid4().hex, "GET", 200, 1.0)
+        rm.increment(uuid.uuid4().hex)
+        rm.reset()
+        self.assertEqual([], rm.snapshot())
+        self.assertEqual({}, rm.counters)
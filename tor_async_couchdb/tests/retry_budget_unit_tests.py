@@ -0,0 +1,74 @@
+"""This module contains the retry_budget module's unit tests."""
+
+import unittest
+
+import mock
+
+from ..retry_budget import RetryBudget
+from .. import retry_budget  # noqa, needed for patching using relative path
+
+
+class RetryBudgetTestCase(unittest.TestCase):
+    """A collection of unit tests for the RetryBudget class."""
+
+    def setUp(self):
+        self._time_patcher = mock.patch(__name__ + ".retry_budget.time.time")
+        self.time_patch = self._time_patcher.start()
+        self.time_patch.return_value = 1000.0
+
+    def tearDown(self):
+        self._time_patcher.stop()
+
+    def test_ctr(self):
+        rb = RetryBudget(retry_ratio=0.5, min_retries_per_second=2, max_num_tokens=7)
+        self.assertEqual(0.5, rb.retry_ratio)
+        self.assertEqual(2, rb.min_retries_per_second)
+        self.assertEqual(7, rb.max_num_tokens)
+        self.assertEqual(7, rb.num_tokens)
+        self.assertEqual(0, rb.num_withdrawn)
+        self.assertEqual(0, rb.num_rejected)
+
+    def test_withdraw_until_exhausted(self):
+        rb = RetryBudget(min_retries_per_second=0, max_num_tokens=3)
+        for i in range(3):
+            self.assertTrue(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+        self.assertEqual(3, rb.num_withdrawn)
+        self.assertEqual(2, rb.num_rejected)
+
+    def test_deposits_limit_retries_to_ratio_of_first_attempts(self):
+        rb = RetryBudget(retry_ratio=0.25, min_retries_per_second=0, max_num_tokens=1)
+        self.assertTrue(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+
+        for i in range(3):
+            rb.deposit()
+        self.assertFalse(rb.withdraw())
+        rb.deposit()
+        self.assertTrue(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+
+    def test_deposits_never_exceed_max_num_tokens(self):
+        rb = RetryBudget(retry_ratio=1, min_retries_per_second=0, max_num_tokens=2)
+        for i in range(10):
+            rb.deposit()
+        self.assertEqual(2, rb.num_tokens)
+
+    def test_refill_over_time(self):
+        rb = RetryBudget(retry_ratio=0, min_retries_per_second=10, max_num_tokens=5)
+        for i in range(5):
+            self.assertTrue(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+
+        self.time_patch.return_value += 0.1
+        self.assertTrue(rb.withdraw())
+        self.assertFalse(rb.withdraw())
+
+        self.time_patch.return_value += 60
+        self.assertEqual(5, rb.num_tokens)
+
+    def test_clock_going_backwards_does_not_drain(self):
+        rb = RetryBudget(retry_ratio=0, min_retries_per_second=10, max_num_tokens=5)
+        self.time_patch.return_value -= 10
+        self.assertEqual(5, rb.num_tokens)
@@ -5,6 +5,9 @@ import unittest
 import mock
 
 from .. import retry_strategy
+from ..contention_monitor import ContentionMonitor
+from ..request_metrics import RequestMetrics
+from ..retry_budget import RetryBudget
 
 
 class RetryStrategyTestCase(unittest.TestCase):
@@ -29,6 +32,72 @@ class RetryStrategyTestCase(unittest.TestCase):
         self.assertEqual(1, rs.num_retries)
         self.assertTrue(0 < rs.max_num_retries)
 
+    def test_next_attempt_counted_in_request_metrics(self):
+        request_metrics = RequestMetrics()
+        rs = retry_strategy.RetryStrategy(3, request_metrics=request_metrics)
+        self.assertTrue(rs.next_attempt())
+        self.assertTrue(rs.next_attempt())
+        self.assertFalse(rs.next_attempt())
+        self.assertEqual({"retries": 2, "retries_exhausted": 1}, request_metrics.counters)
+
+    def test_next_attempt_abandoned_at_deadline(self):
+        request_metrics = RequestMetrics()
+        rs = retry_strategy.RetryStrategy(request_metrics=request_metrics, deadline=1000.0)
+        with mock.patch(__name__ + ".retry_strategy.time.time", return_value=999.0):
+            self.assertTrue(rs.next_attempt())
+            self.assertTrue(rs.next_attempt(999))
+            self.assertFalse(rs.next_attempt(1000))
+        with mock.patch(__name__ + ".retry_strategy.time.time", return_value=1000.0):
+            self.assertFalse(rs.next_attempt())
+        self.assertEqual({"retries": 2, "retries_abandoned": 2}, request_metrics.counters)
+
+    def test_retry_budget_deposited_when_created(self):
+        retry_budget = mock.Mock()
+        rs = retry_strategy.RetryStrategy(retry_budget=retry_budget)
+        self.assertTrue(rs.retry_budget is retry_budget)
+        retry_budget.deposit.assert_called_once_with()
+        self.assertEqual(0, retry_budget.withdraw.call_count)
+
+    def test_reset(self):
+        retry_budget = mock.Mock()
+        rs = retry_strategy.RetryStrategy(2, retry_budget=retry_budget)
+        self.assertTrue(rs.next_attempt())
+        self.assertFalse(rs.next_attempt())
+
+        rs.reset()
+        self.assertEqual(0, rs.num_retries)
+        self.assertTrue(rs.next_attempt())
+
+        # resetting isn't a first attempt so doesn't deposit
+        retry_budget.deposit.assert_called_once_with()
+
+    def test_next_attempt_rejected_by_retry_budget(self):
+        request_metrics = RequestMetrics()
+        retry_budget = RetryBudget(retry_ratio=0, min_retries_per_second=0, max_num_tokens=2)
+        rs = retry_strategy.RetryStrategy(request_metrics=request_metrics, retry_budget=retry_budget)
+        self.assertTrue(rs.next_attempt())
+        self.assertTrue(rs.next_attempt())
+        self.assertFalse(rs.next_attempt())
+        self.assertEqual({"retries": 2, "retries_rejected": 1}, request_metrics.counters)
+        self.assertEqual(1, retry_budget.num_rejected)
+
+    def test_exhausted_retries_do_not_withdraw_from_retry_budget(self):
+        retry_budget = mock.Mock()
+        rs = retry_strategy.RetryStrategy(1, retry_budget=retry_budget)
+        self.assertFalse(rs.next_attempt())
+        self.assertEqual(0, retry_budget.withdraw.call_count)
+
+    def test_process_wide_retry_budget(self):
+        retry_budget = RetryBudget(retry_ratio=0, min_retries_per_second=0, max_num_tokens=1)
+        with mock.patch.object(retry_strategy.RetryStrategy, "retry_budget", retry_budget):
+            rs1 = retry_strategy.RetryStrategy()
+            rs2 = retry_strategy.ExponentialBackoffRetryStrategy()
+            self.assertTrue(rs1.retry_budget is retry_budget)
+            self.assertTrue(rs2.retry_budget is retry_budget)
+            self.assertTrue(rs1.next_attempt())
+            self.assertFalse(rs2.next_attempt())
+        self.assertIsNone(retry_strategy.RetryStrategy().retry_budget)
+
     def test_wait_must_be_implemented(self):
         rs = retry_strategy.RetryStrategy()
         callback = mock.Mock()
@@ -60,3 +129,145 @@ class ExponentialBackoffRetryStrategyTestCase(unittest.TestCase):
                     return
 
         self.assertTure(False)
+
+    def test_wait_abandoned_at_deadline(self):
+        request_metrics = RequestMetrics()
+        rs = retry_strategy.ExponentialBackoffRetryStrategy(
+            request_metrics=request_metrics,
+            deadline=1000.0)
+        with mock.patch(__name__ + ".retry_strategy.time.time", return_value=999.93):
+            add_timeout_patch = mock.Mock()
+            with mock.patch("tornado.ioloop.IOLoop.add_timeout", add_timeout_patch):
+                # first delay is 50 +/- 10 ms which fits in the 70 ms that remains
+                wait_callback = mock.Mock()
+                self.assertTrue(rs.wait(wait_callback))
+                self.assertEqual(1, add_timeout_patch.call_count)
+
+                # second delay is 100 +/- 10 ms which doesn't
+                wait_callback = mock.Mock()
+                self.assertFalse(rs.wait(wait_callback))
+                wait_callback.assert_called_once_with(0)
+                self.assertEqual(1, add_timeout_patch.call_count)
+
+        self.assertEqual({"retries": 1, "retries_abandoned": 1}, request_metrics.counters)
+
+
+class FullJitterRetryStrategyTestCase(unittest.TestCase):
+    """A collection of unit tests for the FullJitterRetryStrategy class."""
+
+    def test_ctr(self):
+        rs = retry_strategy.FullJitterRetryStrategy(7, base_delay_in_ms=10, max_delay_in_ms=500)
+        self.assertEqual(7, rs.max_num_retries)
+        self.assertEqual(10, rs.base_delay_in_ms)
+        self.assertEqual(500, rs.max_delay_in_ms)
+
+    def test_wait_spans_entire_backoff_window(self):
+        rs = retry_strategy.FullJitterRetryStrategy(base_delay_in_ms=10, max_delay_in_ms=75)
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout"):
+            with mock.patch(__name__ + ".retry_strategy.random.randint", return_value=3) as randint_patch:
+                self.assertEqual(3, rs.wait(mock.Mock()))
+                randint_patch.assert_called_once_with(1, 20)
+
+                randint_patch.reset_mock()
+                rs.wait(mock.Mock())
+                randint_patch.assert_called_once_with(1, 40)
+
+                randint_patch.reset_mock()
+                rs.wait(mock.Mock())
+                randint_patch.assert_called_once_with(1, 75)
+
+    def test_wait_until_exhausted(self):
+        rs = retry_strategy.FullJitterRetryStrategy(3)
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout") as add_timeout_patch:
+            self.assertTrue(0 < rs.wait(mock.Mock()))
+            self.assertTrue(0 < rs.wait(mock.Mock()))
+            wait_callback = mock.Mock()
+            self.assertIsNone(rs.wait(wait_callback))
+            wait_callback.assert_called_once_with(0)
+            self.assertEqual(2, add_timeout_patch.call_count)
+
+
+class DecorrelatedJitterRetryStrategyTestCase(unittest.TestCase):
+    """A collection of unit tests for the DecorrelatedJitterRetryStrategy class."""
+
+    def test_wait_depends_on_previous_wait(self):
+        rs = retry_strategy.DecorrelatedJitterRetryStrategy(base_delay_in_ms=10, max_delay_in_ms=100)
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout"):
+            with mock.patch(__name__ + ".retry_strategy.random.randint", return_value=25) as randint_patch:
+                self.assertEqual(25, rs.wait(mock.Mock()))
+                randint_patch.assert_called_once_with(10, 30)
+
+                randint_patch.reset_mock()
+                self.assertEqual(25, rs.wait(mock.Mock()))
+                randint_patch.assert_called_once_with(10, 75)
+
+            with mock.patch(__name__ + ".retry_strategy.random.randint", return_value=200):
+                self.assertEqual(100, rs.wait(mock.Mock()))
+
+    def test_reset_forgets_previous_wait(self):
+        rs = retry_strategy.DecorrelatedJitterRetryStrategy(base_delay_in_ms=10, max_delay_in_ms=100)
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout"):
+            with mock.patch(__name__ + ".retry_strategy.random.randint", return_value=25) as randint_patch:
+                rs.wait(mock.Mock())
+                rs.reset()
+
+                randint_patch.reset_mock()
+                rs.wait(mock.Mock())
+                randint_patch.assert_called_once_with(10, 30)
+
+    def test_wait_is_between_base_and_max(self):
+        rs = retry_strategy.DecorrelatedJitterRetryStrategy(45, base_delay_in_ms=10, max_delay_in_ms=1000)
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout"):
+            for i in range(40):
+                delay_in_ms = rs.wait(mock.Mock())
+                self.assertTrue(10 <= delay_in_ms <= 1000)
+
+
+class AdaptiveRetryStrategyTestCase(unittest.TestCase):
+    """A collection of unit tests for the AdaptiveRetryStrategy class."""
+
+    def _backoff_window(self, rs):
+        with mock.patch("tornado.ioloop.IOLoop.add_timeout"):
+            with mock.patch(__name__ + ".retry_strategy.random.randint", return_value=1) as randint_patch:
+                rs.wait(mock.Mock())
+        return randint_patch.call_args[0][1]
+
+    def test_without_contention_monitor(self):
+        rs = retry_strategy.AdaptiveRetryStrategy(base_delay_in_ms=10)
+        self.assertEqual(20, self._backoff_window(rs))
+
+    def test_without_observations(self):
+        rs = retry_strategy.AdaptiveRetryStrategy(
+            base_delay_in_ms=10,
+            contention_monitor=ContentionMonitor())
+        self.assertEqual(20, self._backoff_window(rs))
+
+    def test_base_delay_never_below_base_delay_in_ms(self):
+        contention_monitor = ContentionMonitor()
+        contention_monitor.record(False, 1)
+        rs = retry_strategy.AdaptiveRetryStrategy(base_delay_in_ms=10, contention_monitor=contention_monitor)
+        self.assertEqual(20, self._backoff_window(rs))
+
+    def test_base_delay_scales_with_latency(self):
+        contention_monitor = ContentionMonitor()
+        contention_monitor.record(False, 40)
+        rs = retry_strategy.AdaptiveRetryStrategy(base_delay_in_ms=10, contention_monitor=contention_monitor)
+        self.assertEqual(80, self._backoff_window(rs))
+
+    def test_base_delay_scales_with_conflict_rate(self):
+        contention_monitor = ContentionMonitor(decay=0.5)
+        contention_monitor.record(False, 40)
+        contention_monitor.record(True, 40)
+        self.assertEqual(0.5, contention_monitor.conflict_rate)
+        rs = retry_strategy.AdaptiveRetryStrategy(base_delay_in_ms=10, contention_monitor=contention_monitor)
+        self.assertEqual(160, self._backoff_window(rs))
+
+    def test_conflict_rate_is_bounded(self):
+        contention_monitor = ContentionMonitor(decay=1)
+        contention_monitor.record(True, 10)
+        rs = retry_strategy.AdaptiveRetryStrategy(
+            base_delay_in_ms=1,
+            max_delay_in_ms=10 * 1000,
+            contention_monitor=contention_monitor,
+            max_conflict_rate=0.75)
+        self.assertEqual(80, self._backoff_window(rs))
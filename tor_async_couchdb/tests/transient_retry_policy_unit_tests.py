@@ -0,0 +1,84 @@
+"""This module contains the transient_retry_policy module's unit tests."""
+
+import httplib
+import json
+import unittest
+
+import mock
+
+from ..retry_strategy import FullJitterRetryStrategy
+from ..transient_retry_policy import TransientRetryPolicy
+
+
+class TransientRetryPolicyTestCase(unittest.TestCase):
+    """A collection of unit tests for the TransientRetryPolicy class."""
+
+    def _request(self, method, url="http://127.0.0.1:5984/db/doc", body=None, streaming_callback=None):
+        request = mock.Mock()
+        request.method = method
+        request.url = url
+        request.body = json.dumps(body) if body is not None else None
+        request.streaming_callback = streaming_callback
+        return request
+
+    def _response(self, code):
+        response = mock.Mock()
+        response.code = code
+        return response
+
+    def test_ctr(self):
+        trp = TransientRetryPolicy()
+        self.assertEqual(
+            (httplib.BAD_GATEWAY, httplib.SERVICE_UNAVAILABLE, httplib.GATEWAY_TIMEOUT),
+            trp.retry_response_codes)
+        self.assertTrue(trp.retry_transport_errors)
+
+        rs = trp.create_retry_strategy()
+        self.assertTrue(isinstance(rs, FullJitterRetryStrategy))
+        self.assertIsNot(rs, trp.create_retry_strategy())
+
+    def test_is_idempotent(self):
+        trp = TransientRetryPolicy()
+
+        self.assertTrue(trp.is_idempotent(self._request("GET")))
+        self.assertTrue(trp.is_idempotent(self._request("HEAD")))
+
+        self.assertTrue(trp.is_idempotent(self._request("PUT", body={"_id": "doc", "_rev": "1-a"})))
+        self.assertTrue(trp.is_idempotent(self._request("PUT", url="http://127.0.0.1:5984/db/doc/att?rev=1-a")))
+        self.assertFalse(trp.is_idempotent(self._request("PUT", body={"_id": "doc"})))
+        self.assertFalse(trp.is_idempotent(self._request("PUT", body=[])))
+        self.assertFalse(trp.is_idempotent(self._request("PUT")))
+
+        request = self._request("PUT")
+        request.body = "not json"
+        self.assertFalse(trp.is_idempotent(request))
+
+        self.assertTrue(trp.is_idempotent(self._request("DELETE", url="http://127.0.0.1:5984/db/doc?rev=1-a")))
+        self.assertFalse(trp.is_idempotent(self._request("DELETE")))
+
+        self.assertFalse(trp.is_idempotent(self._request("POST", body={"_rev": "1-a"})))
+
+    def test_streamed_requests_are_not_idempotent(self):
+        trp = TransientRetryPolicy()
+        self.assertFalse(trp.is_idempotent(self._request("GET", streaming_callback=mock.Mock())))
+
+    def test_is_transient(self):
+        trp = TransientRetryPolicy()
+        self.assertTrue(trp.is_transient(self._response(599)))
+        self.assertTrue(trp.is_transient(self._response(None)))
+        self.assertTrue(trp.is_transient(self._response(httplib.SERVICE_UNAVAILABLE)))
+        self.assertFalse(trp.is_transient(self._response(httplib.INTERNAL_SERVER_ERROR)))
+        self.assertFalse(trp.is_transient(self._response(httplib.CONFLICT)))
+        self.assertFalse(trp.is_transient(self._response(httplib.OK)))
+
+        trp = TransientRetryPolicy(
+            retry_response_codes=(httplib.INTERNAL_SERVER_ERROR,),
+            retry_transport_errors=False)
+        self.assertFalse(trp.is_transient(self._response(599)))
+        self.assertTrue(trp.is_transient(self._response(httplib.INTERNAL_SERVER_ERROR)))
+
+    def test_should_retry(self):
+        trp = TransientRetryPolicy()
+        self.assertTrue(trp.should_retry(self._request("GET"), self._response(599)))
+        self.assertFalse(trp.should_retry(self._request("GET"), self._response(httplib.NOT_FOUND)))
+        self.assertFalse(trp.should_retry(self._request("POST"), self._response(599)))
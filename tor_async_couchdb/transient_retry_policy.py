@@ -0,0 +1,87 @@
+"""This module contains the policy ```CouchDBAsyncHTTPClient``` uses to
+decide if (and how) requests which fail for transient reasons - connection
+failures, timeouts and 5xx responses from a busy CouchDB node - are retried
+rather than failing the async action which issued the request.
+"""
+
+import httplib
+import json
+import urlparse
+
+from retry_strategy import FullJitterRetryStrategy
+
+
+def _create_default_retry_strategy():
+    return FullJitterRetryStrategy(max_num_retries=3, base_delay_in_ms=50, max_delay_in_ms=1000)
+
+
+class TransientRetryPolicy(object):
+    """```TransientRetryPolicy``` describes which requests
+    ```CouchDBAsyncHTTPClient``` retries and how.
+
+    Only idempotent requests are retried - GET, HEAD, PUT of a document
+    revision (ie the body contains a ```_rev``` or the query string
+    contains a ```rev```) and DELETE of a document revision (ie the query
+    string contains a ```rev```). Since a document revision can only be
+    replaced once, repeating a PUT or DELETE whose first attempt reached
+    CouchDB results in a 409 Conflict rather than a duplicate write.
+    Requests whose response is streamed aren't retried because part of
+    the response may already have been consumed.
+
+    A request is retried if CouchDB responds with one of
+    ```retry_response_codes``` or, when ```retry_transport_errors```
+    is ```True```, if the request fails without a response from CouchDB
+    (connection failures, connection resets and timeouts - which tornado
+    reports with a response code of 599).
+
+    ```create_retry_strategy``` is a callable with no arguments which
+    creates the ```RetryStrategy``` directing a request's retries.
+    A retry strategy is created when each idempotent request is first
+    issued (so each request deposits into the strategy's ```retry_budget```
+    once) and the retry strategy's ```deadline``` is set to the request's
+    deadline.
+    """
+
+    def __init__(self,
+                 create_retry_strategy=_create_default_retry_strategy,
+                 retry_response_codes=(httplib.BAD_GATEWAY, httplib.SERVICE_UNAVAILABLE, httplib.GATEWAY_TIMEOUT),
+                 retry_transport_errors=True):
+        object.__init__(self)
+
+        self.create_retry_strategy = create_retry_strategy
+        self.retry_response_codes = retry_response_codes
+        self.retry_transport_errors = retry_transport_errors
+
+    def is_idempotent(self, request):
+        if request.streaming_callback:
+            return False
+
+        if request.method in ("GET", "HEAD"):
+            return True
+
+        query = urlparse.parse_qs(urlparse.urlparse(request.url).query)
+
+        if request.method == "DELETE":
+            return "rev" in query
+
+        if request.method == "PUT":
+            if "rev" in query:
+                return True
+            try:
+                body = json.loads(request.body) if request.body else None
+            except ValueError:
+                return False
+            return isinstance(body, dict) and "_rev" in body
+
+        return False
+
+    def is_transient(self, response):
+        if not response.code or response.code == 599:
+            return self.retry_transport_errors
+        return response.code in self.retry_response_codes
+
+    def should_retry(self, request, response):
+        """Returns ```True``` if ```request``` which resulted in
+        ```response``` should be retried.
+        """
+        return self.is_transient(response) and self.is_idempotent(request)